@@ -1,3 +1,5 @@
+import asyncio
+
 import reflex as rx
 from rxconfig import config
 from .pages.customers_page import customers_page
@@ -7,7 +9,7 @@ from .pages.inventory_page import inventory_page
 from .pages.promos_loyalty_page import promos_loyalty_page
 from .pages.analytics_page import analytics_page
 from .pages.admin_audit_page import admin_audit_page
-from . import db
+from . import db, heavy_hitters
 
 
 # =========================
@@ -34,6 +36,10 @@ class State(rx.State):
     orders_count: int = 0
     returns_count: int = 0
 
+    # --- Top de productos "ahora" (heavy_hitters.py) ---
+    top_window: str = "dia"
+    top_products: list[dict] = []
+
     # ---------- LÓGICA DE LOGIN ----------
 
     def do_login(self):
@@ -46,6 +52,7 @@ class State(rx.State):
             self.current_section = "resumen"
             # Al iniciar sesión cargamos los KPIs del dashboard:
             self.load_dashboard_kpis()
+            return State.refresh_top_products
         else:
             self.login_error = "Usuario o contraseña incorrectos."
 
@@ -65,6 +72,7 @@ class State(rx.State):
         # Si volvemos al resumen, recargamos KPIs (por si hubo cambios)
         if section == "resumen":
             self.load_dashboard_kpis()
+            return State.refresh_top_products
 
     # ---------- KPIs DEL RESUMEN ----------
 
@@ -80,6 +88,23 @@ class State(rx.State):
         self.products_count = productos[0]["c"] if productos else 0
         self.orders_count = ordenes[0]["c"] if ordenes else 0
         self.returns_count = devoluciones[0]["c"] if devoluciones else 0
+        self.load_top_products()
+
+    def load_top_products(self):
+        """Top de productos vendidos en el día / semana actual (estimado, desde memoria)."""
+        self.top_products = heavy_hitters.get_top_products(self.top_window)
+
+    @rx.event(background=True)
+    async def refresh_top_products(self):
+        """Lee las órdenes nuevas del top en segundo plano (a lo más cada REFRESH_EVERY_S)."""
+        await asyncio.to_thread(heavy_hitters.refresh_if_stale)
+        async with self:
+            self.load_top_products()
+
+    def set_top_window(self, value: str):
+        if value in heavy_hitters.WINDOWS:
+            self.top_window = value
+            self.load_top_products()
 
 
 # =========================
@@ -165,11 +190,74 @@ def resumen_section() -> rx.Component:
             spacing="4",
             wrap="wrap",
         ),
+        _top_products_widget(),
         spacing="4",
         width="100%",
     )
 
 
+def _top_products_widget() -> rx.Component:
+    """Productos más vendidos ahora (día o semana), desde el sketch en memoria."""
+    return rx.box(
+        rx.vstack(
+            rx.hstack(
+                rx.heading("Top productos ahora", size="4", color="orange.9"),
+                rx.spacer(),
+                rx.select(
+                    list(heavy_hitters.WINDOWS),
+                    value=State.top_window,
+                    on_change=State.set_top_window,
+                    size="1",
+                ),
+                rx.button(
+                    "Actualizar",
+                    size="1",
+                    variant="outline",
+                    on_click=State.refresh_top_products,
+                ),
+                align_items="center",
+                width="100%",
+            ),
+            rx.cond(
+                State.top_products == [],
+                rx.text(
+                    "Todavía no hay ventas en esta ventana.",
+                    font_size="0.85rem",
+                    color="gray.9",
+                ),
+            ),
+            rx.box(
+                rx.foreach(
+                    State.top_products,
+                    lambda r: rx.hstack(
+                        rx.badge(r["Posición"], color_scheme="orange"),
+                        rx.text(r["Producto"], font_size="0.9rem"),
+                        rx.spacer(),
+                        rx.text(f"~{r['Unidades']} u.", font_size="0.85rem", color="gray.9"),
+                        width="100%",
+                        align_items="center",
+                    ),
+                ),
+                max_height="22rem",
+                overflow_y="auto",
+                width="100%",
+            ),
+            rx.text(
+                "Unidades estimadas con count-min sketch (pueden estar levemente sobreestimadas).",
+                font_size="0.75rem",
+                color="gray.8",
+            ),
+            spacing="2",
+            width="100%",
+        ),
+        bg="white",
+        padding="1rem 1.25rem",
+        border_radius="1rem",
+        box_shadow="0 8px 16px rgba(15, 23, 42, 0.08)",
+        width="100%",
+        max_width="40rem",
+    )
+
 
 def _kpi_card(title: str, value: str, subtitle: str) -> rx.Component:
     """Card simple para mostrar KPIs en el dashboard."""
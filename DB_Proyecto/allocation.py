@@ -0,0 +1,117 @@
+"""
+Asignación de bodegas para surtir un pedido.
+
+- City_warehouse_priority (precalculada por sp_recalcular_prioridad_bodegas)
+  da, por ciudad, las bodegas en orden de cercanía. Se carga completa en
+  memoria y se recarga cada PRIORITY_TTL_S segundos.
+- El stock sale de Inventory_balances (mantenida por triggers): una sola
+  consulta por carrito, por PRIMARY KEY, solo con los productos del carrito.
+- Cada línea se surte desde la bodega más cercana con stock; si no alcanza,
+  el resto pasa a la siguiente. El costo por línea depende del número de
+  bodegas, no del tamaño de las tablas.
+- Las líneas de un mismo carrito comparten el stock: lo que toma una ya no
+  está disponible para la siguiente.
+
+Solo sugiere: no reserva ni descuenta stock.
+"""
+
+import threading
+import time
+
+from . import db
+
+PRIORITY_TTL_S = 600
+
+
+class _PriorityCache:
+    """Bodegas por ciudad en orden de prioridad."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_city: dict[int, list[int]] = {}
+        self._all_warehouses: list[int] = []
+        self._loaded_at = 0.0
+
+    def _load(self):
+        by_city: dict[int, list[int]] = {}
+        rows = db.run_select(
+            "SELECT Cities_ID, Warehouses_ID FROM City_warehouse_priority ORDER BY Cities_ID, Prioridad"
+        )
+        for row in rows:
+            by_city.setdefault(row["Cities_ID"], []).append(row["Warehouses_ID"])
+        self._by_city = by_city
+        self._all_warehouses = [r["ID"] for r in db.run_select("SELECT ID FROM Warehouses ORDER BY ID")]
+        self._loaded_at = time.monotonic()
+
+    def warehouses_for(self, city_id: int) -> list[int]:
+        with self._lock:
+            if not self._by_city or time.monotonic() - self._loaded_at > PRIORITY_TTL_S:
+                self._load()
+            # Ciudad agregada después del último cálculo: todas las bodegas por ID
+            return self._by_city.get(city_id, self._all_warehouses)
+
+
+_priorities = _PriorityCache()
+
+
+def _balances(product_ids: list[int]) -> dict[tuple[int, int], int]:
+    """{(producto, bodega): stock} con stock positivo para los productos dados."""
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    rows = db.run_select(
+        f"""
+        SELECT Products_ID, Warehouses_ID, Stock
+        FROM Inventory_balances
+        WHERE Products_ID IN ({placeholders}) AND Stock > 0
+        """,
+        tuple(product_ids),
+    )
+    return {(r["Products_ID"], r["Warehouses_ID"]): r["Stock"] for r in rows}
+
+
+def allocate(items: list[tuple[int, int]], city_id: int) -> list[dict]:
+    """
+    Propone desde qué bodegas surtir cada línea [(product_id, cantidad), ...]
+    para un cliente en city_id. Por línea devuelve producto, cantidad,
+    asignaciones [{"bodega", "cantidad", "prioridad"}] y faltante.
+    Lanza ValueError si alguna cantidad no es positiva.
+    """
+    if not items:
+        return []
+    for product_id, quantity in items:
+        if quantity <= 0:
+            raise ValueError(f"cantidad debe ser mayor que 0 (producto {product_id}: {quantity})")
+    warehouses = _priorities.warehouses_for(city_id)
+    stock = _balances(sorted({product_id for product_id, _ in items}))
+
+    lines = []
+    for product_id, quantity in items:
+        pending = quantity
+        assignments = []
+        for priority, warehouse_id in enumerate(warehouses, start=1):
+            if pending == 0:
+                break
+            available = stock.get((product_id, warehouse_id), 0)
+            if available <= 0:
+                continue
+            taken = min(available, pending)
+            stock[(product_id, warehouse_id)] = available - taken
+            pending -= taken
+            assignments.append({"bodega": warehouse_id, "cantidad": taken, "prioridad": priority})
+        lines.append(
+            {
+                "producto": product_id,
+                "cantidad": quantity,
+                "asignaciones": assignments,
+                "faltante": pending,
+            }
+        )
+    return lines
+
+
+def allocate_for_customer(customer_id: int, items: list[tuple[int, int]]) -> list[dict]:
+    """Igual que allocate(), usando la ciudad del cliente."""
+    customer = db.get_customer_by_id(customer_id)
+    if customer is None:
+        print("allocation.allocate_for_customer: cliente no encontrado:", customer_id)
+        return []
+    return allocate(items, customer["Cities_ID"])
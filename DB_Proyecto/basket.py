@@ -0,0 +1,158 @@
+"""
+Análisis de canasta (market basket): productos que se compran juntos.
+
+- Lee Order_items por rangos de Ordenes_ID (usa idx_Order_items_orden_producto)
+  y arma por bloque una matriz dispersa orden × producto (1 = la orden
+  incluye el producto).
+- Acumula la co-ocurrencia producto × producto = Xᵀ·X; la diagonal es el
+  número de órdenes de cada producto.
+- Calcula soporte, confianza y lift de cada par (a → b) y guarda los
+  TOP_K mejores por producto (por lift) en la tabla Product_pairs.
+
+Uso programado:  python -m DB_Proyecto.basket
+"""
+
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from mysql.connector import Error
+
+from . import db
+
+# Órdenes (rango de IDs) leídas por bloque
+ORDER_CHUNK = 50_000
+
+# Pares guardados por producto y mínimo de órdenes en común para considerarlos
+TOP_K = 5
+MIN_ORDERS_TOGETHER = 2
+
+
+def _cooccurrence() -> tuple[sp.csr_matrix, int]:
+    """
+    Devuelve (matriz de co-ocurrencia producto × producto, órdenes con items),
+    leyendo todo desde un mismo snapshot consistente.
+    """
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        cursor.execute("SELECT COALESCE(MAX(ID), 0) FROM Products")
+        n_products = cursor.fetchone()[0] + 1
+        cursor.execute("SELECT COALESCE(MIN(Ordenes_ID), 0), COALESCE(MAX(Ordenes_ID), 0) FROM Order_items")
+        low, high = cursor.fetchone()
+
+        counts = sp.csr_matrix((n_products, n_products), dtype=np.int64)
+        n_orders = 0
+        for start in range(low, high + 1, ORDER_CHUNK):
+            cursor.execute(
+                """
+                SELECT Ordenes_ID, Products_ID
+                FROM Order_items
+                WHERE Ordenes_ID >= %s AND Ordenes_ID < %s
+                """,
+                (start, start + ORDER_CHUNK),
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                continue
+
+            orders, products = np.array(rows, dtype=np.int64).T
+            chunk_orders, order_index = np.unique(orders, return_inverse=True)
+            incidence = sp.csr_matrix(
+                (np.ones(len(products), dtype=np.int64), (order_index, products)),
+                shape=(len(chunk_orders), n_products),
+            )
+            counts = counts + (incidence.T @ incidence)
+            n_orders += len(chunk_orders)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return counts.tocsr(), n_orders
+
+
+def compute_pairs(
+    counts: sp.csr_matrix,
+    n_orders: int,
+    top_k: int = TOP_K,
+    min_orders: int = MIN_ORDERS_TOGETHER,
+) -> list[tuple]:
+    """
+    A partir de la co-ocurrencia devuelve, por producto, los top_k pares
+    (producto, relacionado, órdenes_juntos, soporte, confianza, lift, rank).
+    """
+    if n_orders == 0:
+        return []
+
+    product_orders = counts.diagonal().astype(np.float64)
+    coo = counts.tocoo()
+    mask = (coo.row != coo.col) & (coo.data >= min_orders)
+    a, b, together = coo.row[mask], coo.col[mask], coo.data[mask].astype(np.float64)
+
+    support = together / n_orders
+    confidence = together / product_orders[a]
+    lift = confidence / (product_orders[b] / n_orders)
+
+    # Orden: producto, luego lift desc, luego confianza desc
+    order = np.lexsort((-confidence, -lift, a))
+    a, b, together = a[order], b[order], together[order]
+    support, confidence, lift = support[order], confidence[order], lift[order]
+
+    rank = np.arange(len(a)) - np.searchsorted(a, a, side="left") + 1
+    keep = rank <= top_k
+
+    return [
+        (int(p), int(r), int(n), float(s), float(c), float(l), int(k))
+        for p, r, n, s, c, l, k in zip(
+            a[keep], b[keep], together[keep], support[keep],
+            confidence[keep], lift[keep], rank[keep],
+        )
+    ]
+
+
+def refresh_product_pairs(
+    top_k: int = TOP_K,
+    min_orders: int = MIN_ORDERS_TOGETHER,
+) -> tuple[bool, str]:
+    """
+    Recalcula Product_pairs completa. El reemplazo (DELETE + INSERT) va en
+    una sola transacción, así la página de productos nunca ve la tabla vacía.
+    """
+    start = time.perf_counter()
+    conn = None
+    cursor = None
+    try:
+        counts, n_orders = _cooccurrence()
+        pairs = compute_pairs(counts, n_orders, top_k, min_orders)
+
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Product_pairs")
+        for i in range(0, len(pairs), 5_000):
+            cursor.executemany(
+                """
+                INSERT INTO Product_pairs
+                  (Products_ID, Relacionado_ID, `Ordenes juntos`, Soporte, Confianza, Lift, `Rank`)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                pairs[i : i + 5_000],
+            )
+        conn.commit()
+    except Error as e:
+        if conn:
+            conn.rollback()
+        return False, f"Error al calcular productos relacionados: {e}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    elapsed = time.perf_counter() - start
+    return True, f"{len(pairs)} pares calculados sobre {n_orders} órdenes ({elapsed:.1f} s)."
+
+
+if __name__ == "__main__":
+    ok, message = refresh_product_pairs()
+    print(("✅ " if ok else "❌ ") + message)
@@ -0,0 +1,267 @@
+"""
+Motor analítico columnar en memoria (NumPy) para LootBox.
+
+- Carga Ordenes, Order_items y Products/Categories en arreglos NumPy
+  por columna.
+- Se refresca de forma incremental por marca de agua (watermark) de
+  Ordenes.ID: solo se leen órdenes nuevas y sus items, más una ventana de
+  IDs recientes para no saltarse órdenes que confirman tarde (ver
+  watermark.py).
+- Calcula de forma vectorizada (bincount / cumsum) las mismas salidas que
+  vw_ventas_por_categoria, vw_ticket_promedio_mensual y vw_abc_productos.
+
+Se usa como backend alternativo de db.get_view_data(view, backend="numpy").
+
+Limitación: los items agregados después a una orden ya cargada, o las
+órdenes editadas/borradas, no se reflejan hasta un reset() (recarga completa).
+"""
+
+import threading
+
+import numpy as np
+from mysql.connector import Error
+
+from . import db
+from .watermark import IdWatermark
+
+# Vistas que este motor sabe calcular
+COLUMNAR_VIEWS = {
+    "vw_ventas_por_categoria",
+    "vw_ticket_promedio_mensual",
+    "vw_abc_productos",
+}
+
+# Filas leídas por bloque desde MySQL
+FETCH_SIZE = 50_000
+
+
+def _fetch_columns(cursor, query: str, params: tuple, dtypes: list) -> list[np.ndarray]:
+    """
+    Ejecuta query y devuelve una columna NumPy por cada dtype, leyendo por
+    bloques para no armar una lista gigante de tuplas.
+    """
+    cursor.execute(query, params)
+    chunks = [[] for _ in dtypes]
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for i, column in enumerate(zip(*rows)):
+            chunks[i].append(np.array(column, dtype=dtypes[i]))
+    return [
+        np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        for parts, dtype in zip(chunks, dtypes)
+    ]
+
+
+class _ColumnStore:
+    """Columnas de hechos (órdenes e items) + dimensiones de productos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Serializa refresh(): dos lecturas del mismo rango se sumarían dos veces
+        self._refresh_lock = threading.Lock()
+        self._clear()
+
+    def reset(self):
+        """Descarta todo; el próximo refresh() recarga desde cero."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.watermark = IdWatermark()
+        # Ordenes
+        self.order_months = np.empty(0, dtype="datetime64[M]")
+        self.order_totals = np.empty(0, dtype=np.float64)
+        # Order_items
+        self.item_products = np.empty(0, dtype=np.int64)
+        self.item_amounts = np.empty(0, dtype=np.float64)
+        # Dimensiones (se recargan completas en cada refresh, son pequeñas)
+        self.product_names: dict[int, str] = {}
+        self.product_category = np.empty(0, dtype=np.int64)
+        self.category_names: dict[int, str] = {}
+
+    def refresh(self) -> int:
+        """
+        Agrega las órdenes todavía no aplicadas y sus items. Todo se lee en
+        un mismo snapshot consistente. Devuelve el número de órdenes nuevas.
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+
+            cursor.execute("SELECT COALESCE(MAX(ID), 0) FROM Ordenes")
+            high = cursor.fetchone()[0]
+            watermark = self.watermark
+            low = watermark.low
+
+            order_ids, order_dates, order_totals = _fetch_columns(
+                cursor,
+                """
+                SELECT ID, `Fecha de la orden`, `Total`
+                FROM Ordenes
+                WHERE ID > %s AND ID <= %s
+                """,
+                (low, high),
+                [np.int64, "datetime64[s]", np.float64],
+            )
+            item_orders, item_products, item_amounts = _fetch_columns(
+                cursor,
+                """
+                SELECT Ordenes_ID, Products_ID, `Cantidad` * `Precio por unidad`
+                FROM Order_items
+                WHERE Ordenes_ID > %s AND Ordenes_ID <= %s
+                """,
+                (low, high),
+                [np.int64, np.int64, np.float64],
+            )
+
+            cursor.execute("SELECT ID, `Nombre del producto`, Categories_ID FROM Products")
+            products = cursor.fetchall()
+            cursor.execute("SELECT ID, Nombre FROM Categories")
+            categories = cursor.fetchall()
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        with self._lock:
+            # Un reset() durante la lectura invalida el lote
+            if self.watermark is not watermark:
+                return 0
+            # La ventana releída trae órdenes ya aplicadas: se descartan por ID
+            applied = np.fromiter(watermark.applied, dtype=np.int64)
+            new_orders = ~np.isin(order_ids, applied)
+            new_items = ~np.isin(item_orders, applied)
+            order_ids = order_ids[new_orders]
+            order_dates, order_totals = order_dates[new_orders], order_totals[new_orders]
+            item_products, item_amounts = item_products[new_items], item_amounts[new_items]
+
+            self.order_months = np.concatenate(
+                [self.order_months, order_dates.astype("datetime64[M]")]
+            )
+            self.order_totals = np.concatenate([self.order_totals, order_totals])
+            self.item_products = np.concatenate([self.item_products, item_products])
+            self.item_amounts = np.concatenate([self.item_amounts, item_amounts])
+
+            self.product_names = {pid: name for pid, name, _ in products}
+            max_product = max(self.product_names, default=0)
+            self.product_category = np.zeros(max_product + 1, dtype=np.int64)
+            for pid, _, category_id in products:
+                self.product_category[pid] = category_id
+            self.category_names = dict(categories)
+
+            watermark.advance(high, order_ids.tolist())
+        return len(order_totals)
+
+    # ======================================================
+    # Vistas (equivalentes a las vistas SQL)
+    # ======================================================
+
+    def _sales_by_product(self) -> np.ndarray:
+        """Ventas por Products_ID (índice = ID del producto)."""
+        return np.bincount(
+            self.item_products,
+            weights=self.item_amounts,
+            minlength=len(self.product_category),
+        )
+
+    def ventas_por_categoria(self) -> list[dict]:
+        with self._lock:
+            categories = self.product_category[self.item_products]
+            totals = np.bincount(categories, weights=self.item_amounts)
+            counts = np.bincount(categories)
+
+        return [
+            {
+                "categoria_id": int(cid),
+                "categoria_nombre": self.category_names.get(int(cid), ""),
+                "total_ventas": round(float(totals[cid]), 2),
+            }
+            for cid in np.flatnonzero(counts)
+        ]
+
+    def ticket_promedio_mensual(self) -> list[dict]:
+        with self._lock:
+            months, inverse = np.unique(self.order_months, return_inverse=True)
+            sums = np.bincount(inverse, weights=self.order_totals)
+            counts = np.bincount(inverse)
+
+        years = months.astype("datetime64[Y]").astype(int) + 1970
+        month_numbers = months.astype(int) % 12 + 1
+        averages = sums / np.maximum(counts, 1)
+        return [
+            {"anio": int(y), "mes": int(m), "ticket_promedio": round(float(a), 6)}
+            for y, m, a in zip(years, month_numbers, averages)
+        ]
+
+    def abc_productos(self) -> list[dict]:
+        with self._lock:
+            sales = self._sales_by_product()
+            sold = np.flatnonzero(np.bincount(self.item_products, minlength=len(sales)))
+
+        totals = sales[sold]
+        order = np.argsort(-totals, kind="stable")
+        product_ids = sold[order]
+        totals = totals[order]
+
+        # Igual que SUM() OVER (ORDER BY total DESC): los empates comparten acumulado
+        cumulative = np.cumsum(totals)
+        last_peer = np.searchsorted(-totals, -totals, side="right") - 1
+        accumulated = cumulative[last_peer]
+        grand_total = float(cumulative[-1]) if len(cumulative) else 0.0
+
+        share = accumulated / grand_total if grand_total else np.zeros_like(accumulated)
+        labels = np.where(share <= 0.80, "A", np.where(share <= 0.95, "B", "C"))
+
+        return [
+            {
+                "product_id": int(pid),
+                "Nombre del producto": self.product_names.get(int(pid), ""),
+                "total_ventas": round(float(total), 2),
+                "acumulado": round(float(acc), 2),
+                "total_general": round(grand_total, 2),
+                "categoria_abc": str(label),
+            }
+            for pid, total, acc, label in zip(product_ids, totals, accumulated, labels)
+        ]
+
+
+_store = _ColumnStore()
+
+_VIEW_FUNCTIONS = {
+    "vw_ventas_por_categoria": _store.ventas_por_categoria,
+    "vw_ticket_promedio_mensual": _store.ticket_promedio_mensual,
+    "vw_abc_productos": _store.abc_productos,
+}
+
+
+def refresh() -> int:
+    """Carga las órdenes nuevas desde MySQL. Devuelve cuántas se agregaron."""
+    return _store.refresh()
+
+
+def reset():
+    """Fuerza una recarga completa en el próximo refresh()."""
+    _store.reset()
+
+
+def get_view_data(view_name: str) -> list[dict]:
+    """
+    Calcula una vista de COLUMNAR_VIEWS sobre las columnas en memoria,
+    refrescando antes de forma incremental.
+    """
+    if view_name not in COLUMNAR_VIEWS:
+        print("columnar.get_view_data: vista no soportada:", view_name)
+        return []
+    try:
+        refresh()
+    except Error as e:
+        # Si MySQL falla se responde con las columnas que ya estaban cargadas
+        print("Error al refrescar el motor columnar:", e)
+    return _VIEW_FUNCTIONS[view_name]()
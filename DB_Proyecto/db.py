@@ -22,8 +22,16 @@ Capa de acceso a datos para el proyecto LootBox.
   - Ejecutar INSERT/UPDATE/DELETE y SPs.
 """
 
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, time as dt_time
+
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
 
 # -----------------------------------------------------------------------------
 # Configuración de conexión
@@ -129,6 +137,31 @@ def run_callproc(proc_name: str, params: list | tuple | None = None):
             conn.close()
 
 
+def run_statements(statements: list[str]) -> tuple[bool, str | None]:
+    """
+    Ejecuta una lista de sentencias (INSERT/UPDATE/DDL) en una sola transacción.
+    Devuelve (ok, mensaje_error); si alguna falla se hace rollback de todas.
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        conn.commit()
+        return True, None
+    except Error as e:
+        if conn:
+            conn.rollback()
+        return False, f"Error al ejecutar sentencias: {e}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
 # -----------------------------------------------------------------------------
 # Customers (CRUD + listados con filtros)
 # -----------------------------------------------------------------------------
@@ -370,6 +403,29 @@ def get_product_by_id(product_id: int) -> dict | None:
     return rows[0] if rows else None
 
 
+def get_related_products(product_id: int) -> list[dict]:
+    """
+    Productos comprados frecuentemente junto con product_id
+    (tabla Product_pairs, calculada por basket.py).
+    """
+    return run_select(
+        """
+        SELECT
+            pp.`Rank`,
+            p.ID,
+            p.`Nombre del producto` AS NombreProducto,
+            pp.`Ordenes juntos` AS OrdenesJuntos,
+            ROUND(pp.Confianza * 100, 1) AS ConfianzaPct,
+            ROUND(pp.Lift, 2) AS Lift
+        FROM Product_pairs pp
+        JOIN Products p ON p.ID = pp.Relacionado_ID
+        WHERE pp.Products_ID = %s
+        ORDER BY pp.`Rank`
+        """,
+        (product_id,),
+    )
+
+
 def create_product(
     nombre_producto: str,
     precio: float,
@@ -665,13 +721,15 @@ def register_inventory_movement(
     empleado_id: int,
     cantidad: int,
     tipo_movimiento: str,  # 'IN' o 'OUT'
+    costo_unitario: float | None = None,
 ) -> bool:
     """
     Registra un movimiento de inventario con el SP sp_registrar_movimiento_inventario.
+    costo_unitario es el costo de compra de un IN (None = Products.Precio en FIFO).
     """
     result = run_callproc(
         "sp_registrar_movimiento_inventario",
-        [product_id, warehouse_id, empleado_id, cantidad, tipo_movimiento],
+        [product_id, warehouse_id, empleado_id, cantidad, tipo_movimiento, costo_unitario],
     )
     # Si no lanza error, asumimos éxito
     return True
@@ -741,11 +799,14 @@ def get_stock_for_product_warehouse(product_id: int, warehouse_id: int) -> int:
 def registrar_movimiento_inventario(
     product_id: int,
     warehouse_id: int,
+    empleado_id: int,
     cantidad: int,
     tipo: str,
+    costo_unitario: float | None = None,
 ) -> tuple[bool, str | None]:
     """
     Llama al SP sp_registrar_movimiento_inventario.
+    costo_unitario es el costo de compra de un IN (None = Products.Precio en FIFO).
     Devuelve (ok, mensaje_error).
     """
     conn = get_connection()
@@ -753,7 +814,7 @@ def registrar_movimiento_inventario(
     try:
         cursor.callproc(
             "sp_registrar_movimiento_inventario",
-            [product_id, warehouse_id, cantidad, tipo],
+            [product_id, warehouse_id, empleado_id, cantidad, tipo, costo_unitario],
         )
         conn.commit()
         return True, None
@@ -768,6 +829,212 @@ def registrar_movimiento_inventario(
         cursor.close()
         conn.close()
 
+
+def transfer_inventory(
+    origen_id: int,
+    destino_id: int,
+    empleado_id: int,
+    items: list[tuple[int, int]],
+) -> tuple[dict | None, str | None]:
+    """
+    Transfiere un lote de productos [(product_id, cantidad), ...] entre dos
+    bodegas con el SP sp_transferir_inventario: todos los pares OUT/IN se
+    registran en una sola transacción, o ninguno.
+    Devuelve (transferencia, mensaje_error); transferencia trae
+    transfer_id, fecha, productos y unidades.
+    """
+    payload = json.dumps([{"producto": int(p), "cantidad": int(c)} for p, c in items])
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.callproc(
+            "sp_transferir_inventario",
+            [origen_id, destino_id, empleado_id, payload],
+        )
+        rows = []
+        for result in cursor.stored_results():
+            rows.extend(result.fetchall())
+        conn.commit()
+        return (rows[0] if rows else None), None
+    except IntegrityError as e:
+        conn.rollback()
+        if e.errno == errorcode.ER_DUP_ENTRY:
+            # PRIMARY KEY (producto, bodega, fecha): otro movimiento del mismo
+            # producto en esa bodega dentro del mismo segundo
+            return (
+                None,
+                "Ya hay un movimiento de alguno de estos productos en esas bodegas en este "
+                "mismo segundo; vuelve a intentar la transferencia.",
+            )
+        return (
+            None,
+            "No se pudo transferir: verifica que los productos, las bodegas y el empleado existan.",
+        )
+    except Error as e:
+        conn.rollback()
+        # Los SIGNAL del SP (stock insuficiente, cantidades) traen su propio mensaje
+        return None, e.msg if e.sqlstate == "45000" else f"Error al transferir inventario: {e}"
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_low_stock_report(warehouse_id: int | None = None, limit: int = 100) -> list[dict]:
+    """
+    Pares producto/bodega con stock en o bajo su punto de reorden, según la
+    tabla precalculada Replenishment_params (replenishment.py). Primero los
+    de menor cobertura.
+    """
+    query = """
+        SELECT
+            r.Products_ID AS product_id,
+            p.`Nombre del producto` AS NombreProducto,
+            r.Warehouses_ID AS warehouse_id,
+            w.Nombre AS warehouse_nombre,
+            r.`Stock actual` AS stock_actual,
+            r.`Punto de reorden` AS punto_reorden,
+            r.`Stock de seguridad` AS stock_seguridad,
+            r.`Consumo diario` AS consumo_diario,
+            r.`Dias de cobertura` AS dias_cobertura,
+            r.`Fecha de cálculo` AS fecha_calculo
+        FROM Replenishment_params r
+        JOIN Products p ON p.ID = r.Products_ID
+        JOIN Warehouses w ON w.ID = r.Warehouses_ID
+        WHERE r.`Stock actual` <= r.`Punto de reorden`
+          AND r.`Consumo diario` > 0
+    """
+    params: list = []
+    if warehouse_id is not None:
+        query += " AND r.Warehouses_ID = %s"
+        params.append(warehouse_id)
+    query += " ORDER BY r.`Dias de cobertura` ASC LIMIT %s"
+    params.append(limit)
+    return run_select(query, tuple(params))
+
+
+# Agrupaciones de get_inventory_valuation -> (columna de grupo, columnas, join)
+_VALUATION_GROUPS = {
+    "bodega": (
+        "w.ID",
+        "w.ID AS warehouse_id, w.Nombre AS bodega",
+        "JOIN Warehouses w ON w.ID = v.Warehouses_ID",
+    ),
+    "categoria": (
+        "c.ID",
+        "c.ID AS categoria_id, c.Nombre AS categoria",
+        "JOIN Categories c ON c.ID = v.Categories_ID",
+    ),
+}
+
+
+def get_inventory_valuation(group_by: str = "bodega") -> list[dict]:
+    """
+    Valorización FIFO del último snapshot de Inventory_valuation (fifo.py),
+    agrupada por "bodega" o "categoria".
+    """
+    if group_by not in _VALUATION_GROUPS:
+        print("get_inventory_valuation: agrupación no válida:", group_by)
+        return []
+    group_column, columns, join = _VALUATION_GROUPS[group_by]
+    return run_select(
+        f"""
+        SELECT
+            {columns},
+            SUM(v.Unidades) AS unidades,
+            SUM(v.Valor) AS valor,
+            v.`Fecha de corte` AS fecha_corte
+        FROM Inventory_valuation v
+        {join}
+        WHERE v.`Fecha de corte` = (SELECT MAX(`Fecha de corte`) FROM Inventory_valuation)
+        GROUP BY {group_column}, v.`Fecha de corte`
+        ORDER BY valor DESC
+        """
+    )
+
+
+def take_stock_snapshots():
+    """Toma los snapshots diarios de stock pendientes hasta hoy (Stock_snapshots)."""
+    return run_callproc("sp_tomar_snapshots_stock_pendientes")
+
+
+def get_stock_as_of(
+    as_of: date | datetime | str,
+    product_id: int | None = None,
+    warehouse_id: int | None = None,
+) -> list[dict]:
+    """
+    Stock por producto y bodega a una fecha/hora (una fecha sola = fin del día).
+
+    Parte del snapshot diario más cercano <= as_of y suma solo los
+    movimientos desde ese día: con product_id el delta se lee por
+    idx_inventory_movements_producto_fecha (o la PK si además hay bodega).
+    Antes del primer snapshot se suma la historia completa.
+    """
+    if isinstance(as_of, str):
+        try:
+            # "AAAA-MM-DD" también es fecha sola; con hora se compara tal cual
+            as_of = date.fromisoformat(as_of)
+        except ValueError:
+            pass
+    if isinstance(as_of, date) and not isinstance(as_of, datetime):
+        as_of = datetime.combine(as_of, dt_time(23, 59, 59))
+
+    filters = ""
+    params: list = []
+    if product_id is not None:
+        filters += " AND {alias}.Products_ID = %s"
+        params.append(product_id)
+    if warehouse_id is not None:
+        filters += " AND {alias}.Warehouses_ID = %s"
+        params.append(warehouse_id)
+
+    query = f"""
+        WITH base AS (
+            SELECT MAX(Fecha) AS fecha FROM Stock_snapshot_dates WHERE Fecha <= %s
+        )
+        SELECT
+            p.ID AS product_id,
+            p.`Nombre del producto` AS NombreProducto,
+            w.ID AS warehouse_id,
+            w.Nombre AS warehouse_nombre,
+            SUM(t.Stock) AS stock,
+            t.fecha_snapshot
+        FROM (
+            SELECT s.Products_ID, s.Warehouses_ID, s.Stock, base.fecha AS fecha_snapshot
+            FROM base
+            JOIN Stock_snapshots s ON s.Fecha = base.fecha
+            WHERE TRUE{filters.format(alias="s")}
+            UNION ALL
+            SELECT
+                im.Products_ID,
+                im.Warehouses_ID,
+                IF(im.`Tipo de movimiento` = 'IN', im.Cantidad, -im.Cantidad),
+                base.fecha
+            FROM base
+            JOIN inventory_movements im
+              ON im.`Fecha del movimiento` >= COALESCE(base.fecha, '1000-01-01')
+             AND im.`Fecha del movimiento` <= %s
+            WHERE TRUE{filters.format(alias="im")}
+        ) t
+        JOIN Products p ON p.ID = t.Products_ID
+        JOIN Warehouses w ON w.ID = t.Warehouses_ID
+        GROUP BY p.ID, w.ID, t.fecha_snapshot
+        HAVING stock <> 0
+        ORDER BY p.ID, w.ID
+    """
+    return run_select(query, (as_of, *params, as_of, *params))
+
+
+def get_stock_producto_bodega_as_of(
+    product_id: int,
+    warehouse_id: int,
+    as_of: date | datetime | str,
+) -> int:
+    """Stock de un producto en una bodega a una fecha/hora (0 si no hay)."""
+    rows = get_stock_as_of(as_of, product_id=product_id, warehouse_id=warehouse_id)
+    return int(rows[0]["stock"]) if rows else 0
+
+
 # -----------------------------------------------------------------------------
 # Promociones & Loyalty
 # -----------------------------------------------------------------------------
@@ -869,13 +1136,25 @@ _ALLOWED_VIEWS = {
     "vw_clientes_ltv_alto",
     "vw_inventario_producto_bodega",
     "vw_clientes_por_pais",
+    "vw_clientes_activos_mensual",
     "vw_abc_productos",
+    "vw_rfm_segmentos",
+    "vw_sla_percentiles",
+    "vw_pronostico_categoria",
 }
 
-def get_view_data(view_name: str) -> list[dict]:
+# Backends de get_view_data: "mysql" (la vista SQL), "numpy" (motor columnar
+# en memoria, ver columnar.py; solo para las vistas de columnar.COLUMNAR_VIEWS)
+# o "hll" (conteos distintos aproximados, ver hll.py; solo hll.HLL_VIEWS).
+VIEW_BACKENDS = ("mysql", "numpy", "hll")
+
+
+def get_view_data(view_name: str, backend: str = "mysql") -> list[dict]:
     """
     Ejecuta SELECT * sobre una vista permitida.
     view_name debe ser exactamente una de las opciones en _ALLOWED_VIEWS.
+    Con backend="numpy" o "hll" la vista se calcula en ese motor si lo
+    soporta; si no, se usa MySQL.
     """
     # Validaciones estrictas:
     if not isinstance(view_name, str):
@@ -885,43 +1164,665 @@ def get_view_data(view_name: str) -> list[dict]:
         print("get_view_data: vista no permitida:", view_name)
         return []
 
+    if backend == "numpy":
+        from . import columnar  # import diferido: numpy solo si se usa
+
+        if view_name in columnar.COLUMNAR_VIEWS:
+            return columnar.get_view_data(view_name)
+
+    if backend == "hll":
+        from . import hll  # import diferido, igual que columnar
+
+        if view_name in hll.HLL_VIEWS:
+            return hll.get_view_data(view_name)
+
     # Es seguro construir el identificador porque viene de la whitelist
     query = f"SELECT * FROM `{view_name}`"
     return run_select(query)
 
-def run_sql_with_explain(sql: str, params: tuple | None = None, explain: bool = False) -> list[dict]:
+
+# -----------------------------------------------------------------------------
+# Cubo de ventas (Sales_cube): drill-down país → ciudad × categoría × mes
+# -----------------------------------------------------------------------------
+
+# Nivel geográfico -> condición sobre las columnas del cubo (0 = agregado)
+SALES_CUBE_GEO_LEVELS = {
+    "todos": "sc.Countries_ID = 0 AND sc.Cities_ID = 0",
+    "pais": "sc.Countries_ID <> 0 AND sc.Cities_ID = 0",
+    "ciudad": "sc.Cities_ID <> 0",
+}
+
+
+def refresh_sales_cube(rebuild: bool = False):
     """
-    Ejecuta una consulta arbitraria **solo** si parece ser un SELECT y no contiene keywords prohibidas.
-    Si explain=True ejecuta EXPLAIN <sql>.
+    Suma al cubo las órdenes nuevas (sp_refrescar_sales_cube).
+    Con rebuild=True lo recalcula completo (sp_reconstruir_sales_cube).
     """
-    if not isinstance(sql, str):
-        print("run_sql_with_explain: sql no es str")
+    run_callproc("sp_reconstruir_sales_cube" if rebuild else "sp_refrescar_sales_cube")
+
+
+def get_sales_cube(
+    geo: str = "pais",
+    by_category: bool = False,
+    by_month: bool = False,
+    country_id: int | None = None,
+    city_id: int | None = None,
+    category_id: int | None = None,
+    month: int | None = None,
+    refresh: bool = False,
+) -> list[dict]:
+    """
+    Ventas del cubo en el nivel pedido, sin tocar las tablas base.
+    Lee el cubo tal como está; refresh=True aplica antes las órdenes
+    pendientes (escribe y bloquea Sales_cube_estado).
+
+    - geo: "todos", "pais" o "ciudad".
+    - by_category / by_month: desglosar por categoría / mes (AAAAMM).
+    - country_id, city_id, category_id, month: filtros de drill-down; filtrar
+      por una dimensión implica desglosarla (city_id implica geo="ciudad").
+    """
+    if city_id is not None:
+        geo = "ciudad"
+    elif country_id is not None and geo == "todos":
+        geo = "pais"
+    if geo not in SALES_CUBE_GEO_LEVELS:
+        print("get_sales_cube: nivel geográfico no válido:", geo)
         return []
+    by_category = by_category or category_id is not None
+    by_month = by_month or month is not None
+
+    if refresh:
+        refresh_sales_cube()
+
+    conditions = [
+        SALES_CUBE_GEO_LEVELS[geo],
+        "sc.Categories_ID <> 0" if by_category else "sc.Categories_ID = 0",
+        "sc.Mes <> 0" if by_month else "sc.Mes = 0",
+    ]
+    params = []
+    for column, value in (
+        ("sc.Countries_ID", country_id),
+        ("sc.Cities_ID", city_id),
+        ("sc.Categories_ID", category_id),
+        ("sc.Mes", month),
+    ):
+        if value is not None:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+
+    columns = []
+    joins = []
+    if geo != "todos":
+        columns += ["sc.Countries_ID AS country_id", "co.Nombre AS pais"]
+        joins.append("JOIN Countries co ON co.ID = sc.Countries_ID")
+    if geo == "ciudad":
+        columns += ["sc.Cities_ID AS city_id", "ci.Nombre AS ciudad"]
+        joins.append("JOIN Cities ci ON ci.ID = sc.Cities_ID")
+    if by_category:
+        columns += ["sc.Categories_ID AS category_id", "ca.Nombre AS categoria"]
+        joins.append("JOIN Categories ca ON ca.ID = sc.Categories_ID")
+    if by_month:
+        columns.append("sc.Mes AS mes")
+    columns += ["sc.Ventas AS ventas", "sc.Unidades AS unidades", "sc.Items AS items"]
+
+    query = f"""
+        SELECT {", ".join(columns)}
+        FROM Sales_cube sc
+        {" ".join(joins)}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {"sc.Mes DESC, " if by_month else ""}sc.Ventas DESC
+    """
+    return run_select(query, tuple(params))
+
+# Presupuesto de tiempo (MAX_EXECUTION_TIME) por consulta analítica, en ms
+QUERY_TIMEOUT_MS = 30_000
+
+# Guard de costo: máximo de filas examinadas estimadas (EXPLAIN) antes de
+# rechazar o auto-limitar, y máximo de filas que se devuelven en memoria.
+QUERY_COST_BUDGET_ROWS = 5_000_000
+QUERY_ROW_CAP = 5_000
+
+# Resultados completos que superan row_cap (CSV); se borran al descargarse
+# o, si nadie los pide, después de SPOOL_MAX_AGE_S segundos
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), "lootbox_spool")
+SPOOL_MAX_AGE_S = 3600
+
+# Si aparece alguno de estos, un LIMIT externo no reduce lo que se examina
+_NOT_STREAMABLE = re.compile(
+    r"\b(GROUP\s+BY|DISTINCT|ORDER\s+BY|HAVING|UNION|OVER|LIMIT)\b", re.IGNORECASE
+)
+
+# query_token -> connection_ids de las consultas en curso (para KILL QUERY).
+# Un mismo token puede tener varias conexiones: consulta + EXPLAIN en paralelo.
+_RUNNING_QUERIES: dict[str, set[int]] = {}
+_RUNNING_LOCK = threading.Lock()
+
+# Variantes de EXPLAIN disponibles para el analista
+EXPLAIN_MODES = {
+    "tradicional": "EXPLAIN ",
+    "json": "EXPLAIN FORMAT=JSON ",
+    "analyze": "EXPLAIN ANALYZE ",
+}
+
+
+def _validate_select(sql: str, explain: bool | str = False) -> tuple[str | None, str | None]:
+    """
+    Valida que sql sea un único SELECT sin keywords prohibidas.
+    explain puede ser True (EXPLAIN tradicional) o una llave de EXPLAIN_MODES.
+    Devuelve (query_a_ejecutar, mensaje_error).
+    """
+    if not isinstance(sql, str):
+        return None, "sql no es str"
 
     # Prohibir múltiples statements (;) y keywords peligrosas
     if ";" in sql.strip().rstrip(";"):
-        print("run_sql_with_explain: múltiples statements detectados")
-        return []
+        return None, "múltiples statements detectados"
 
     if _FORBIDDEN_KEYWORDS.search(sql):
-        print("run_sql_with_explain: keyword prohibida en consulta")
-        return []
+        return None, "keyword prohibida en consulta"
 
     if not _SQL_SELECT_SAFE.match(sql):
-        print("run_sql_with_explain: solo se permiten SELECTs")
-        return []
+        return None, "solo se permiten SELECTs"
 
     if explain:
-        query = "EXPLAIN " + sql
+        prefix = EXPLAIN_MODES.get("tradicional" if explain is True else explain)
+        if prefix is None:
+            return None, f"modo de EXPLAIN no válido: {explain}"
+        query = prefix + sql
     else:
         query = sql
 
     # Limitar longitud para evitar abusos (opcional)
     if len(query) > 5000:
-        print("run_sql_with_explain: sql demasiado larga")
-        return []
+        return None, "sql demasiado larga"
+
+    return query, None
+
+
+def _json_value(value):
+    """MySQL Connector puede devolver columnas JSON como str o bytes."""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _estimate_rows_examined(document: dict) -> float:
+    """
+    Estima las filas examinadas a partir de EXPLAIN FORMAT=JSON.
+    En un nested loop cada tabla se lee una vez por fila producida por
+    las tablas anteriores (rows_examined_per_scan * rows_produced_per_join previo).
+    """
+    total = 0.0
+
+    def walk(node):
+        nonlocal total
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "nested_loop" and isinstance(value, list):
+                    loops = 1.0
+                    for item in value:
+                        table = item.get("table", {})
+                        total += float(table.get("rows_examined_per_scan", 0)) * loops
+                        loops = max(float(table.get("rows_produced_per_join", 1)), 1.0)
+                        walk(table)
+                elif key == "table" and isinstance(value, dict):
+                    total += float(value.get("rows_examined_per_scan", 0))
+                    walk(value)
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(document)
+    return total
+
+
+def _is_streamable(sql: str) -> bool:
+    """
+    True si agregar LIMIT corta de verdad el trabajo: sin agregaciones,
+    ordenamientos ni LIMIT propio (revisión textual, conservadora).
+    """
+    return not _NOT_STREAMABLE.search(sql)
+
+
+def _cleanup_spool():
+    """Borra los CSV de SPOOL_DIR más viejos que SPOOL_MAX_AGE_S."""
+    limit = time.time() - SPOOL_MAX_AGE_S
+    try:
+        entries = list(os.scandir(SPOOL_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < limit:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _spool_to_csv(cursor, first_rows: list[dict]) -> tuple[str, int]:
+    """
+    Escribe first_rows y el resto del resultset (por bloques) a un CSV
+    en SPOOL_DIR para no cargarlo en memoria. Devuelve (ruta, filas_totales).
+    """
+    _cleanup_spool()
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    total = len(first_rows)
+    with tempfile.NamedTemporaryFile(
+        "w", newline="", encoding="utf-8", prefix="lootbox_", suffix=".csv",
+        dir=SPOOL_DIR, delete=False,
+    ) as f:
+        writer = csv.DictWriter(f, fieldnames=list(first_rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(first_rows)
+        while True:
+            chunk = cursor.fetchmany(1000)
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            total += len(chunk)
+    return f.name, total
+
+
+def pop_spool_file(path: str) -> bytes | None:
+    """
+    Contenido de un CSV de _spool_to_csv, que se borra al leerlo.
+    Solo acepta archivos dentro de SPOOL_DIR.
+    """
+    path = os.path.realpath(path)
+    if os.path.dirname(path) != os.path.realpath(SPOOL_DIR):
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.remove(path)
+        return data
+    except OSError:
+        return None
+
+
+def run_guarded_select(
+    sql: str,
+    params: tuple | None = None,
+    explain: bool | str = False,
+    timeout_ms: int | None = QUERY_TIMEOUT_MS,
+    query_token: str | None = None,
+    cost_budget: int | None = QUERY_COST_BUDGET_ROWS,
+    row_cap: int | None = QUERY_ROW_CAP,
+) -> tuple[list[dict], str | None, dict]:
+    """
+    Ejecuta un SELECT validado con un límite de tiempo en el servidor
+    (max_execution_time) y devuelve (filas, mensaje_error, info).
+
+    Antes de ejecutar corre EXPLAIN FORMAT=JSON y estima las filas examinadas:
+    si superan cost_budget, la consulta se limita a row_cap filas (si LIMIT
+    corta el trabajo) o se rechaza. Si el resultado supera row_cap filas,
+    se devuelven las primeras row_cap y el resultado completo se escribe a
+    un CSV temporal (ver pop_spool_file). En modo "analyze" (EXPLAIN
+    ANALYZE ejecuta la consulta) se aplica el mismo guard de costo.
+
+    info = {"filas_estimadas", "auto_limit", "filas_totales", "spool_path", "row_cap"}
+
+    Si se pasa query_token, la conexión queda registrada mientras corre
+    para que cancel_query(query_token) pueda detenerla con KILL QUERY.
+    """
+    info = {
+        "filas_estimadas": None,
+        "auto_limit": False,
+        "filas_totales": 0,
+        "spool_path": None,
+        "row_cap": row_cap,
+    }
+    query, error = _validate_select(sql, explain)
+    if error:
+        return [], error, info
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        if timeout_ms:
+            cursor.execute("SET SESSION max_execution_time = %s", (int(timeout_ms),))
+        if query_token:
+            with _RUNNING_LOCK:
+                _RUNNING_QUERIES.setdefault(query_token, set()).add(conn.connection_id)
+
+        # Pre-flight: costo estimado antes de ejecutar (EXPLAIN ANALYZE también ejecuta)
+        if cost_budget and explain in (False, "analyze"):
+            cursor.execute(EXPLAIN_MODES["json"] + sql, params or ())
+            document = next(iter(cursor.fetchone().values()))
+            estimate = _estimate_rows_examined(_json_value(document))
+            info["filas_estimadas"] = round(estimate)
+            if estimate > cost_budget:
+                if row_cap and _is_streamable(sql):
+                    query = f"{query.strip().rstrip(';')} LIMIT {int(row_cap)}"
+                    info["auto_limit"] = True
+                else:
+                    return [], (
+                        f"Consulta rechazada: examinaría ~{estimate:,.0f} filas "
+                        f"(presupuesto: {cost_budget:,})."
+                    ), info
+
+        cursor.execute(query, params or ())
+        if explain or not row_cap:
+            rows = cursor.fetchall()
+        else:
+            rows = cursor.fetchmany(row_cap + 1)
+            if len(rows) > row_cap:
+                info["spool_path"], info["filas_totales"] = _spool_to_csv(cursor, rows)
+                rows = rows[:row_cap]
+        info["filas_totales"] = info["filas_totales"] or len(rows)
+        return rows, None, info
+    except Error as e:
+        if e.errno == errorcode.ER_QUERY_TIMEOUT:
+            return [], f"La consulta superó el límite de {timeout_ms / 1000:g} s y fue detenida.", info
+        if e.errno == errorcode.ER_QUERY_INTERRUPTED:
+            return [], "La consulta fue cancelada.", info
+        return [], f"Error al ejecutar consulta: {e}", info
+    finally:
+        if query_token and conn:
+            with _RUNNING_LOCK:
+                running = _RUNNING_QUERIES.get(query_token, set())
+                running.discard(conn.connection_id)
+                if not running:
+                    _RUNNING_QUERIES.pop(query_token, None)
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+def describe_query_info(info: dict) -> str:
+    """Texto amigable con los avisos del guard de costo (auto-LIMIT, spool)."""
+    notes = []
+    row_cap = info.get("row_cap") or QUERY_ROW_CAP
+    if info.get("auto_limit"):
+        notes.append(
+            f"Costo estimado alto (~{info['filas_estimadas']:,} filas): "
+            f"se limitó automáticamente a {row_cap:,} filas."
+        )
+    if info.get("spool_path"):
+        notes.append(
+            f"Se muestran las primeras {row_cap:,} de {info['filas_totales']:,} filas; "
+            f"el resultado completo se puede descargar en CSV."
+        )
+    return " ".join(notes)
+
+
+def cancel_query(query_token: str) -> bool:
+    """
+    Detiene en el servidor (KILL QUERY) las consultas registradas con query_token.
+    Devuelve True si había alguna consulta en curso.
+    """
+    with _RUNNING_LOCK:
+        connection_ids = list(_RUNNING_QUERIES.get(query_token, ()))
+    if not connection_ids:
+        return False
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        for connection_id in connection_ids:
+            cursor.execute(f"KILL QUERY {int(connection_id)}")
+        return True
+    except Error as e:
+        print("Error en cancel_query:", e)
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+# Nodo de EXPLAIN ANALYZE, p. ej.:
+#   -> Filter: (o.Status = 'Pagado')  (cost=1.15 rows=2) (actual time=0.04..0.05 rows=2 loops=1)
+_ANALYZE_NODE = re.compile(
+    r"^(?P<indent>\s*)-> (?P<operacion>.*?)"
+    r"(?:  \(cost=(?P<costo>[\d.e+]+) rows=(?P<filas_est>[\d.e+]+)\))?"
+    r"(?: \(actual time=(?P<t_inicio>[\d.]+)\.\.(?P<t_fin>[\d.]+)"
+    r" rows=(?P<filas_reales>[\d.e+]+) loops=(?P<loops>\d+)\))?\s*$"
+)
+
+
+def _parse_explain_analyze(tree: str) -> list[dict]:
+    """
+    Convierte el árbol de EXPLAIN ANALYZE en una fila por nodo con sus
+    tiempos medidos (ms). tiempo_total_ms = tiempo por loop * loops.
+    """
+    rows = []
+    for line in tree.splitlines():
+        match = _ANALYZE_NODE.match(line)
+        if not match:
+            continue
+        depth = len(match["indent"]) // 4
+        loops = int(match["loops"]) if match["loops"] else None
+        t_fin = float(match["t_fin"]) if match["t_fin"] else None
+        rows.append({
+            "nivel": depth,
+            "operacion": "· " * depth + match["operacion"].rstrip(),
+            "costo_est": match["costo"],
+            "filas_est": match["filas_est"],
+            "primera_fila_ms": match["t_inicio"],
+            "ultima_fila_ms": match["t_fin"],
+            "tiempo_total_ms": round(t_fin * loops, 3) if t_fin is not None else None,
+            "filas_reales": match["filas_reales"],
+            "loops": loops,
+        })
+    return rows
+
+
+def _parse_explain_json(document: str) -> list[dict]:
+    """
+    Aplana el JSON de EXPLAIN FORMAT=JSON en una fila por tabla accedida
+    con su tipo de acceso, índice usado y costos estimados.
+    """
+    rows = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "table_name" in node:
+                cost = node.get("cost_info", {})
+                rows.append({
+                    "tabla": node["table_name"],
+                    "access_type": node.get("access_type"),
+                    "key": node.get("key"),
+                    "filas_examinadas": node.get("rows_examined_per_scan"),
+                    "filas_producidas": node.get("rows_produced_per_join"),
+                    "filtered": node.get("filtered"),
+                    "read_cost": cost.get("read_cost"),
+                    "eval_cost": cost.get("eval_cost"),
+                    "prefix_cost": cost.get("prefix_cost"),
+                })
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(json.loads(document))
+    return rows
+
+
+def run_explain(
+    sql: str,
+    params: tuple | None = None,
+    mode: str = "tradicional",
+    timeout_ms: int | None = QUERY_TIMEOUT_MS,
+    query_token: str | None = None,
+) -> tuple[list[dict], str, str | None]:
+    """
+    Ejecuta EXPLAIN en el modo indicado (ver EXPLAIN_MODES) y devuelve
+    (filas_del_plan, texto_crudo, mensaje_error).
+
+    - tradicional: filas tal cual las devuelve MySQL.
+    - json: una fila por tabla (access_type, key, costos) + el JSON crudo.
+    - analyze: una fila por nodo con tiempos reales + el árbol crudo.
+      Ojo: EXPLAIN ANALYZE ejecuta la consulta completa.
+    """
+    rows, error, _ = run_guarded_select(sql, params, mode, timeout_ms, query_token)
+    if error or not rows or mode == "tradicional":
+        return rows, "", error
+
+    raw = str(next(iter(rows[0].values())))
+    try:
+        if mode == "json":
+            return _parse_explain_json(raw), raw, None
+        return _parse_explain_analyze(raw), raw, None
+    except ValueError as e:
+        return [], raw, f"No se pudo interpretar el plan: {e}"
+
+
+def run_sql_with_explain(sql: str, params: tuple | None = None, explain: bool = False) -> list[dict]:
+    """
+    Ejecuta una consulta arbitraria **solo** si parece ser un SELECT y no contiene keywords prohibidas.
+    Si explain=True ejecuta EXPLAIN <sql>.
+    """
+    rows, error, info = run_guarded_select(sql, params, explain=explain)
+    if error:
+        print("run_sql_with_explain:", error)
+    elif describe_query_info(info):
+        print("run_sql_with_explain:", describe_query_info(info))
+    return rows
+
+
+# -----------------------------------------------------------------------------
+# Analytics: historial de planes y detección de regresiones
+# -----------------------------------------------------------------------------
+
+# Una captura es regresión si tarda más de (1 + umbral) veces la anterior
+# y además la diferencia supera PLAN_REGRESSION_MIN_MS (evita ruido).
+PLAN_REGRESSION_THRESHOLD = 0.5
+PLAN_REGRESSION_MIN_MS = 5.0
+
+
+def capture_plan_snapshot(target: str, kind: str, sql: str) -> tuple[bool, str | None]:
+    """
+    Captura EXPLAIN FORMAT=JSON + tiempo real de una consulta y lo guarda
+    en Plan_snapshots. kind es 'query' (ADVANCED_QUERIES) o 'view'.
+    """
+    plan, raw, error = run_explain(sql, mode="json")
+    if error:
+        return False, f"{target}: {error}"
+
+    start = time.perf_counter()
+    # Sin guard de costo ni tope de filas: se mide la consulta completa
+    rows, error, _ = run_guarded_select(sql, cost_budget=None, row_cap=None)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if error:
+        return False, f"{target}: {error}"
+
+    accesses = [
+        {"tabla": p["tabla"], "access_type": p["access_type"], "key": p["key"]}
+        for p in plan
+    ]
+    inserted = run_execute(
+        """
+        INSERT INTO Plan_snapshots
+          (Objetivo, Tipo, `Plan`, Accesos, `Tiempo ms`, Filas)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        (target, kind, raw, json.dumps(accesses), round(elapsed_ms, 3), len(rows)),
+    )
+    if not inserted:
+        return False, f"{target}: no se pudo guardar el plan."
+    return True, None
+
+
+def capture_plan_snapshots(queries: dict[str, str]) -> list[str]:
+    """
+    Captura el plan de cada consulta de queries ({clave: sql}) y de todas
+    las vistas de _ALLOWED_VIEWS. Devuelve la lista de errores (vacía si todo ok).
+    """
+    targets = [(key, "query", sql) for key, sql in queries.items()]
+    targets += [(view, "view", f"SELECT * FROM `{view}`") for view in sorted(_ALLOWED_VIEWS)]
+
+    errors = []
+    for target, kind, sql in targets:
+        ok, error = capture_plan_snapshot(target, kind, sql)
+        if not ok:
+            errors.append(error)
+    return errors
+
+
+def diff_plan_snapshots(
+    previous: dict,
+    current: dict,
+    threshold: float = PLAN_REGRESSION_THRESHOLD,
+    min_ms: float = PLAN_REGRESSION_MIN_MS,
+) -> list[str]:
+    """
+    Compara dos capturas de Plan_snapshots del mismo objetivo y devuelve
+    las alertas: tablas que pasaron de acceso por índice a full scan (ALL)
+    y aumento de tiempo mayor al umbral.
+    """
+    alerts = []
+    before = {a["tabla"]: a for a in _json_value(previous["Accesos"])}
+    for access in _json_value(current["Accesos"]):
+        old = before.get(access["tabla"])
+        if old and old["access_type"] != "ALL" and access["access_type"] == "ALL":
+            alerts.append(
+                f"{access['tabla']}: {old['access_type']} ({old['key']}) → full scan"
+            )
+
+    old_ms = float(previous["Tiempo ms"])
+    new_ms = float(current["Tiempo ms"])
+    if new_ms > old_ms * (1 + threshold) and new_ms - old_ms > min_ms:
+        alerts.append(f"tiempo {old_ms:.0f} ms → {new_ms:.0f} ms")
+    return alerts
+
+
+def get_plan_regressions(
+    threshold: float = PLAN_REGRESSION_THRESHOLD,
+    min_ms: float = PLAN_REGRESSION_MIN_MS,
+) -> list[dict]:
+    """
+    Compara las dos capturas más recientes de cada objetivo y devuelve
+    una fila por objetivo con tiempos y alertas ("OK" si no hay cambios).
+    """
+    rows = run_select(
+        """
+        SELECT Objetivo, Tipo, `Fecha de captura`, Accesos, `Tiempo ms`, Filas, rn
+        FROM (
+          SELECT
+            Objetivo, Tipo, `Fecha de captura`, Accesos, `Tiempo ms`, Filas,
+            ROW_NUMBER() OVER (
+              PARTITION BY Objetivo ORDER BY `Fecha de captura` DESC, ID DESC
+            ) AS rn
+          FROM Plan_snapshots
+        ) t
+        WHERE rn <= 2
+        ORDER BY Objetivo, rn
+        """
+    )
 
-    return run_select(query, params or ())
+    latest: dict[str, dict] = {}
+    previous: dict[str, dict] = {}
+    for row in rows:
+        (latest if row["rn"] == 1 else previous)[row["Objetivo"]] = row
+
+    report = []
+    for target, current in latest.items():
+        before = previous.get(target)
+        alerts = diff_plan_snapshots(before, current, threshold, min_ms) if before else []
+        report.append({
+            "objetivo": target,
+            "tipo": current["Tipo"],
+            "captura": current["Fecha de captura"],
+            "tiempo_anterior_ms": before["Tiempo ms"] if before else None,
+            "tiempo_actual_ms": current["Tiempo ms"],
+            "filas": current["Filas"],
+            "estado": "; ".join(alerts) if alerts else ("OK" if before else "Primera captura"),
+            "regresion": bool(alerts),
+        })
+
+    # Primero los objetivos con regresión
+    report.sort(key=lambda r: not r["regresion"])
+    return report
 
 
 # -----------------------------------------------------------------------------
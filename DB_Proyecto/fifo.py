@@ -0,0 +1,267 @@
+"""
+Valorización de inventario FIFO por capas de costo.
+
+- Cada (producto, bodega) tiene sus capas abiertas: (cantidad, costo
+  unitario) en orden de entrada. Un IN agrega una capa; un OUT consume
+  desde la más antigua.
+- Las capas y el punto de control (fecha del último movimiento aplicado)
+  se guardan en Fifo_layers / Fifo_checkpoint: cada corrida solo reproduce
+  los movimientos nuevos, no toda la historia.
+- Los movimientos se leen en el orden de la PRIMARY KEY de
+  inventory_movements (producto, bodega, fecha), sin ordenar en memoria.
+- Al final se guarda un snapshot de valorización por bodega y categoría
+  en Inventory_valuation.
+
+Costo de un IN: inventory_movements.`Costo unitario`; si es NULL (datos
+anteriores a esa columna) se usa Products.Precio.
+
+Si un OUT supera las capas disponibles, el faltante queda como déficit del
+par (capa con cantidad negativa y costo 0) y lo cubren los IN siguientes.
+
+Un movimiento con fecha anterior al punto de control (p. ej. importado
+con fecha pasada) no se vería en las corridas incrementales:
+invalidate_since() descarta capas y punto de control para que la
+siguiente corrida reconstruya todo.
+
+Uso programado:  python -m DB_Proyecto.fifo [--rebuild]
+"""
+
+import sys
+import time
+from collections import deque
+
+from mysql.connector import Error
+
+from . import db
+
+FETCH_SIZE = 50_000
+INSERT_CHUNK = 5_000
+
+# Lock con nombre de MySQL: una sola corrida a la vez (app o script)
+_LOCK_NAME = "lootbox_fifo_valuation"
+# Espera máxima por una corrida en curso antes de invalidar las capas
+INVALIDATE_LOCK_WAIT_S = 60
+
+
+class _Pair:
+    """Capas FIFO de un (producto, bodega)."""
+
+    __slots__ = ("layers", "deficit")
+
+    def __init__(self):
+        self.layers: deque[list] = deque()  # [cantidad, costo, fecha_entrada]
+        self.deficit = 0
+
+    def receive(self, quantity: int, cost: float, moment):
+        covered = min(quantity, self.deficit)
+        self.deficit -= covered
+        if quantity > covered:
+            self.layers.append([quantity - covered, cost, moment])
+
+    def issue(self, quantity: int):
+        while quantity and self.layers:
+            layer = self.layers[0]
+            taken = min(quantity, layer[0])
+            layer[0] -= taken
+            quantity -= taken
+            if layer[0] == 0:
+                self.layers.popleft()
+        self.deficit += quantity
+
+
+def _load_checkpoint(cursor):
+    """Fecha del último movimiento aplicado (None = desde el inicio)."""
+    cursor.execute("SELECT `Fecha del movimiento` FROM Fifo_checkpoint WHERE ID = 1")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _load_layers(cursor, checkpoint, cutoff) -> dict:
+    """Capas guardadas, solo de los pares con movimientos en (checkpoint, cutoff]."""
+    pairs: dict[tuple[int, int], _Pair] = {}
+    cursor.execute(
+        """
+        SELECT l.Products_ID, l.Warehouses_ID, l.Cantidad, l.`Costo unitario`, l.`Fecha de entrada`
+        FROM Fifo_layers l
+        JOIN (
+          SELECT DISTINCT Products_ID, Warehouses_ID
+          FROM inventory_movements
+          WHERE `Fecha del movimiento` > %s AND `Fecha del movimiento` <= %s
+        ) nuevos ON nuevos.Products_ID = l.Products_ID AND nuevos.Warehouses_ID = l.Warehouses_ID
+        ORDER BY l.Products_ID, l.Warehouses_ID, l.Secuencia
+        """,
+        (checkpoint or "1000-01-01", cutoff),
+    )
+    for product_id, warehouse_id, quantity, cost, moment in cursor.fetchall():
+        pair = pairs.setdefault((product_id, warehouse_id), _Pair())
+        if quantity < 0:
+            pair.deficit = -quantity
+        else:
+            pair.layers.append([quantity, float(cost), moment])
+    return pairs
+
+
+def _replay(cursor, pairs: dict, checkpoint, cutoff) -> tuple[set, int]:
+    """Aplica los movimientos en (checkpoint, cutoff]. Devuelve (pares tocados, movimientos)."""
+    cursor.execute(
+        """
+        SELECT
+          im.Products_ID,
+          im.Warehouses_ID,
+          im.Cantidad,
+          im.`Tipo de movimiento`,
+          COALESCE(im.`Costo unitario`, p.Precio),
+          im.`Fecha del movimiento`
+        FROM inventory_movements im
+        JOIN Products p ON p.ID = im.Products_ID
+        WHERE im.`Fecha del movimiento` > %s
+          AND im.`Fecha del movimiento` <= %s
+        ORDER BY im.Products_ID, im.Warehouses_ID, im.`Fecha del movimiento`
+        """,
+        (checkpoint or "1000-01-01", cutoff),
+    )
+    touched = set()
+    count = 0
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for product_id, warehouse_id, quantity, kind, cost, moment in rows:
+            key = (product_id, warehouse_id)
+            pair = pairs.get(key)
+            if pair is None:
+                pair = pairs[key] = _Pair()
+            if kind == "IN":
+                pair.receive(quantity, float(cost), moment)
+            else:
+                pair.issue(quantity)
+            touched.add(key)
+        count += len(rows)
+    return touched, count
+
+
+def _save(cursor, pairs: dict, touched: set, cutoff):
+    """Reescribe las capas de los pares tocados y avanza el punto de control."""
+    touched = sorted(touched)
+    for i in range(0, len(touched), INSERT_CHUNK):
+        chunk = touched[i : i + INSERT_CHUNK]
+        cursor.executemany(
+            "DELETE FROM Fifo_layers WHERE Products_ID = %s AND Warehouses_ID = %s",
+            chunk,
+        )
+
+    rows = []
+    for product_id, warehouse_id in touched:
+        pair = pairs[(product_id, warehouse_id)]
+        if pair.deficit:
+            rows.append((product_id, warehouse_id, 0, -pair.deficit, 0, cutoff))
+        for sequence, (quantity, cost, moment) in enumerate(pair.layers, start=1):
+            rows.append((product_id, warehouse_id, sequence, quantity, cost, moment))
+    for i in range(0, len(rows), INSERT_CHUNK):
+        cursor.executemany(
+            """
+            INSERT INTO Fifo_layers
+              (Products_ID, Warehouses_ID, Secuencia, Cantidad, `Costo unitario`, `Fecha de entrada`)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            rows[i : i + INSERT_CHUNK],
+        )
+
+    cursor.execute(
+        "REPLACE INTO Fifo_checkpoint (ID, `Fecha del movimiento`) VALUES (1, %s)",
+        (cutoff,),
+    )
+
+    # Snapshot de valorización (solo capas con existencias)
+    cursor.execute(
+        """
+        INSERT INTO Inventory_valuation
+          (`Fecha de corte`, Warehouses_ID, Categories_ID, Unidades, Valor)
+        SELECT %s, l.Warehouses_ID, p.Categories_ID, SUM(l.Cantidad), SUM(l.Cantidad * l.`Costo unitario`)
+        FROM Fifo_layers l
+        JOIN Products p ON p.ID = l.Products_ID
+        WHERE l.Cantidad > 0
+        GROUP BY l.Warehouses_ID, p.Categories_ID
+        """,
+        (cutoff,),
+    )
+
+
+def invalidate_since(conn, fecha) -> bool:
+    """
+    Si fecha no es posterior al punto de control, borra capas y punto de
+    control y confirma. Espera a que termine una corrida en curso para que
+    no vuelva a escribir el punto de control. Devuelve True si invalidó.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NAME, INVALIDATE_LOCK_WAIT_S))
+    locked = cursor.fetchone()[0] == 1
+    try:
+        checkpoint = _load_checkpoint(cursor)
+        if checkpoint is None or fecha > checkpoint:
+            return False
+        cursor.execute("DELETE FROM Fifo_layers")
+        cursor.execute("DELETE FROM Fifo_checkpoint")
+        conn.commit()
+        return True
+    finally:
+        if locked:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+            cursor.fetchone()
+        cursor.close()
+
+
+def run_valuation(rebuild: bool = False) -> tuple[bool, str]:
+    """
+    Avanza las capas FIFO hasta ahora y guarda un snapshot de valorización.
+    Con rebuild=True descarta las capas y reproduce toda la historia.
+    """
+    start = time.perf_counter()
+    conn = None
+    cursor = None
+    locked = False
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (_LOCK_NAME,))
+        locked = cursor.fetchone()[0] == 1
+        if not locked:
+            return False, "Ya hay una valorización FIFO en curso."
+
+        if rebuild:
+            cursor.execute("DELETE FROM Fifo_layers")
+            cursor.execute("DELETE FROM Fifo_checkpoint")
+            conn.commit()
+
+        # Un segundo de margen: los movimientos del segundo actual pueden seguir llegando
+        cursor.execute("SELECT NOW() - INTERVAL 1 SECOND")
+        cutoff = cursor.fetchone()[0]
+
+        checkpoint = _load_checkpoint(cursor)
+        pairs = _load_layers(cursor, checkpoint, cutoff)
+        touched, movements = _replay(cursor, pairs, checkpoint, cutoff)
+        _save(cursor, pairs, touched, cutoff)
+        conn.commit()
+    except Error as e:
+        if conn:
+            conn.rollback()
+        return False, f"Error en la valorización FIFO: {e}"
+    finally:
+        if cursor:
+            if locked:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+                cursor.fetchone()
+            cursor.close()
+        if conn:
+            conn.close()
+
+    elapsed = time.perf_counter() - start
+    return True, (
+        f"Valorización FIFO al {cutoff}: {movements} movimientos nuevos, "
+        f"{len(touched)} pares actualizados ({elapsed:.1f} s)."
+    )
+
+
+if __name__ == "__main__":
+    ok, message = run_valuation(rebuild="--rebuild" in sys.argv[1:])
+    print(("✅ " if ok else "❌ ") + message)
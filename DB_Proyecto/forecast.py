@@ -0,0 +1,171 @@
+"""
+Pronóstico de demanda diaria por producto (suavizamiento exponencial).
+
+- Lee las unidades vendidas por producto y día de los últimos HISTORY_DAYS
+  días y arma una matriz productos × días (NumPy).
+- Ajusta a la vez, para todos los productos, un modelo Holt-Winters
+  aditivo de nivel + estacionalidad semanal. El bucle es sobre los días;
+  cada paso actualiza todos los productos y todas las combinaciones de
+  parámetros (alpha, gamma) de la grilla.
+- Por producto se elige la combinación con menor error de un paso y se
+  guardan los próximos HORIZON_DAYS días en Product_forecasts y el modelo
+  (parámetros, error, demanda del horizonte) en Product_forecast_models.
+
+Uso programado:  python -m DB_Proyecto.forecast
+"""
+
+import itertools
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from mysql.connector import Error
+
+from . import db
+
+HISTORY_DAYS = 365
+HORIZON_DAYS = 30
+SEASON = 7  # estacionalidad semanal
+
+ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+GAMMAS = (0.0, 0.05, 0.1, 0.2)
+
+INSERT_CHUNK = 5_000
+
+
+def fit_forecast(
+    sales: np.ndarray,
+    horizon: int = HORIZON_DAYS,
+    season: int = SEASON,
+) -> dict[str, np.ndarray]:
+    """
+    Ajusta el modelo a cada fila de sales (productos × días) y devuelve
+    alpha, gamma, rmse (error diario de un paso) y forecast (productos × horizon).
+    """
+    grid = np.array(list(itertools.product(ALPHAS, GAMMAS)))  # (G, 2)
+    alpha = grid[:, 0][:, None]
+    gamma = grid[:, 1][:, None]
+    n_products, n_days = sales.shape
+
+    # Inicio: nivel = promedio de la primera temporada, estacionalidad = desvíos
+    first = sales[:, :season]
+    level = np.broadcast_to(first.mean(axis=1), (len(grid), n_products)).copy()
+    seasonal = np.broadcast_to(
+        first - first.mean(axis=1, keepdims=True), (len(grid), n_products, season)
+    ).copy()
+    sse = np.zeros((len(grid), n_products))
+
+    for t in range(season, n_days):
+        s = t % season
+        y = sales[:, t]
+        error = y - (level + seasonal[:, :, s])
+        sse += error**2
+        new_level = level + alpha * error
+        seasonal[:, :, s] += gamma * (y - new_level - seasonal[:, :, s])
+        level = new_level
+
+    best = np.argmin(sse, axis=0)
+    products = np.arange(n_products)
+    steps = np.arange(n_days, n_days + horizon) % season
+    forecast = level[best, products][:, None] + seasonal[best, products][:, steps]
+    return {
+        "alpha": grid[best, 0],
+        "gamma": grid[best, 1],
+        "rmse": np.sqrt(sse[best, products] / max(n_days - season, 1)),
+        "forecast": np.clip(forecast, 0, None),
+    }
+
+
+def _daily_sales(history_days: int) -> tuple[np.ndarray, np.ndarray, date]:
+    """(product_ids, matriz productos × días, primer día del horizonte)."""
+    today = date.today()
+    start = today - timedelta(days=history_days)
+    rows = db.run_select(
+        """
+        SELECT oi.Products_ID, DATE(o.`Fecha de la orden`) AS dia, SUM(oi.Cantidad) AS unidades
+        FROM Ordenes o
+        JOIN Order_items oi ON oi.Ordenes_ID = o.ID
+        WHERE o.`Fecha de la orden` >= %s AND o.`Fecha de la orden` < %s
+        GROUP BY oi.Products_ID, dia
+        """,
+        (start, today),
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.zeros((0, history_days)), today
+
+    products = np.array([r["Products_ID"] for r in rows], dtype=np.int64)
+    days = np.array([(r["dia"] - start).days for r in rows], dtype=np.int64)
+    units = np.array([r["unidades"] for r in rows], dtype=np.float64)
+
+    product_ids, product_index = np.unique(products, return_inverse=True)
+    sales = np.zeros((len(product_ids), history_days))
+    np.add.at(sales, (product_index, days), units)
+    return product_ids, sales, today
+
+
+def refresh_forecasts(
+    history_days: int = HISTORY_DAYS,
+    horizon: int = HORIZON_DAYS,
+) -> tuple[bool, str]:
+    """Recalcula y reemplaza los pronósticos de todos los productos con ventas."""
+    start = time.perf_counter()
+    product_ids, sales, first_day = _daily_sales(history_days)
+    if len(product_ids) == 0:
+        return False, "No hay ventas en el periodo para pronosticar."
+
+    model = fit_forecast(sales, horizon)
+    days = [first_day + timedelta(days=h) for h in range(horizon)]
+    forecast_rows = [
+        (pid, day, round(float(units), 3))
+        for pid, values in zip(product_ids.tolist(), model["forecast"])
+        for day, units in zip(days, values)
+    ]
+    model_rows = list(
+        zip(
+            product_ids.tolist(),
+            model["alpha"].tolist(),
+            model["gamma"].tolist(),
+            np.round(model["rmse"], 4).tolist(),
+            np.round(model["forecast"].sum(axis=1), 3).tolist(),
+        )
+    )
+
+    conn = None
+    cursor = None
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Product_forecasts")
+        cursor.execute("DELETE FROM Product_forecast_models")
+        for i in range(0, len(forecast_rows), INSERT_CHUNK):
+            cursor.executemany(
+                "INSERT INTO Product_forecasts (Products_ID, Fecha, Unidades) VALUES (%s, %s, %s)",
+                forecast_rows[i : i + INSERT_CHUNK],
+            )
+        for i in range(0, len(model_rows), INSERT_CHUNK):
+            cursor.executemany(
+                """
+                INSERT INTO Product_forecast_models
+                  (Products_ID, Alpha, Gamma, `Error diario`, `Demanda horizonte`)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                model_rows[i : i + INSERT_CHUNK],
+            )
+        conn.commit()
+    except Error as e:
+        if conn:
+            conn.rollback()
+        return False, f"Error al guardar pronósticos: {e}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    elapsed = time.perf_counter() - start
+    return True, f"Pronóstico de {horizon} días para {len(product_ids)} productos ({elapsed:.1f} s)."
+
+
+if __name__ == "__main__":
+    ok, message = refresh_forecasts()
+    print(("✅ " if ok else "❌ ") + message)
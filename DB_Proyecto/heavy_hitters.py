@@ -0,0 +1,312 @@
+"""
+Productos más vendidos "ahora" (día y semana actuales) en streaming.
+
+- Count-min sketch (NumPy) con las unidades vendidas por producto y un
+  min-heap con los TOP_N candidatos, por ventana (día / semana ISO).
+- Se alimenta de forma incremental por watermark de Ordenes.ID: cada
+  refresh() lee solo los items de las órdenes nuevas, más una ventana de
+  IDs recientes para no saltarse órdenes que confirman tarde (ver
+  watermark.py).
+- get_top_products() responde desde memoria; el dashboard llama a
+  refresh_if_stale() en segundo plano (a lo más cada REFRESH_EVERY_S).
+- Cuando cambia el día o la semana, el sketch de esa ventana se reinicia.
+- El estado se guarda cada PERSIST_EVERY_S segundos en Top_products_sketch,
+  así un reinicio de la app no obliga a releer la semana.
+
+Error del sketch: cada conteo se sobreestima a lo más en e / SKETCH_WIDTH
+del total de unidades de la ventana, con probabilidad 1 - e^-SKETCH_DEPTH.
+
+Limitación: igual que columnar.py, los items agregados después a una orden
+ya leída no se cuentan.
+"""
+
+import heapq
+import json
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from mysql.connector import Error
+
+from . import db
+from .watermark import IdWatermark
+
+TOP_N = 50
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+PERSIST_EVERY_S = 60
+REFRESH_EVERY_S = 30
+
+WINDOWS = ("dia", "semana")
+
+# Primo de Mersenne 2^31 - 1 para la familia de hashes (a·x + b) mod p
+_PRIME = 2_147_483_647
+
+
+def _window_start(window: str, today: date) -> date:
+    """Primer día de la ventana que contiene a today."""
+    if window == "dia":
+        return today
+    return today - timedelta(days=today.weekday())
+
+
+class CountMinSketch:
+    """Count-min sketch de enteros con actualización vectorizada."""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        self.width = width
+        self.a = rng.integers(1, _PRIME, size=(depth, 1), dtype=np.int64)
+        self.b = rng.integers(0, _PRIME, size=(depth, 1), dtype=np.int64)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _buckets(self, keys: np.ndarray) -> np.ndarray:
+        # a < 2^31 y keys < 2^31: el producto cabe en int64
+        return (self.a * keys.astype(np.int64) + self.b) % _PRIME % self.width
+
+    def add(self, keys: np.ndarray, counts: np.ndarray):
+        rows = np.arange(self.table.shape[0])[:, None]
+        np.add.at(self.table, (rows, self._buckets(keys)), counts)
+
+    def estimate(self, keys: np.ndarray) -> np.ndarray:
+        rows = np.arange(self.table.shape[0])[:, None]
+        return self.table[rows, self._buckets(keys)].min(axis=0)
+
+    def clear(self):
+        self.table[:] = 0
+
+
+class _TopWindow:
+    """Sketch + min-heap de los TOP_N productos de una ventana."""
+
+    def __init__(self, window: str, start: date):
+        self.window = window
+        self.start = start
+        self.sketch = CountMinSketch()
+        self.heap: list[tuple[int, int]] = []  # (unidades estimadas, product_id)
+
+    def reset(self, start: date):
+        self.start = start
+        self.sketch.clear()
+        self.heap = []
+
+    def add(self, products: np.ndarray, units: np.ndarray):
+        if len(products) == 0:
+            return
+        self.sketch.add(products, units)
+
+        touched = np.unique(products)
+        estimates = dict(zip(touched.tolist(), self.sketch.estimate(touched).tolist()))
+        members = {pid for _, pid in self.heap}
+
+        # Los que ya estaban en el heap solo pueden subir: se actualizan y se re-ordena
+        if members & estimates.keys():
+            self.heap = [(estimates.get(pid, count), pid) for count, pid in self.heap]
+            heapq.heapify(self.heap)
+
+        for pid, count in estimates.items():
+            if pid in members:
+                continue
+            if len(self.heap) < TOP_N:
+                heapq.heappush(self.heap, (count, pid))
+            elif count > self.heap[0][0]:
+                heapq.heapreplace(self.heap, (count, pid))
+
+    def top(self) -> list[tuple[int, int]]:
+        """[(product_id, unidades_estimadas)] de mayor a menor."""
+        return [(pid, count) for count, pid in sorted(self.heap, reverse=True)]
+
+
+class _HeavyHitters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        today = date.today()
+        self.windows = {w: _TopWindow(w, _window_start(w, today)) for w in WINDOWS}
+        self.watermark: IdWatermark | None = None  # None = aún no cargado
+        self.last_persist = 0.0
+        self.last_refresh = float("-inf")
+
+    # ======================================================
+    # Alimentación incremental
+    # ======================================================
+
+    def _roll_windows(self, today: date):
+        for window in self.windows.values():
+            start = _window_start(window.window, today)
+            if window.start != start:
+                window.reset(start)
+
+    def refresh(self, max_age_s: float = 0) -> int:
+        """
+        Lee los items de las órdenes nuevas. Devuelve cuántos items se
+        leyeron. Con max_age_s no hace nada si el último refresco es más
+        reciente que eso.
+        """
+        with self._lock:
+            if time.monotonic() - self.last_refresh < max_age_s:
+                return 0
+            if self.watermark is None:
+                self._load_state()
+            today = date.today()
+            self._roll_windows(today)
+            week_start = self.windows["semana"].start
+
+            conn = db.get_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+                cursor.execute("SELECT COALESCE(MAX(ID), 0) FROM Ordenes")
+                high = cursor.fetchone()[0]
+                if self.watermark is None:
+                    # Arranque en frío: se lee la semana actual completa
+                    cursor.execute(
+                        "SELECT COALESCE(MIN(ID), %s + 1) - 1 FROM Ordenes WHERE `Fecha de la orden` >= %s",
+                        (high, week_start),
+                    )
+                    self.watermark = IdWatermark(cursor.fetchone()[0])
+                cursor.execute(
+                    """
+                    SELECT o.ID, oi.Products_ID, oi.Cantidad, DATE(o.`Fecha de la orden`)
+                    FROM Ordenes o
+                    JOIN Order_items oi ON oi.Ordenes_ID = o.ID
+                    WHERE o.ID > %s AND o.ID <= %s
+                      AND o.`Fecha de la orden` >= %s
+                    """,
+                    (self.watermark.low, high, week_start),
+                )
+                # La ventana releída trae órdenes ya contadas: se descartan por ID
+                rows = [row for row in cursor.fetchall() if self.watermark.is_new(row[0])]
+                conn.commit()
+            finally:
+                cursor.close()
+                conn.close()
+
+            if rows:
+                order_ids, products, units, days = zip(*rows)
+                products = np.array(products, dtype=np.int64)
+                units = np.array(units, dtype=np.int64)
+                is_today = np.array([d == today for d in days], dtype=bool)
+                self.windows["semana"].add(products, units)
+                self.windows["dia"].add(products[is_today], units[is_today])
+            self.watermark.advance(high, order_ids if rows else ())
+            self.last_refresh = time.monotonic()
+
+            if time.monotonic() - self.last_persist >= PERSIST_EVERY_S:
+                self._save_state()
+            return len(rows)
+
+    # ======================================================
+    # Persistencia (Top_products_sketch)
+    # ======================================================
+
+    def _save_state(self):
+        rows = [
+            (
+                w.window,
+                w.start,
+                self.watermark.high,
+                json.dumps(sorted(self.watermark.applied)),
+                w.sketch.table.tobytes(),
+                json.dumps(w.heap),
+            )
+            for w in self.windows.values()
+        ]
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                """
+                REPLACE INTO Top_products_sketch (Ventana, `Inicio`, Watermark, Aplicados, Sketch, Candidatos)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """,
+                rows,
+            )
+            conn.commit()
+            self.last_persist = time.monotonic()
+        except Error as e:
+            print("heavy_hitters: no se pudo guardar el estado:", e)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _load_state(self):
+        """Restaura las ventanas guardadas que siguen vigentes."""
+        saved = db.run_select(
+            "SELECT Ventana, `Inicio`, Watermark, Aplicados, Sketch, Candidatos FROM Top_products_sketch"
+        )
+        today = date.today()
+        watermarks = []
+        for row in saved:
+            window = self.windows.get(row["Ventana"])
+            if window is None or row["Inicio"] != _window_start(window.window, today):
+                continue
+            # Estado guardado sin IDs aplicados: la ventana releída se contaría dos veces
+            if row["Aplicados"] is None:
+                continue
+            table = np.frombuffer(row["Sketch"], dtype=np.int64)
+            if table.size != window.sketch.table.size:
+                continue
+            window.start = row["Inicio"]
+            window.sketch.table = table.reshape(window.sketch.table.shape).copy()
+            window.heap = [tuple(item) for item in json.loads(row["Candidatos"])]
+            heapq.heapify(window.heap)
+            watermarks.append((row["Watermark"], row["Aplicados"]))
+
+        # Solo se reanuda si todas las ventanas se restauraron del mismo punto
+        if len(watermarks) == len(self.windows) and len(set(watermarks)) == 1:
+            high, applied = watermarks[0]
+            self.watermark = IdWatermark(high, json.loads(applied))
+        else:
+            for window in self.windows.values():
+                window.reset(_window_start(window.window, today))
+
+    def top(self, window: str, limit: int) -> list[tuple[int, int]]:
+        with self._lock:
+            return self.windows[window].top()[:limit]
+
+
+_hitters = _HeavyHitters()
+
+
+def refresh() -> int:
+    """Procesa las órdenes nuevas desde la última llamada."""
+    return _hitters.refresh()
+
+
+def refresh_if_stale() -> int:
+    """Como refresh(), pero a lo más una vez cada REFRESH_EVERY_S segundos."""
+    try:
+        return _hitters.refresh(REFRESH_EVERY_S)
+    except Error as e:
+        print("Error al refrescar top de productos:", e)
+        return 0
+
+
+def get_top_products(window: str = "dia", limit: int = TOP_N) -> list[dict]:
+    """
+    Top de productos por unidades vendidas en la ventana ("dia" o "semana"),
+    desde el estado en memoria (no refresca: ver refresh_if_stale). Las
+    unidades son estimadas (pueden estar sobreestimadas, nunca subestimadas).
+    """
+    if window not in WINDOWS:
+        print("heavy_hitters.get_top_products: ventana no válida:", window)
+        return []
+
+    top = _hitters.top(window, limit)
+    if not top:
+        return []
+
+    ids = [pid for pid, _ in top]
+    placeholders = ", ".join(["%s"] * len(ids))
+    names = {
+        r["ID"]: r["Nombre del producto"]
+        for r in db.run_select(
+            f"SELECT ID, `Nombre del producto` FROM Products WHERE ID IN ({placeholders})",
+            tuple(ids),
+        )
+    }
+    return [
+        {"Posición": i, "ID": pid, "Producto": names.get(pid, ""), "Unidades": units}
+        for i, (pid, units) in enumerate(top, start=1)
+    ]
@@ -0,0 +1,264 @@
+"""
+Importación masiva de movimientos de inventario desde CSV.
+
+Columnas (encabezado obligatorio, en cualquier orden):
+  producto, bodega, empleado, cantidad, tipo   -> obligatorias
+  fecha (AAAA-MM-DD[ HH:MM:SS]), costo         -> opcionales
+
+- Cada fila se valida en memoria: IDs de producto, bodega y empleado
+  contra conjuntos en caché (se recargan cada LOOKUP_TTL_S segundos),
+  cantidad positiva, tipo IN/OUT, fecha no futura y sin repetir
+  (producto, bodega, fecha), que es la PRIMARY KEY de inventory_movements.
+  Las fechas con zona horaria se pasan a hora local y todas se truncan al
+  segundo, como las guarda la columna DATETIME.
+- Las filas válidas se insertan en lotes de CHUNK_SIZE, una transacción
+  por lote, con los triggers de saldo diferidos: Inventory_balances se
+  actualiza una sola vez por lote.
+- Si un lote falla, se reintenta fila por fila para reportar el error de
+  cada una; las demás filas del lote se guardan.
+- Si hay fechas anteriores a hoy se invalidan los snapshots de stock
+  desde esa fecha y se vuelven a tomar.
+- Si hay fechas que la valorización FIFO ya procesó, se descartan sus capas
+  (fifo.invalidate_since) y la siguiente corrida reconstruye la historia.
+
+Uso:  python -m DB_Proyecto.inventory_import movimientos.csv [--chunk 1000]
+"""
+
+import argparse
+import csv
+import io
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from mysql.connector import Error
+
+from . import db, fifo
+
+CHUNK_SIZE = 1_000
+LOOKUP_TTL_S = 300
+MAX_REPORTED_ERRORS = 500
+
+REQUIRED_COLUMNS = ("producto", "bodega", "empleado", "cantidad", "tipo")
+
+_INSERT_MOVEMENT = """
+    INSERT INTO inventory_movements
+      (Products_ID, Warehouses_ID, Cantidad, `Tipo de movimiento`,
+       `Fecha del movimiento`, Employees_ID, `Costo unitario`)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+_UPSERT_BALANCE = """
+    INSERT INTO Inventory_balances (Products_ID, Warehouses_ID, Stock)
+    VALUES (%s, %s, %s) AS nuevo
+    ON DUPLICATE KEY UPDATE
+      Stock = Inventory_balances.Stock + nuevo.Stock
+"""
+
+_lookups: dict[str, set[int]] = {}
+_lookups_loaded_at = 0.0
+
+
+def _lookup_sets() -> dict[str, set[int]]:
+    """IDs válidos de productos, bodegas y empleados (caché con TTL)."""
+    global _lookups, _lookups_loaded_at
+    if not _lookups or time.monotonic() - _lookups_loaded_at > LOOKUP_TTL_S:
+        _lookups = {
+            "producto": {r["ID"] for r in db.run_select("SELECT ID FROM Products")},
+            "bodega": {r["ID"] for r in db.run_select("SELECT ID FROM Warehouses")},
+            "empleado": {r["ID"] for r in db.run_select("SELECT ID FROM Employees")},
+        }
+        _lookups_loaded_at = time.monotonic()
+    return _lookups
+
+
+def _parse_row(raw: dict, lookups: dict[str, set[int]], now: datetime) -> tuple:
+    """Convierte una fila del CSV en la tupla de inserción o lanza ValueError."""
+    values = {}
+    for column in ("producto", "bodega", "empleado", "cantidad"):
+        text = (raw.get(column) or "").strip()
+        if not text.isdigit():
+            raise ValueError(f"{column} debe ser un entero positivo ('{text}')")
+        values[column] = int(text)
+    for column in ("producto", "bodega", "empleado"):
+        if values[column] not in lookups[column]:
+            raise ValueError(f"{column} {values[column]} no existe")
+    if values["cantidad"] == 0:
+        raise ValueError("cantidad debe ser mayor que 0")
+
+    tipo = (raw.get("tipo") or "").strip().upper()
+    if tipo not in ("IN", "OUT"):
+        raise ValueError(f"tipo debe ser IN u OUT ('{tipo}')")
+
+    fecha_text = (raw.get("fecha") or "").strip()
+    if fecha_text:
+        try:
+            fecha = datetime.fromisoformat(fecha_text)
+        except ValueError:
+            raise ValueError(f"fecha no válida ('{fecha_text}')") from None
+        if fecha.tzinfo is not None:
+            fecha = fecha.astimezone().replace(tzinfo=None)
+        fecha = fecha.replace(microsecond=0)
+        if fecha > now:
+            raise ValueError("fecha en el futuro")
+    else:
+        fecha = now
+
+    costo_text = (raw.get("costo") or "").strip()
+    costo = None
+    if costo_text:
+        try:
+            costo = round(float(costo_text), 2)
+        except ValueError:
+            raise ValueError(f"costo no válido ('{costo_text}')") from None
+        if costo < 0:
+            raise ValueError("costo no puede ser negativo")
+
+    return (
+        values["producto"],
+        values["bodega"],
+        values["cantidad"],
+        tipo,
+        fecha,
+        values["empleado"],
+        costo,
+    )
+
+
+def validate_csv(text: str) -> tuple[list[tuple[int, tuple]], list[dict]]:
+    """
+    Valida el CSV completo. Devuelve (filas_validas, errores): cada fila
+    válida es (línea, tupla de inserción); cada error {"linea", "error"}.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    header = [c.strip().lower() for c in (reader.fieldnames or [])]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        return [], [{"linea": 1, "error": f"Faltan columnas: {', '.join(missing)}"}]
+    reader.fieldnames = header
+
+    lookups = _lookup_sets()
+    now = datetime.now().replace(microsecond=0)
+    rows: list[tuple[int, tuple]] = []
+    errors: list[dict] = []
+    seen: dict[tuple, int] = {}
+    # La línea 1 es el encabezado
+    for line, raw in enumerate(reader, start=2):
+        try:
+            row = _parse_row(raw, lookups, now)
+        except ValueError as e:
+            errors.append({"linea": line, "error": str(e)})
+            continue
+        key = (row[0], row[1], row[4])
+        if key in seen:
+            errors.append(
+                {
+                    "linea": line,
+                    "error": f"producto/bodega/fecha repetidos (línea {seen[key]}); agrega una fecha distinta",
+                }
+            )
+            continue
+        seen[key] = line
+        rows.append((line, row))
+    return rows, errors
+
+
+def _balance_deltas(rows: list[tuple]) -> list[tuple[int, int, int]]:
+    deltas: dict[tuple[int, int], int] = defaultdict(int)
+    for product_id, warehouse_id, cantidad, tipo, *_ in rows:
+        deltas[(product_id, warehouse_id)] += cantidad if tipo == "IN" else -cantidad
+    return [(p, w, d) for (p, w), d in deltas.items() if d]
+
+
+def _insert_chunk(cursor, rows: list[tuple]):
+    cursor.executemany(_INSERT_MOVEMENT, rows)
+    deltas = _balance_deltas(rows)
+    if deltas:
+        cursor.executemany(_UPSERT_BALANCE, deltas)
+
+
+def import_movements(text: str, chunk_size: int = CHUNK_SIZE) -> tuple[int, list[dict], str]:
+    """
+    Valida e inserta los movimientos del CSV.
+    Devuelve (filas_insertadas, errores_por_fila, mensaje).
+    """
+    start = time.perf_counter()
+    rows, errors = validate_csv(text)
+    if not rows:
+        return 0, errors[:MAX_REPORTED_ERRORS], "No hay filas válidas para importar."
+
+    inserted = 0
+    fifo_reset = False
+    conn = None
+    cursor = None
+    try:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SET @inventario_saldos_diferidos = 1")
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i : i + chunk_size]
+            try:
+                _insert_chunk(cursor, [row for _, row in chunk])
+                conn.commit()
+                inserted += len(chunk)
+            except Error:
+                conn.rollback()
+                # Fila por fila, para saber cuál falló (p. ej. fecha ya registrada)
+                for line, row in chunk:
+                    try:
+                        _insert_chunk(cursor, [row])
+                        conn.commit()
+                        inserted += 1
+                    except Error as e:
+                        conn.rollback()
+                        errors.append({"linea": line, "error": e.msg})
+        cursor.execute("SET @inventario_saldos_diferidos = NULL")
+
+        # Movimientos con fecha pasada: los snapshots desde ese día ya no sirven
+        oldest = min(row[4] for _, row in rows)
+        if oldest.date() < datetime.now().date():
+            cursor.callproc("sp_invalidar_snapshots_stock", [oldest])
+            cursor.callproc("sp_tomar_snapshots_stock_pendientes")
+            conn.commit()
+        # Y si la valorización FIFO ya pasó de esa fecha, sus capas tampoco
+        fifo_reset = fifo.invalidate_since(conn, oldest)
+    except Error as e:
+        if conn:
+            conn.rollback()
+        errors.append({"linea": 0, "error": f"Error de conexión: {e}"})
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    errors.sort(key=lambda e: e["linea"])
+    elapsed = time.perf_counter() - start
+    message = (
+        f"{inserted} movimientos importados, {len(errors)} filas con error ({elapsed:.1f} s)."
+    )
+    if fifo_reset:
+        message += (
+            " Hay movimientos anteriores a la última valorización FIFO:"
+            " la siguiente corrida la reconstruye completa."
+        )
+    return inserted, errors[:MAX_REPORTED_ERRORS], message
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importa movimientos de inventario desde un CSV."
+    )
+    parser.add_argument("archivo", help="CSV con producto,bodega,empleado,cantidad,tipo[,fecha,costo]")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="Filas por transacción.")
+    args = parser.parse_args()
+
+    with open(args.archivo, encoding="utf-8-sig", newline="") as f:
+        inserted, errors, message = import_movements(f.read(), args.chunk)
+    for error in errors:
+        print(f"  línea {error['linea']}: {error['error']}")
+    print(("✅ " if inserted else "❌ ") + message)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Motor analítico embebido (DuckDB) sobre el snapshot Parquet de snapshot.py.
+
+- Cada tabla del snapshot se expone como una vista sobre sus archivos
+  Parquet (con las particiones mensuales de Hive).
+- Las vistas vw_* de LootBoxIndexViews.sql se recrean encima, así las
+  ADVANCED_QUERIES corren con el mismo SQL que en MySQL.
+- El SQL de MySQL se traduce con reglas mínimas (ver to_duckdb_sql).
+- La sesión de DuckDB solo puede leer la carpeta del snapshot.
+- Cada conexión lee una versión fija del snapshot; las versiones viejas se
+  borran cuando ya ninguna conexión las usa.
+
+Permite correr analítica pesada sin cargar el servidor MySQL (OLTP).
+"""
+
+import os
+import re
+import threading
+
+import duckdb
+
+from . import db, snapshot
+
+VIEWS_FILE = os.path.join("SQL_DB_Template", "LootBoxIndexViews.sql")
+
+_CREATE_VIEW = re.compile(
+    r"CREATE OR REPLACE VIEW\s+(\w+)\s+AS\s+(.*?);", re.IGNORECASE | re.DOTALL
+)
+
+# Mismos modos que db.EXPLAIN_MODES, en sintaxis de DuckDB
+_EXPLAIN_PREFIXES = {
+    "tradicional": "EXPLAIN ",
+    "json": "EXPLAIN (FORMAT json) ",
+    "analyze": "EXPLAIN ANALYZE ",
+}
+
+_lock = threading.Lock()
+_conn: duckdb.DuckDBPyConnection | None = None
+_loaded_snapshot: str | None = None  # "version" del manifest cargado
+
+# Cursores abiertos por conexión: una conexión de un snapshot anterior se
+# cierra cuando su último cursor termina, no mientras otro hilo la usa
+_open_cursors: dict[int, int] = {}
+_retired: dict[int, duckdb.DuckDBPyConnection] = {}
+# Versión del snapshot de cada conexión abierta (la actual y las retiradas)
+_versions: dict[int, str] = {}
+
+# query_token -> cursores de DuckDB en curso (para interrumpirlos).
+# Un mismo token puede tener varios: consulta + EXPLAIN en paralelo.
+_RUNNING: dict[str, set] = {}
+
+
+def to_duckdb_sql(sql: str) -> str:
+    """
+    Traduce el subconjunto de MySQL que usan las vistas y consultas avanzadas:
+    identificadores con `backticks`, CURDATE() y DATEDIFF(a, b).
+    """
+    sql = sql.strip().rstrip(";")
+    sql = sql.replace("`", '"')
+    sql = re.sub(r"\bCURDATE\(\)", "CURRENT_DATE", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bDATEDIFF\(", "mysql_datediff(", sql, flags=re.IGNORECASE)
+    return sql.replace("%s", "?")
+
+
+def _build_connection(manifest: dict) -> duckdb.DuckDBPyConnection:
+    """Crea la base en memoria con las tablas del snapshot y las vistas vw_*."""
+    conn = duckdb.connect(":memory:")
+    conn.execute(
+        "CREATE MACRO mysql_datediff(a, b) AS "
+        "date_diff('day', CAST(b AS DATE), CAST(a AS DATE))"
+    )
+
+    root = os.path.abspath(snapshot.version_dir(manifest["version"])).replace("\\", "/")
+    partitioned = set(manifest["particionadas"])
+    for table in manifest["tablas"]:
+        exclude = " EXCLUDE (mes)" if table in partitioned else ""
+        conn.execute(
+            f'CREATE VIEW "{table}" AS SELECT *{exclude} '
+            f"FROM read_parquet('{root}/{table}/**/*.parquet', hive_partitioning = true)"
+        )
+
+    with open(VIEWS_FILE, encoding="utf-8") as f:
+        for name, body in _CREATE_VIEW.findall(f.read()):
+            try:
+                conn.execute(f'CREATE VIEW "{name}" AS {to_duckdb_sql(body)}')
+            except duckdb.Error as e:
+                print(f"olap: vista {name} no disponible en DuckDB:", e)
+
+    # Desde aquí la sesión solo puede leer el snapshot
+    conn.execute(f"SET allowed_directories = ['{root}']")
+    conn.execute("SET enable_external_access = false")
+    conn.execute("SET lock_configuration = true")
+    return conn
+
+
+def _cursor() -> tuple[duckdb.DuckDBPyConnection, duckdb.DuckDBPyConnection]:
+    """
+    (conexión, cursor) sobre el snapshot actual; recarga si hay un snapshot
+    nuevo. Cada cursor se devuelve con _release().
+    """
+    global _conn, _loaded_snapshot
+
+    with _lock:
+        # Dentro del lock: ningún _prune_versions borra la versión leída
+        manifest = snapshot.read_manifest()
+        if manifest is None:
+            raise FileNotFoundError(
+                "No hay snapshot Parquet. Ejecuta: python export_snapshot.py"
+            )
+        if _conn is None or _loaded_snapshot != manifest["version"]:
+            if _conn is not None:
+                if _open_cursors.get(id(_conn)):
+                    _retired[id(_conn)] = _conn
+                else:
+                    _versions.pop(id(_conn), None)
+                    _conn.close()
+            _conn = _build_connection(manifest)
+            _loaded_snapshot = manifest["version"]
+            _versions[id(_conn)] = _loaded_snapshot
+            _prune_versions()
+        _open_cursors[id(_conn)] = _open_cursors.get(id(_conn), 0) + 1
+        # Cada consulta usa su propio cursor (seguro entre hilos)
+        return _conn, _conn.cursor()
+
+
+def _release(conn: duckdb.DuckDBPyConnection, cursor: duckdb.DuckDBPyConnection):
+    """Cierra el cursor y, si era el último de un snapshot anterior, su conexión."""
+    cursor.close()
+    with _lock:
+        remaining = _open_cursors.get(id(conn), 1) - 1
+        if remaining:
+            _open_cursors[id(conn)] = remaining
+            return
+        _open_cursors.pop(id(conn), None)
+        retired = _retired.pop(id(conn), None)
+        if retired is not None:
+            retired.close()
+            _versions.pop(id(conn), None)
+            _prune_versions()
+
+
+def _prune_versions():
+    """Borra las versiones del snapshot sin conexiones abiertas (con _lock tomado)."""
+    try:
+        snapshot.prune_versions(set(_versions.values()))
+    except OSError as e:
+        print("olap: no se pudieron borrar snapshots anteriores:", e)
+
+
+def _execute(
+    query: str,
+    params: tuple | None,
+    timeout_ms: int | None,
+    query_token: str | None,
+) -> tuple[list[dict], str | None]:
+    """Ejecuta en DuckDB con límite de tiempo (interrupt) y registro para cancelar."""
+    timed_out = threading.Event()
+    timer = None
+    conn = None
+    cursor = None
+    try:
+        conn, cursor = _cursor()
+        if query_token:
+            with _lock:
+                _RUNNING.setdefault(query_token, set()).add(cursor)
+        if timeout_ms:
+            timer = threading.Timer(
+                timeout_ms / 1000, lambda: (timed_out.set(), cursor.interrupt())
+            )
+            timer.start()
+
+        cursor.execute(to_duckdb_sql(query), list(params or ()))
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchmany(db.QUERY_ROW_CAP)
+        return [dict(zip(columns, row)) for row in rows], None
+    except FileNotFoundError as e:
+        return [], str(e)
+    except duckdb.InterruptException:
+        if timed_out.is_set():
+            return [], f"La consulta superó el límite de {timeout_ms / 1000:g} s y fue detenida."
+        return [], "La consulta fue cancelada."
+    except duckdb.Error as e:
+        return [], f"Error en DuckDB: {e}"
+    finally:
+        if timer:
+            timer.cancel()
+        if query_token and cursor:
+            with _lock:
+                running = _RUNNING.get(query_token, set())
+                running.discard(cursor)
+                if not running:
+                    _RUNNING.pop(query_token, None)
+        if cursor:
+            _release(conn, cursor)
+
+
+def run_query(
+    sql: str,
+    params: tuple | None = None,
+    timeout_ms: int | None = db.QUERY_TIMEOUT_MS,
+    query_token: str | None = None,
+) -> tuple[list[dict], str | None, dict]:
+    """
+    Equivalente a db.run_guarded_select sobre el snapshot Parquet.
+    Devuelve (filas, mensaje_error, info); el resultado se corta en
+    db.QUERY_ROW_CAP filas.
+    """
+    info = {
+        "filas_estimadas": None,
+        "auto_limit": False,
+        "filas_totales": 0,
+        "spool_path": None,
+        "row_cap": db.QUERY_ROW_CAP,
+    }
+    query, error = db._validate_select(sql)
+    if error:
+        return [], error, info
+
+    rows, error = _execute(query, params, timeout_ms, query_token)
+    info["filas_totales"] = len(rows)
+    return rows, error, info
+
+
+def run_explain(
+    sql: str,
+    params: tuple | None = None,
+    mode: str = "tradicional",
+    timeout_ms: int | None = db.QUERY_TIMEOUT_MS,
+    query_token: str | None = None,
+) -> tuple[list[dict], str, str | None]:
+    """
+    Plan de DuckDB en el modo indicado. Devuelve (filas, texto_crudo, error),
+    igual que db.run_explain; el plan completo va en texto_crudo.
+    """
+    query, error = db._validate_select(sql)
+    if error:
+        return [], "", error
+    if mode not in _EXPLAIN_PREFIXES:
+        return [], "", f"modo de EXPLAIN no válido: {mode}"
+
+    rows, error = _execute(_EXPLAIN_PREFIXES[mode] + query, params, timeout_ms, query_token)
+    if error:
+        return [], "", error
+
+    # DuckDB devuelve (explain_key, explain_value) por cada plan
+    raw = "\n\n".join(str(list(row.values())[-1]) for row in rows)
+    summary = [{"motor": "duckdb", "modo": mode, "snapshot": _loaded_snapshot}]
+    return summary, raw, None
+
+
+def cancel_query(query_token: str) -> bool:
+    """Interrumpe las consultas de DuckDB registradas con query_token."""
+    with _lock:
+        cursors = list(_RUNNING.get(query_token, ()))
+    for cursor in cursors:
+        cursor.interrupt()
+    return bool(cursors)
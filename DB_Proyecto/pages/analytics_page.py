@@ -1,5 +1,8 @@
+import asyncio
+import time
+
 import reflex as rx
-from .. import db
+from .. import db, forecast, rfm
 
 # ==========================================================
 # Constantes de vistas analíticas (basadas en las vistas SQL)
@@ -14,7 +17,7 @@ VIEW_OPTIONS = [
     {
         "value": "vw_ticket_promedio_mensual",
         "label": "Ticket promedio mensual",
-        "description": "Promedio de total de orden por mes.",
+        "description": "Promedio del total de orden por mes.",
     },
     {
         "value": "vw_sla_envios",
@@ -29,22 +32,48 @@ VIEW_OPTIONS = [
     {
         "value": "vw_clientes_ltv_alto",
         "label": "Clientes con LTV alto",
-        "description": "Clientes con Lifetime Value mayor al umbral definido.",
+        "description": "Clientes cuyo Lifetime Value (LTV) supera el umbral definido.",
     },
     {
         "value": "vw_inventario_producto_bodega",
         "label": "Inventario por producto y bodega",
-        "description": "Stock actual por producto y bodega.",
+        "description": "Stock actual por producto y bodega calculado desde movimientos de inventario.",
     },
     {
         "value": "vw_clientes_por_pais",
         "label": "Clientes por país",
         "description": "Número de clientes agrupados por país.",
     },
+    {
+        "value": "vw_clientes_activos_mensual",
+        "label": "Clientes activos por mes y país",
+        "description": "Compradores distintos por mes y país del cliente.",
+    },
     {
         "value": "vw_abc_productos",
         "label": "ABC de productos",
-        "description": "Clasificación ABC según participación en ventas.",
+        "description": "Clasificación ABC de productos según participación en ventas totales.",
+    },
+    {
+        "value": "vw_rfm_segmentos",
+        "label": "Segmentos RFM",
+        "description": "Clientes por segmento RFM (recencia, frecuencia y monto en quintiles) de la última corrida.",
+    },
+    {
+        "value": "vw_sla_percentiles",
+        "label": "Percentiles de SLA",
+        "description": (
+            "Percentiles de días de entrega por bodega y mes (mes vacío = todos los meses), "
+            "desde el histograma de envíos entregados."
+        ),
+    },
+    {
+        "value": "vw_pronostico_categoria",
+        "label": "Pronóstico por categoría",
+        "description": (
+            "Demanda de los próximos 30 días por categoría (suavizamiento exponencial "
+            "con estacionalidad semanal por producto)."
+        ),
     },
 ]
 
@@ -73,18 +102,18 @@ ADVANCED_QUERIES = {
     "clientes_churn_180": {
         "label": "Clientes churn (>180 días sin comprar)",
         "description": "Clientes cuya última compra fue hace más de 180 días.",
+        # Customer_stats se mantiene con triggers sobre Ordenes: range scan
+        # sobre idx_Customer_stats_ultima_orden en lugar de GROUP BY.
         "sql": """
             SELECT
               c.ID AS customer_id,
               c.Nombre,
               c.Apellido,
-              MAX(o.`Fecha de la orden`) AS ultima_compra,
-              DATEDIFF(CURDATE(), MAX(o.`Fecha de la orden`)) AS dias_desde_ultima_compra
-            FROM Customers c
-            LEFT JOIN Ordenes o ON o.Customers_ID = c.ID
-            GROUP BY c.ID, c.Nombre, c.Apellido
-            HAVING MAX(o.`Fecha de la orden`) IS NOT NULL
-              AND DATEDIFF(CURDATE(), MAX(o.`Fecha de la orden`)) > 180;
+              s.`Ultima orden` AS ultima_compra,
+              DATEDIFF(CURDATE(), s.`Ultima orden`) AS dias_desde_ultima_compra
+            FROM Customer_stats s
+            JOIN Customers c ON c.ID = s.Customers_ID
+            WHERE s.`Ultima orden` < CURDATE() - INTERVAL 180 DAY;
         """,
     },
     "abc_productos_query": {
@@ -105,6 +134,18 @@ ADVANCED_QUERIES = {
 }
 
 
+async def _timed(fn, *args):
+    """Ejecuta fn(*args) en un hilo y devuelve (resultado, milisegundos)."""
+    start = time.perf_counter()
+    result = await asyncio.to_thread(fn, *args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+# Motores para las consultas avanzadas: MySQL (OLTP) o DuckDB sobre el
+# snapshot Parquet (ver olap.py / export_snapshot.py)
+QUERY_BACKENDS = ["mysql", "duckdb"]
+
+
 # ==========================================================
 # Estado de Analítica
 # ==========================================================
@@ -120,6 +161,20 @@ class AnalyticsState(rx.State):
     view_page: int = 0
     view_page_size: int = 15
     view_message: str = ""
+    view_backend: str = "mysql"
+    view_timing: str = ""
+    computing_rfm: bool = False
+    computing_forecast: bool = False
+
+    # --- Cubo de ventas (drill-down) ---
+    cube_geo: str = "pais"
+    cube_by_category: bool = False
+    cube_by_month: bool = False
+    cube_country_id: int | None = None
+    cube_country_name: str = ""
+    cube_rows: list[dict] = []
+    cube_columns: list[str] = []
+    cube_timing: str = ""
 
     # --- Consultas avanzadas ---
     selected_query: str = "clientes_multipais"
@@ -129,11 +184,30 @@ class AnalyticsState(rx.State):
     query_page: int = 0
     query_page_size: int = 15
     query_message: str = ""
+    query_spool_path: str = ""
 
     # --- Plan de ejecución (EXPLAIN) ---
     plan_rows: list[dict] = []
     plan_columns: list[str] = []
+    plan_raw: str = ""
+    plan_mode: str = "tradicional"
     show_plan: bool = True
+
+    # --- Ejecución en segundo plano ---
+    query_running: bool = False
+    query_cancelled: bool = False
+    query_progress: int = 0
+    query_status: str = ""
+    query_timing: str = ""
+    query_backend: str = "mysql"
+    snapshot_label: str = ""
+
+    # --- Historial de planes (regresiones) ---
+    regression_rows: list[dict] = []
+    regression_columns: list[str] = []
+    regression_message: str = ""
+    capturing_plans: bool = False
+
     # ======================================================
     # Helpers internos de paginación
     # ======================================================
@@ -161,7 +235,10 @@ class AnalyticsState(rx.State):
     def load_view_data(self):
         """Carga datos de la vista seleccionada usando db.get_view_data."""
         self.view_message = ""
-        rows = db.get_view_data(self.selected_view)
+        start = time.perf_counter()
+        rows = db.get_view_data(self.selected_view, self.view_backend)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.view_timing = f"{self.view_backend}: {elapsed_ms:.0f} ms"
         self.view_all_rows = rows
         self.view_page = 0
 
@@ -175,6 +252,48 @@ class AnalyticsState(rx.State):
         if not rows:
             self.view_message = "Esta vista no tiene datos para mostrar en este momento."
 
+    def set_view_backend(self, value: str):
+        """Cambia el motor de cálculo de las vistas (MySQL, NumPy o HLL)."""
+        if value in db.VIEW_BACKENDS:
+            self.view_backend = value
+            self.load_view_data()
+
+    @rx.event(background=True)
+    async def recompute_rfm(self):
+        """Nueva corrida de segmentación RFM (rfm.py) en segundo plano."""
+        async with self:
+            if self.computing_rfm:
+                return
+            self.computing_rfm = True
+            self.view_message = "Calculando segmentación RFM..."
+
+        ok, message = await asyncio.to_thread(rfm.refresh_rfm)
+
+        async with self:
+            self.computing_rfm = False
+            if self.selected_view == "vw_rfm_segmentos":
+                self.load_view_data()
+            self.view_message = message if not ok or not self.view_all_rows else ""
+            self.view_timing = message if ok else self.view_timing
+
+    @rx.event(background=True)
+    async def recompute_forecast(self):
+        """Recalcula los pronósticos de demanda (forecast.py) en segundo plano."""
+        async with self:
+            if self.computing_forecast:
+                return
+            self.computing_forecast = True
+            self.view_message = "Calculando pronósticos de demanda..."
+
+        ok, message = await asyncio.to_thread(forecast.refresh_forecasts)
+
+        async with self:
+            self.computing_forecast = False
+            if self.selected_view == "vw_pronostico_categoria":
+                self.load_view_data()
+            self.view_message = message if not ok or not self.view_all_rows else ""
+            self.view_timing = message if ok else self.view_timing
+
     def next_view_page(self):
         """Página siguiente de la vista."""
         total = len(self.view_all_rows)
@@ -188,6 +307,52 @@ class AnalyticsState(rx.State):
             self.view_page -= 1
             self._update_view_page()
 
+    # ======================================================
+    # Cubo de ventas (Sales_cube)
+    # ======================================================
+
+    def load_sales_cube(self):
+        """Lee el nivel actual del cubo, sin refrescarlo."""
+        start = time.perf_counter()
+        self.cube_rows = db.get_sales_cube(
+            geo=self.cube_geo,
+            by_category=self.cube_by_category,
+            by_month=self.cube_by_month,
+            country_id=self.cube_country_id,
+        )
+        self.cube_columns = list(self.cube_rows[0].keys()) if self.cube_rows else []
+        self.cube_timing = f"{len(self.cube_rows)} filas · {(time.perf_counter() - start) * 1000:.0f} ms"
+
+    def refresh_sales_cube(self):
+        """Suma al cubo las órdenes pendientes y vuelve a leer el nivel actual."""
+        db.refresh_sales_cube()
+        self.load_sales_cube()
+
+    def set_cube_geo(self, value: str):
+        if value in db.SALES_CUBE_GEO_LEVELS:
+            self.cube_geo = value
+            self.cube_country_id = None
+            self.cube_country_name = ""
+            self.load_sales_cube()
+
+    def set_cube_by_category(self, value: bool):
+        self.cube_by_category = value
+        self.load_sales_cube()
+
+    def set_cube_by_month(self, value: bool):
+        self.cube_by_month = value
+        self.load_sales_cube()
+
+    def drill_cube_country(self, country_id: int, country_name: str):
+        """Baja de un país a sus ciudades."""
+        self.cube_geo = "ciudad"
+        self.cube_country_id = country_id
+        self.cube_country_name = country_name
+        self.load_sales_cube()
+
+    def cube_back_to_countries(self):
+        self.set_cube_geo("pais")
+
     # ======================================================
     # Consultas avanzadas + EXPLAIN
     # ======================================================
@@ -201,23 +366,124 @@ class AnalyticsState(rx.State):
         """Se llama al cambiar de consulta avanzada."""
         self.selected_query = value
 
-    def run_selected_query(self):
-        """Ejecuta la consulta avanzada seleccionada y su EXPLAIN."""
-        self.query_message = ""
-        self.query_all_rows = []
-        self.query_rows = []
-        self.plan_rows = []
-        self.plan_columns = []
-
-        info = ADVANCED_QUERIES.get(self.selected_query)
-        if not info:
-            self.query_message = "Consulta no encontrada."
+    def set_plan_mode(self, value: str):
+        """Modo de EXPLAIN: tradicional, json o analyze."""
+        if value in db.EXPLAIN_MODES:
+            self.plan_mode = value
+
+    def set_query_backend(self, value: str):
+        """
+        Motor de las consultas avanzadas: mysql o duckdb (snapshot Parquet).
+        """
+        # El motor no cambia con una consulta en curso (cancel_selected_query lo usa)
+        if value not in QUERY_BACKENDS or self.query_running:
             return
+        self.query_backend = value
+        self.snapshot_label = ""
+        if value == "duckdb":
+            from .. import snapshot  # import diferido: pyarrow solo si se usa
+
+            manifest = snapshot.read_manifest()
+            self.snapshot_label = (
+                f"Snapshot del {manifest['creado']}"
+                if manifest
+                else "Sin snapshot: ejecuta python export_snapshot.py"
+            )
+
+    def _query_token(self) -> str:
+        """Identificador de la consulta en curso de esta sesión (para KILL QUERY)."""
+        return f"analytics-{self.router.session.client_token}"
+
+    def _finish_query(self, message: str = ""):
+        if message:
+            self.query_message = message
+        self.query_running = False
+        self.query_status = ""
+
+    @rx.event(background=True)
+    async def run_selected_query(self):
+        """
+        Ejecuta la consulta avanzada seleccionada y su EXPLAIN en paralelo,
+        como tarea en segundo plano, con límite de tiempo y cancelable.
+        """
+        async with self:
+            if self.query_running:
+                return
+            self.query_message = ""
+            self.query_all_rows = []
+            self.query_rows = []
+            self.plan_rows = []
+            self.plan_columns = []
+            self.plan_raw = ""
+            self.query_timing = ""
+            self.query_spool_path = ""
+
+            info = ADVANCED_QUERIES.get(self.selected_query)
+            if not info:
+                self.query_message = "Consulta no encontrada."
+                return
+
+            self.query_running = True
+            self.query_cancelled = False
+            self.query_progress = 0
+            self.query_status = "Ejecutando consulta y plan en paralelo..."
+            token = self._query_token()
+            mode = self.plan_mode
+            backend = self.query_backend
 
         sql = info["sql"]
+        timeout_ms = info.get("timeout_ms", db.QUERY_TIMEOUT_MS)
+
+        # Consulta y plan en conexiones separadas (fuera del lock del estado)
+        if backend == "duckdb":
+            from .. import olap  # import diferido: duckdb solo si se usa
+
+            query_call = (olap.run_query, sql, None, timeout_ms, token)
+            plan_call = (olap.run_explain, sql, None, mode, timeout_ms, token)
+        else:
+            query_call = (db.run_guarded_select, sql, None, False, timeout_ms, token)
+            plan_call = (db.run_explain, sql, None, mode, timeout_ms, token)
+        query_task = asyncio.create_task(_timed(*query_call))
+        plan_task = asyncio.create_task(_timed(*plan_call))
+
+        timings = {}
+        errors = []
+        notices = []
+        pending = {query_task, plan_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            async with self:
+                for task in done:
+                    result, elapsed_ms = task.result()
+                    if task is query_task:
+                        timings["Consulta"] = elapsed_ms
+                        rows, error, info = result
+                        self._set_query_result(rows)
+                        self.query_spool_path = info.get("spool_path") or ""
+                        if db.describe_query_info(info):
+                            notices.append(db.describe_query_info(info))
+                    else:
+                        timings["Plan"] = elapsed_ms
+                        plan, self.plan_raw, error = result
+                        self.plan_rows = plan
+                        self.plan_columns = list(plan[0].keys()) if plan else []
+                    if error:
+                        errors.append(error)
+                self.query_progress = 100 * (2 - len(pending)) // 2
+                self.query_status = "Esperando el resto de resultados..."
 
-        # Ejecutar consulta principal
-        rows = db.run_sql_with_explain(sql, explain=False)
+        async with self:
+            self.query_timing = " · ".join(
+                f"{name}: {elapsed:.0f} ms" for name, elapsed in timings.items()
+            )
+            if self.query_cancelled:
+                self._finish_query("La consulta fue cancelada.")
+            elif errors or notices:
+                self._finish_query(" ".join(dict.fromkeys(errors + notices)))
+            else:
+                self._finish_query()
+
+    def _set_query_result(self, rows: list[dict]):
         self.query_all_rows = rows
         self.query_page = 0
         if rows:
@@ -229,13 +495,64 @@ class AnalyticsState(rx.State):
         if not rows:
             self.query_message = "La consulta no devolvió resultados."
 
-        # Ejecutar EXPLAIN
-        plan = db.run_sql_with_explain(sql, explain=True)
-        self.plan_rows = plan
-        if plan:
-            self.plan_columns = list(plan[0].keys())
+    def download_query_csv(self):
+        """Descarga el resultado completo que se escribió a CSV (y lo borra del servidor)."""
+        if not self.query_spool_path:
+            return
+        data = db.pop_spool_file(self.query_spool_path)
+        self.query_spool_path = ""
+        if data is None:
+            self.query_message = "El CSV ya no está disponible; vuelve a ejecutar la consulta."
+            return
+        return rx.download(data=data, filename=f"{self.selected_query}.csv")
+
+    def cancel_selected_query(self):
+        """Cancela la consulta avanzada en curso (KILL QUERY en el servidor)."""
+        if not self.query_running:
+            return
+        self.query_cancelled = True
+        self.query_status = "Cancelando..."
+        if self.query_backend == "duckdb":
+            from .. import olap
+
+            olap.cancel_query(self._query_token())
         else:
-            self.plan_columns = []
+            db.cancel_query(self._query_token())
+
+    # ======================================================
+    # Historial de planes y regresiones
+    # ======================================================
+
+    def load_plan_regressions(self):
+        """Compara las dos últimas capturas de cada consulta/vista."""
+        rows = db.get_plan_regressions()
+        self.regression_rows = rows
+        self.regression_columns = [c for c in rows[0].keys() if c != "regresion"] if rows else []
+        regressions = sum(1 for r in rows if r["regresion"])
+        if not rows:
+            self.regression_message = "Aún no hay planes capturados."
+        elif regressions:
+            self.regression_message = f"⚠️ {regressions} consulta(s)/vista(s) con regresión."
+        else:
+            self.regression_message = "Sin regresiones respecto a la captura anterior."
+
+    @rx.event(background=True)
+    async def capture_plans(self):
+        """Captura plan y tiempo de todas las consultas avanzadas y vistas."""
+        async with self:
+            if self.capturing_plans:
+                return
+            self.capturing_plans = True
+            self.regression_message = "Capturando planes..."
+
+        queries = {key: info["sql"] for key, info in ADVANCED_QUERIES.items()}
+        errors = await asyncio.to_thread(db.capture_plan_snapshots, queries)
+
+        async with self:
+            self.capturing_plans = False
+            self.load_plan_regressions()
+            if errors:
+                self.regression_message += " Errores: " + " | ".join(errors)
 
     def next_query_page(self):
         """Página siguiente de resultados de consulta avanzada."""
@@ -291,99 +608,25 @@ def _generic_table(columns_var, rows_var) -> rx.Component:
     )
     
 def _selected_view_description() -> rx.Component:
-    """Descripción amigable de la vista analítica seleccionada."""
+    """Descripción amigable de la vista analítica seleccionada (desde VIEW_OPTIONS)."""
     return rx.vstack(
-        # Título / label
-        rx.cond(
-            AnalyticsState.selected_view == "vw_ventas_por_categoria",
-            rx.text("Ventas por categoría", font_weight="medium", font_size="0.95rem"),
-            rx.cond(
-                AnalyticsState.selected_view == "vw_ticket_promedio_mensual",
-                rx.text("Ticket promedio mensual", font_weight="medium", font_size="0.95rem"),
-                rx.cond(
-                    AnalyticsState.selected_view == "vw_sla_envios",
-                    rx.text("SLA de envíos", font_weight="medium", font_size="0.95rem"),
-                    rx.cond(
-                        AnalyticsState.selected_view == "vw_tasa_devoluciones_mensual",
-                        rx.text("Tasa de devoluciones mensual", font_weight="medium", font_size="0.95rem"),
-                        rx.cond(
-                            AnalyticsState.selected_view == "vw_clientes_ltv_alto",
-                            rx.text("Clientes con LTV alto", font_weight="medium", font_size="0.95rem"),
-                            rx.cond(
-                                AnalyticsState.selected_view == "vw_inventario_producto_bodega",
-                                rx.text("Inventario por producto y bodega", font_weight="medium", font_size="0.95rem"),
-                                rx.cond(
-                                    AnalyticsState.selected_view == "vw_clientes_por_pais",
-                                    rx.text("Clientes por país", font_weight="medium", font_size="0.95rem"),
-                                    rx.text("ABC de productos", font_weight="medium", font_size="0.95rem"),
-                                ),
-                            ),
-                        ),
-                    ),
-                ),
+        rx.text(
+            rx.match(
+                AnalyticsState.selected_view,
+                *[(option["value"], option["label"]) for option in VIEW_OPTIONS],
+                "",
             ),
+            font_weight="medium",
+            font_size="0.95rem",
         ),
-        # Descripción
-        rx.cond(
-            AnalyticsState.selected_view == "vw_ventas_por_categoria",
-            rx.text(
-                "Suma de ventas (Q) agrupadas por categoría de producto.",
-                font_size="0.85rem",
-                color="gray.9",
-            ),
-            rx.cond(
-                AnalyticsState.selected_view == "vw_ticket_promedio_mensual",
-                rx.text(
-                    "Promedio del total de orden por mes.",
-                    font_size="0.85rem",
-                    color="gray.9",
-                ),
-                rx.cond(
-                    AnalyticsState.selected_view == "vw_sla_envios",
-                    rx.text(
-                        "Días entre fecha de envío y fecha de entrega por envío.",
-                        font_size="0.85rem",
-                        color="gray.9",
-                    ),
-                    rx.cond(
-                        AnalyticsState.selected_view == "vw_tasa_devoluciones_mensual",
-                        rx.text(
-                            "Relación entre órdenes y devoluciones por mes.",
-                            font_size="0.85rem",
-                            color="gray.9",
-                        ),
-                        rx.cond(
-                            AnalyticsState.selected_view == "vw_clientes_ltv_alto",
-                            rx.text(
-                                "Clientes cuyo Lifetime Value (LTV) supera el umbral definido.",
-                                font_size="0.85rem",
-                                color="gray.9",
-                            ),
-                            rx.cond(
-                                AnalyticsState.selected_view == "vw_inventario_producto_bodega",
-                                rx.text(
-                                    "Stock actual por producto y bodega calculado desde movimientos de inventario.",
-                                    font_size="0.85rem",
-                                    color="gray.9",
-                                ),
-                                rx.cond(
-                                    AnalyticsState.selected_view == "vw_clientes_por_pais",
-                                    rx.text(
-                                        "Número de clientes agrupados por país.",
-                                        font_size="0.85rem",
-                                        color="gray.9",
-                                    ),
-                                    rx.text(
-                                        "Clasificación ABC de productos según participación en ventas totales.",
-                                        font_size="0.85rem",
-                                        color="gray.9",
-                                    ),
-                                ),
-                            ),
-                        ),
-                    ),
-                ),
+        rx.text(
+            rx.match(
+                AnalyticsState.selected_view,
+                *[(option["value"], option["description"]) for option in VIEW_OPTIONS],
+                "",
             ),
+            font_size="0.85rem",
+            color="gray.9",
         ),
         spacing="1",
         align_items="flex-start",
@@ -411,13 +654,50 @@ def _views_selector() -> rx.Component:
         )
 
     return rx.vstack(
-        rx.text("Vistas analíticas:", font_weight="medium"),
+        rx.hstack(
+            rx.text("Vistas analíticas:", font_weight="medium"),
+            rx.spacer(),
+            rx.text("Motor:", font_size="0.85rem", color="gray.9"),
+            rx.select(
+                list(db.VIEW_BACKENDS),
+                value=AnalyticsState.view_backend,
+                on_change=AnalyticsState.set_view_backend,
+                size="1",
+            ),
+            align_items="center",
+            width="100%",
+        ),
         rx.hstack(
             rx.foreach(VIEW_OPTIONS, render_button),
             spacing="2",
             wrap="wrap",
         ),
-        _selected_view_description(),
+        rx.hstack(
+            _selected_view_description(),
+            rx.spacer(),
+            rx.cond(
+                AnalyticsState.selected_view == "vw_rfm_segmentos",
+                rx.button(
+                    "Recalcular RFM",
+                    size="1",
+                    variant="outline",
+                    loading=AnalyticsState.computing_rfm,
+                    on_click=AnalyticsState.recompute_rfm,
+                ),
+            ),
+            rx.cond(
+                AnalyticsState.selected_view == "vw_pronostico_categoria",
+                rx.button(
+                    "Recalcular pronóstico",
+                    size="1",
+                    variant="outline",
+                    loading=AnalyticsState.computing_forecast,
+                    on_click=AnalyticsState.recompute_forecast,
+                ),
+            ),
+            align_items="center",
+            width="100%",
+        ),
         spacing="2",
         align_items="flex-start",
         width="100%",
@@ -435,6 +715,14 @@ def _views_table_section() -> rx.Component:
                     font_size="0.85rem",
                 ),
             ),
+            rx.cond(
+                AnalyticsState.view_timing != "",
+                rx.text(
+                    AnalyticsState.view_timing,
+                    font_size="0.8rem",
+                    color="gray.9",
+                ),
+            ),
             rx.cond(
                 AnalyticsState.view_rows != [],
                 _generic_table(
@@ -485,6 +773,117 @@ def analytics_views_section() -> rx.Component:
     )
 
 
+# ==========================================================
+# Sección de Cubo de ventas (drill-down)
+# ==========================================================
+
+def analytics_cube_section() -> rx.Component:
+    """Ventas por país/ciudad, categoría y mes leídas del cubo pre-agregado."""
+    return rx.vstack(
+        rx.heading("Cubo de ventas", size="5", color="orange.9"),
+        rx.text(
+            "Ventas pre-agregadas por país, ciudad, categoría y mes (tabla Sales_cube); "
+            "cada nivel se responde desde el cubo, sin recorrer órdenes.",
+            font_size="0.9rem",
+            color="gray.9",
+        ),
+        rx.hstack(
+            rx.text("Nivel:", font_size="0.85rem", color="gray.9"),
+            rx.select(
+                list(db.SALES_CUBE_GEO_LEVELS),
+                value=AnalyticsState.cube_geo,
+                on_change=AnalyticsState.set_cube_geo,
+                size="1",
+            ),
+            rx.checkbox(
+                "Por categoría",
+                checked=AnalyticsState.cube_by_category,
+                on_change=AnalyticsState.set_cube_by_category,
+            ),
+            rx.checkbox(
+                "Por mes",
+                checked=AnalyticsState.cube_by_month,
+                on_change=AnalyticsState.set_cube_by_month,
+            ),
+            rx.button(
+                "Consultar",
+                size="1",
+                color_scheme="orange",
+                on_click=AnalyticsState.load_sales_cube,
+            ),
+            rx.button(
+                "Actualizar cubo",
+                size="1",
+                variant="outline",
+                color_scheme="orange",
+                on_click=AnalyticsState.refresh_sales_cube,
+            ),
+            rx.spacer(),
+            rx.text(AnalyticsState.cube_timing, font_size="0.8rem", color="gray.9"),
+            spacing="3",
+            align_items="center",
+            width="100%",
+            wrap="wrap",
+        ),
+        rx.cond(
+            AnalyticsState.cube_country_id != None,
+            rx.hstack(
+                rx.button(
+                    "← Volver a países",
+                    size="1",
+                    variant="outline",
+                    on_click=AnalyticsState.cube_back_to_countries,
+                ),
+                rx.text(
+                    "Ciudades de " + AnalyticsState.cube_country_name,
+                    font_weight="medium",
+                    font_size="0.9rem",
+                ),
+                align_items="center",
+            ),
+        ),
+        # Drill-down: un botón por país del resultado
+        rx.cond(
+            (AnalyticsState.cube_geo == "pais") & ~AnalyticsState.cube_by_category & ~AnalyticsState.cube_by_month,
+            rx.hstack(
+                rx.text("Ver ciudades de:", font_size="0.85rem", color="gray.9"),
+                rx.foreach(
+                    AnalyticsState.cube_rows,
+                    lambda r: rx.button(
+                        r["pais"],
+                        size="1",
+                        variant="soft",
+                        on_click=AnalyticsState.drill_cube_country(r["country_id"], r["pais"]),
+                    ),
+                ),
+                spacing="2",
+                wrap="wrap",
+                align_items="center",
+            ),
+        ),
+        rx.box(
+            rx.cond(
+                AnalyticsState.cube_rows != [],
+                _generic_table(AnalyticsState.cube_columns, AnalyticsState.cube_rows),
+                rx.text(
+                    "Pulsa Consultar para leer el cubo.",
+                    font_size="0.85rem",
+                    color="gray.9",
+                ),
+            ),
+            width="100%",
+            max_height="28rem",
+            overflow="auto",
+            bg="white",
+            padding="1rem",
+            border_radius="1rem",
+            box_shadow="0 8px 16px rgba(15,23,42,0.08)",
+        ),
+        spacing="3",
+        width="100%",
+    )
+
+
 # ==========================================================
 # Sección de Consultas Avanzadas + EXPLAIN
 # ==========================================================
@@ -559,7 +958,20 @@ def _queries_selector() -> rx.Component:
         )
 
     return rx.vstack(
-        rx.text("Consultas avanzadas:", font_weight="medium"),
+        rx.hstack(
+            rx.text("Consultas avanzadas:", font_weight="medium"),
+            rx.spacer(),
+            rx.text(AnalyticsState.snapshot_label, font_size="0.8rem", color="gray.9"),
+            rx.text("Motor:", font_size="0.85rem", color="gray.9"),
+            rx.select(
+                QUERY_BACKENDS,
+                value=AnalyticsState.query_backend,
+                on_change=AnalyticsState.set_query_backend,
+                size="1",
+            ),
+            align_items="center",
+            width="100%",
+        ),
         rx.hstack(
             rx.foreach(options, render_button),
             spacing="2",
@@ -580,10 +992,42 @@ def _queries_result_section() -> rx.Component:
                 rx.button(
                     "Ejecutar consulta",
                     color_scheme="orange",
+                    loading=AnalyticsState.query_running,
                     on_click=AnalyticsState.run_selected_query,
                 ),
+                rx.cond(
+                    AnalyticsState.query_running,
+                    rx.button(
+                        "Cancelar",
+                        variant="outline",
+                        color_scheme="red",
+                        on_click=AnalyticsState.cancel_selected_query,
+                    ),
+                ),
+                rx.cond(
+                    AnalyticsState.query_spool_path != "",
+                    rx.button(
+                        "Descargar CSV completo",
+                        variant="outline",
+                        color_scheme="orange",
+                        on_click=AnalyticsState.download_query_csv,
+                    ),
+                ),
                 spacing="3",
             ),
+            rx.cond(
+                AnalyticsState.query_running,
+                rx.vstack(
+                    rx.progress(value=AnalyticsState.query_progress, width="100%"),
+                    rx.text(
+                        AnalyticsState.query_status,
+                        font_size="0.8rem",
+                        color="gray.9",
+                    ),
+                    spacing="1",
+                    width="100%",
+                ),
+            ),
             rx.cond(
                 AnalyticsState.query_message != "",
                 rx.text(
@@ -592,6 +1036,14 @@ def _queries_result_section() -> rx.Component:
                     font_size="0.85rem",
                 ),
             ),
+            rx.cond(
+                AnalyticsState.query_timing != "",
+                rx.text(
+                    AnalyticsState.query_timing,
+                    font_size="0.8rem",
+                    color="gray.9",
+                ),
+            ),
             rx.cond(
                 AnalyticsState.query_rows != [],
                 _generic_table(
@@ -631,6 +1083,12 @@ def _explain_section() -> rx.Component:
             rx.hstack(
                 rx.heading("Plan de ejecución (EXPLAIN)", size="4", color="orange.9"),
                 rx.spacer(),
+                rx.select(
+                    list(db.EXPLAIN_MODES.keys()),
+                    value=AnalyticsState.plan_mode,
+                    on_change=AnalyticsState.set_plan_mode,
+                    size="1",
+                ),
                 rx.button(
                     rx.cond(
                         AnalyticsState.show_plan,
@@ -646,9 +1104,21 @@ def _explain_section() -> rx.Component:
             rx.cond(
                 AnalyticsState.show_plan
                 & (AnalyticsState.plan_rows != []),
-                _generic_table(
-                    AnalyticsState.plan_columns,
-                    AnalyticsState.plan_rows,
+                rx.vstack(
+                    _generic_table(
+                        AnalyticsState.plan_columns,
+                        AnalyticsState.plan_rows,
+                    ),
+                    rx.cond(
+                        AnalyticsState.plan_raw != "",
+                        rx.code_block(
+                            AnalyticsState.plan_raw,
+                            language="json",
+                            width="100%",
+                        ),
+                    ),
+                    spacing="2",
+                    width="100%",
                 ),
                 rx.cond(
                     AnalyticsState.show_plan,
@@ -675,6 +1145,60 @@ def _explain_section() -> rx.Component:
     )
 
 
+def _plan_regressions_section() -> rx.Component:
+    """Historial de planes: alertas de full scan y de tiempo por consulta/vista."""
+    return rx.box(
+        rx.vstack(
+            rx.hstack(
+                rx.heading("Regresiones de planes", size="4", color="orange.9"),
+                rx.spacer(),
+                rx.button(
+                    "Capturar planes ahora",
+                    size="1",
+                    color_scheme="orange",
+                    loading=AnalyticsState.capturing_plans,
+                    on_click=AnalyticsState.capture_plans,
+                ),
+                rx.button(
+                    "Actualizar",
+                    size="1",
+                    variant="outline",
+                    on_click=AnalyticsState.load_plan_regressions,
+                ),
+                align_items="center",
+                width="100%",
+            ),
+            rx.text(
+                "Compara la última captura de cada consulta avanzada y vista con la anterior.",
+                font_size="0.85rem",
+                color="gray.9",
+            ),
+            rx.cond(
+                AnalyticsState.regression_message != "",
+                rx.text(
+                    AnalyticsState.regression_message,
+                    color="orange.10",
+                    font_size="0.85rem",
+                ),
+            ),
+            rx.cond(
+                AnalyticsState.regression_rows != [],
+                _generic_table(
+                    AnalyticsState.regression_columns,
+                    AnalyticsState.regression_rows,
+                ),
+            ),
+            spacing="2",
+        ),
+        width="100%",
+        overflow_x="auto",
+        bg="white",
+        padding="1rem",
+        border_radius="1rem",
+        box_shadow="0 8px 16px rgba(15,23,42,0.08)",
+    )
+
+
 def analytics_queries_section() -> rx.Component:
     """Sección completa de consultas avanzadas + EXPLAIN."""
     return rx.vstack(
@@ -687,6 +1211,7 @@ def analytics_queries_section() -> rx.Component:
         _queries_selector(),
         _queries_result_section(),
         _explain_section(),
+        _plan_regressions_section(),
         spacing="3",
         width="100%",
     )
@@ -706,6 +1231,8 @@ def analytics_page() -> rx.Component:
         rx.divider(margin_y="0.5rem"),
         analytics_views_section(),
         rx.divider(margin_y="1.5rem"),
+        analytics_cube_section(),
+        rx.divider(margin_y="1.5rem"),
         analytics_queries_section(),
         spacing="4",
         width="100%",
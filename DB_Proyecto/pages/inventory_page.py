@@ -1,5 +1,7 @@
+import asyncio
+
 import reflex as rx
-from .. import db
+from .. import db, fifo, inventory_import, replenishment
 
 
 class InventoryState(rx.State):
@@ -28,8 +30,32 @@ class InventoryState(rx.State):
     mov_empleado_id: str = ""
     mov_cantidad: str = ""
     mov_tipo: str = "IN"  # IN / OUT
+    mov_costo: str = ""  # costo unitario opcional (solo IN)
     mov_message: str = ""
 
+    # --- Transferencia entre bodegas (SP sp_transferir_inventario) ---
+    tr_origen_id: str = ""
+    tr_destino_id: str = ""
+    tr_empleado_id: str = ""
+    tr_items: str = ""  # una línea por producto: "id_producto, cantidad"
+    tr_message: str = ""
+
+    # --- Importación masiva desde CSV (inventory_import.py) ---
+    import_message: str = ""
+    import_errors: list[dict] = []
+    importing: bool = False
+
+    # --- Stock bajo (tabla Replenishment_params) ---
+    low_stock_rows: list[dict] = []
+    low_stock_message: str = ""
+    computing_reorder: bool = False
+
+    # --- Valorización FIFO (tabla Inventory_valuation) ---
+    valuation_group: str = "bodega"
+    valuation_rows: list[dict] = []
+    valuation_message: str = ""
+    computing_valuation: bool = False
+
     # ==========================================================
     # Inventario (vista vw_inventario_producto_bodega)
     # ==========================================================
@@ -154,22 +180,181 @@ class InventoryState(rx.State):
             self.mov_message = "El tipo de movimiento debe ser IN o OUT."
             return
 
+        costo = None
+        if self.mov_costo.strip():
+            if self.mov_tipo != "IN":
+                self.mov_message = "El costo unitario solo aplica a entradas (IN)."
+                return
+            try:
+                costo = round(float(self.mov_costo), 2)
+            except ValueError:
+                self.mov_message = "El costo unitario debe ser numérico."
+                return
+            if costo < 0:
+                self.mov_message = "El costo unitario no puede ser negativo."
+                return
+
         ok = db.register_inventory_movement(
             product_id=product_id,
             warehouse_id=warehouse_id,
             empleado_id=empleado_id,
             cantidad=cantidad,
             tipo_movimiento=self.mov_tipo,
+            costo_unitario=costo,
         )
 
         if ok:
             self.mov_message = "Movimiento registrado correctamente."
             self.mov_cantidad = ""
+            self.mov_costo = ""
             # refrescamos inventario por si cambió stock
             self.load_inventory()
         else:
             self.mov_message = "Error al registrar movimiento de inventario."
 
+    # ==========================================================
+    # Transferencia entre bodegas (SP sp_transferir_inventario)
+    # ==========================================================
+
+    def transferir(self):
+        """Transfiere un lote de productos de una bodega a otra."""
+        self.tr_message = ""
+
+        try:
+            origen_id = int(self.tr_origen_id)
+            destino_id = int(self.tr_destino_id)
+            empleado_id = int(self.tr_empleado_id)
+        except ValueError:
+            self.tr_message = "Bodega de origen, destino y empleado deben ser IDs numéricos."
+            return
+
+        items = []
+        for number, line in enumerate(self.tr_items.splitlines(), start=1):
+            parts = line.replace(",", " ").split()
+            if not parts:
+                continue
+            if len(parts) != 2 or not all(p.isdigit() for p in parts):
+                self.tr_message = f"Línea {number}: usa el formato 'id_producto, cantidad'."
+                return
+            items.append((int(parts[0]), int(parts[1])))
+
+        if not items:
+            self.tr_message = "Agrega al menos un producto a transferir."
+            return
+
+        transfer, error = db.transfer_inventory(origen_id, destino_id, empleado_id, items)
+        if error:
+            self.tr_message = error
+            return
+
+        self.tr_message = (
+            f"Transferencia #{transfer['transfer_id']} registrada: "
+            f"{transfer['productos']} productos, {transfer['unidades']} unidades."
+        )
+        self.tr_items = ""
+        self.load_inventory()
+
+
+    # ==========================================================
+    # Importación masiva de movimientos (CSV)
+    # ==========================================================
+
+    async def handle_import_upload(self, files: list[rx.UploadFile]):
+        """Valida e inserta los movimientos del CSV subido."""
+        if not files:
+            self.import_message = "Selecciona un archivo CSV."
+            return
+
+        self.importing = True
+        self.import_errors = []
+        self.import_message = "Importando movimientos..."
+        yield
+
+        data = await files[0].read()
+        try:
+            text = data.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            self.importing = False
+            self.import_message = "El archivo debe estar en UTF-8."
+            return
+
+        try:
+            inserted, errors, message = await asyncio.to_thread(
+                inventory_import.import_movements, text
+            )
+        finally:
+            self.importing = False
+        self.import_errors = errors
+        self.import_message = message
+        if inserted:
+            self.load_inventory()
+
+    # ==========================================================
+    # Stock bajo (punto de reorden precalculado)
+    # ==========================================================
+
+    def load_low_stock(self):
+        """Reporte de stock bajo desde Replenishment_params."""
+        warehouse_id = None
+        if self.filter_warehouse_id.strip().isdigit():
+            warehouse_id = int(self.filter_warehouse_id)
+        self.low_stock_rows = db.get_low_stock_report(warehouse_id)
+        self.low_stock_message = (
+            "" if self.low_stock_rows else "Ningún producto está bajo su punto de reorden."
+        )
+
+    @rx.event(background=True)
+    async def recompute_reorder_points(self):
+        """Recalcula puntos de reorden y stock de seguridad en segundo plano."""
+        async with self:
+            if self.computing_reorder:
+                return
+            self.computing_reorder = True
+            self.low_stock_message = "Calculando puntos de reorden..."
+
+        ok, message = await asyncio.to_thread(replenishment.refresh_replenishment)
+
+        async with self:
+            self.computing_reorder = False
+            self.load_low_stock()
+            if not ok:
+                self.low_stock_message = message
+            else:
+                self.message = message
+
+
+    # ==========================================================
+    # Valorización FIFO
+    # ==========================================================
+
+    def load_valuation(self):
+        """Último snapshot de valorización FIFO por bodega o categoría."""
+        self.valuation_rows = db.get_inventory_valuation(self.valuation_group)
+        if self.valuation_rows:
+            self.valuation_message = f"Corte: {self.valuation_rows[0]['fecha_corte']}"
+        else:
+            self.valuation_message = "Aún no hay valorización: usa Valorizar."
+
+    def set_valuation_group(self, value: str):
+        self.valuation_group = value
+        self.load_valuation()
+
+    @rx.event(background=True)
+    async def run_fifo_valuation(self):
+        """Avanza las capas FIFO desde el último punto de control (segundo plano)."""
+        async with self:
+            if self.computing_valuation:
+                return
+            self.computing_valuation = True
+            self.valuation_message = "Valorizando inventario (FIFO)..."
+
+        ok, message = await asyncio.to_thread(fifo.run_valuation)
+
+        async with self:
+            self.computing_valuation = False
+            self.load_valuation()
+            self.valuation_message = message
+
 
 # ==========================================================
 # Componentes de UI
@@ -304,6 +489,165 @@ def stock_panel() -> rx.Component:
     )
 
 
+def low_stock_panel() -> rx.Component:
+    """Reporte de pares producto/bodega en o bajo su punto de reorden."""
+    headers = [
+        "Producto",
+        "Bodega",
+        "Stock",
+        "Punto de reorden",
+        "Stock de seguridad",
+        "Consumo diario",
+        "Días de cobertura",
+    ]
+
+    def render_row(r: dict):
+        return rx.table.row(
+            rx.table.cell(r["NombreProducto"]),
+            rx.table.cell(r["warehouse_nombre"]),
+            rx.table.cell(r["stock_actual"]),
+            rx.table.cell(r["punto_reorden"]),
+            rx.table.cell(r["stock_seguridad"]),
+            rx.table.cell(r["consumo_diario"]),
+            rx.table.cell(r["dias_cobertura"]),
+        )
+
+    return rx.box(
+        rx.vstack(
+            rx.hstack(
+                rx.heading("Stock bajo", size="4", color="orange.9"),
+                rx.spacer(),
+                rx.button(
+                    "Ver reporte",
+                    size="1",
+                    color_scheme="orange",
+                    on_click=InventoryState.load_low_stock,
+                ),
+                rx.button(
+                    "Recalcular puntos de reorden",
+                    size="1",
+                    variant="outline",
+                    loading=InventoryState.computing_reorder,
+                    on_click=InventoryState.recompute_reorder_points,
+                ),
+                align_items="center",
+                width="100%",
+            ),
+            rx.text(
+                f"Punto de reorden = consumo diario × {replenishment.LEAD_TIME_DAYS} días de reposición "
+                "+ stock de seguridad (nivel de servicio ~95 %). Usa el filtro de bodega de arriba.",
+                font_size="0.85rem",
+                color="gray.9",
+            ),
+            rx.cond(
+                InventoryState.low_stock_message != "",
+                rx.text(
+                    InventoryState.low_stock_message,
+                    color="orange.10",
+                    font_size="0.9rem",
+                ),
+            ),
+            rx.cond(
+                InventoryState.low_stock_rows != [],
+                rx.table.root(
+                    rx.table.header(
+                        rx.table.row(
+                            *[rx.table.column_header_cell(h) for h in headers],
+                        )
+                    ),
+                    rx.table.body(
+                        rx.foreach(InventoryState.low_stock_rows, render_row),
+                    ),
+                ),
+            ),
+            spacing="3",
+            width="100%",
+        ),
+        width="100%",
+        overflow_x="auto",
+        bg="white",
+        padding="1.25rem",
+        border_radius="1.25rem",
+        box_shadow="0 8px 16px rgba(15,23,42,0.08)",
+    )
+
+
+def valuation_panel() -> rx.Component:
+    """Valorización FIFO del inventario por bodega o categoría."""
+
+    def render_row(r: dict):
+        return rx.table.row(
+            rx.table.cell(
+                rx.cond(InventoryState.valuation_group == "bodega", r["bodega"], r["categoria"])
+            ),
+            rx.table.cell(r["unidades"]),
+            rx.table.cell(f"Q {r['valor']}"),
+        )
+
+    return rx.box(
+        rx.vstack(
+            rx.hstack(
+                rx.heading("Valorización FIFO", size="4", color="orange.9"),
+                rx.spacer(),
+                rx.select(
+                    items=["bodega", "categoria"],
+                    value=InventoryState.valuation_group,
+                    on_change=InventoryState.set_valuation_group,
+                    size="1",
+                ),
+                rx.button(
+                    "Ver",
+                    size="1",
+                    color_scheme="orange",
+                    on_click=InventoryState.load_valuation,
+                ),
+                rx.button(
+                    "Valorizar",
+                    size="1",
+                    variant="outline",
+                    loading=InventoryState.computing_valuation,
+                    on_click=InventoryState.run_fifo_valuation,
+                ),
+                align_items="center",
+                width="100%",
+            ),
+            rx.cond(
+                InventoryState.valuation_message != "",
+                rx.text(
+                    InventoryState.valuation_message,
+                    color="gray.9",
+                    font_size="0.85rem",
+                ),
+            ),
+            rx.cond(
+                InventoryState.valuation_rows != [],
+                rx.table.root(
+                    rx.table.header(
+                        rx.table.row(
+                            rx.table.column_header_cell(
+                                rx.cond(InventoryState.valuation_group == "bodega", "Bodega", "Categoría")
+                            ),
+                            rx.table.column_header_cell("Unidades"),
+                            rx.table.column_header_cell("Valor (costo FIFO)"),
+                        )
+                    ),
+                    rx.table.body(
+                        rx.foreach(InventoryState.valuation_rows, render_row),
+                    ),
+                ),
+            ),
+            spacing="3",
+            width="100%",
+        ),
+        width="100%",
+        overflow_x="auto",
+        bg="white",
+        padding="1.25rem",
+        border_radius="1.25rem",
+        box_shadow="0 8px 16px rgba(15,23,42,0.08)",
+    )
+
+
 def movement_panel() -> rx.Component:
     """Panel para registrar movimientos de inventario."""
     return rx.box(
@@ -349,6 +693,12 @@ def movement_panel() -> rx.Component:
                     on_change=InventoryState.set_mov_tipo,
                     width="8rem",
                 ),
+                rx.input(
+                    placeholder="Costo unitario (opcional)",
+                    value=InventoryState.mov_costo,
+                    on_change=InventoryState.set_mov_costo,
+                    width="12rem",
+                ),
                 spacing="3",
                 wrap="wrap",
             ),
@@ -375,6 +725,144 @@ def movement_panel() -> rx.Component:
     )
 
 
+def transfer_panel() -> rx.Component:
+    """Panel para transferir un lote de productos entre bodegas."""
+    return rx.box(
+        rx.vstack(
+            rx.heading("Transferencia entre bodegas", size="4", color="orange.9"),
+            rx.text(
+                "Registra en una sola operación las salidas del origen y las entradas del destino.",
+                font_size="0.85rem",
+                color="gray.9",
+            ),
+            rx.hstack(
+                rx.input(
+                    placeholder="Bodega origen",
+                    value=InventoryState.tr_origen_id,
+                    on_change=InventoryState.set_tr_origen_id,
+                    width="10rem",
+                ),
+                rx.input(
+                    placeholder="Bodega destino",
+                    value=InventoryState.tr_destino_id,
+                    on_change=InventoryState.set_tr_destino_id,
+                    width="10rem",
+                ),
+                rx.input(
+                    placeholder="ID empleado",
+                    value=InventoryState.tr_empleado_id,
+                    on_change=InventoryState.set_tr_empleado_id,
+                    width="10rem",
+                ),
+                spacing="3",
+                wrap="wrap",
+            ),
+            rx.text_area(
+                placeholder="Un producto por línea: id_producto, cantidad",
+                value=InventoryState.tr_items,
+                on_change=InventoryState.set_tr_items,
+                rows="5",
+                width="100%",
+            ),
+            rx.button(
+                "Transferir",
+                color_scheme="orange",
+                on_click=InventoryState.transferir,
+            ),
+            rx.cond(
+                InventoryState.tr_message != "",
+                rx.text(
+                    InventoryState.tr_message,
+                    color="orange.10",
+                    font_size="0.9rem",
+                ),
+            ),
+            spacing="3",
+        ),
+        bg="#fff8f0",
+        padding="1.25rem",
+        border_radius="1.25rem",
+        border="1px solid #fed7aa",
+        width="100%",
+    )
+
+
+def import_panel() -> rx.Component:
+    """Carga masiva de movimientos desde un archivo CSV."""
+
+    def render_error(e: dict):
+        return rx.table.row(
+            rx.table.cell(e["linea"]),
+            rx.table.cell(e["error"]),
+        )
+
+    return rx.box(
+        rx.vstack(
+            rx.heading("Importar movimientos (CSV)", size="4", color="orange.9"),
+            rx.text(
+                "Columnas: producto, bodega, empleado, cantidad, tipo (IN/OUT) y, opcionales, fecha y costo.",
+                font_size="0.85rem",
+                color="gray.9",
+            ),
+            rx.upload(
+                rx.vstack(
+                    rx.text("Arrastra el CSV aquí o haz clic para elegirlo.", font_size="0.85rem"),
+                    rx.foreach(rx.selected_files("movimientos_csv"), rx.text),
+                    align_items="center",
+                ),
+                id="movimientos_csv",
+                accept={"text/csv": [".csv"]},
+                max_files=1,
+                border="1px dashed #fdba74",
+                border_radius="0.75rem",
+                padding="1rem",
+                width="100%",
+            ),
+            rx.button(
+                "Importar",
+                color_scheme="orange",
+                loading=InventoryState.importing,
+                on_click=InventoryState.handle_import_upload(
+                    rx.upload_files(upload_id="movimientos_csv")
+                ),
+            ),
+            rx.cond(
+                InventoryState.import_message != "",
+                rx.text(
+                    InventoryState.import_message,
+                    color="orange.10",
+                    font_size="0.9rem",
+                ),
+            ),
+            rx.cond(
+                InventoryState.import_errors != [],
+                rx.box(
+                    rx.table.root(
+                        rx.table.header(
+                            rx.table.row(
+                                rx.table.column_header_cell("Línea"),
+                                rx.table.column_header_cell("Error"),
+                            )
+                        ),
+                        rx.table.body(
+                            rx.foreach(InventoryState.import_errors, render_error),
+                        ),
+                    ),
+                    max_height="16rem",
+                    overflow_y="auto",
+                    width="100%",
+                ),
+            ),
+            spacing="3",
+        ),
+        bg="#fff8f0",
+        padding="1.25rem",
+        border_radius="1.25rem",
+        border="1px solid #fed7aa",
+        width="100%",
+    )
+
+
 # ==========================================================
 # Página principal
 # ==========================================================
@@ -399,9 +887,14 @@ def inventory_page() -> rx.Component:
         inventory_table(),
         inventory_pagination(),
         rx.divider(margin_y="1rem"),
+        low_stock_panel(),
+        valuation_panel(),
+        rx.divider(margin_y="1rem"),
         rx.hstack(
             stock_panel(),
             movement_panel(),
+            transfer_panel(),
+            import_panel(),
             spacing="4",
             align_items="flex-start",
             wrap="wrap",
@@ -1,5 +1,5 @@
 import reflex as rx
-from .. import db
+from .. import allocation, db
 
 class OrdersState(rx.State):
     """Estado para manejar el listado y detalle de órdenes."""
@@ -106,6 +106,46 @@ class OrdersState(rx.State):
         self.order_items = []
         self.order_devoluciones = []
 
+    # ==========================================================
+    # Sugerir bodega (allocation.py)
+    # ==========================================================
+
+    def suggest_warehouse(self):
+        """Propone la bodega más cercana al cliente con stock del producto."""
+        try:
+            customer_id = int(self.form_customer_id)
+            product_id = int(self.form_product_id)
+            quantity = int(self.form_quantity)
+        except ValueError:
+            self.message = "Cliente, producto y cantidad deben ser numéricos para sugerir bodega."
+            return
+        if quantity <= 0:
+            self.message = "La cantidad debe ser mayor que 0 para sugerir bodega."
+            return
+
+        lines = allocation.allocate_for_customer(customer_id, [(product_id, quantity)])
+        if not lines:
+            self.message = "No se encontró el cliente."
+            return
+
+        line = lines[0]
+        assignments = line["asignaciones"]
+        if not assignments:
+            self.message = "Ninguna bodega tiene stock de ese producto."
+            return
+
+        self.form_warehouse_id = str(assignments[0]["bodega"])
+        if len(assignments) == 1 and line["faltante"] == 0:
+            self.message = (
+                f"Bodega sugerida: #{assignments[0]['bodega']} "
+                f"(prioridad {assignments[0]['prioridad']} para la ciudad del cliente)."
+            )
+        else:
+            detail = ", ".join(f"{a['cantidad']} u. de bodega #{a['bodega']}" for a in assignments)
+            self.message = f"Ninguna bodega cubre todo: {detail}"
+            if line["faltante"]:
+                self.message += f"; faltan {line['faltante']} u."
+
     # ==========================================================
     # Crear orden simple (SP sp_crear_orden_simple)
     # ==========================================================
@@ -425,6 +465,12 @@ def create_order_form() -> rx.Component:
                     on_change=OrdersState.set_form_warehouse_id,
                     width="12rem",
                 ),
+                rx.button(
+                    "Sugerir bodega",
+                    variant="soft",
+                    color_scheme="orange",
+                    on_click=OrdersState.suggest_warehouse,
+                ),
                 spacing="3",
                 wrap="wrap",
             ),
@@ -1,5 +1,7 @@
+import asyncio
+
 import reflex as rx
-from .. import db
+from .. import basket, db
 
 
 class ProductsState(rx.State):
@@ -25,6 +27,11 @@ class ProductsState(rx.State):
     # --- Mensajes ---
     form_message: str = ""
 
+    # --- Comprados juntos (Product_pairs) ---
+    related_products: list[dict] = []
+    related_message: str = ""
+    computing_pairs: bool = False
+
     # ==========================================================
     # Acciones principales
     # ==========================================================
@@ -93,6 +100,7 @@ class ProductsState(rx.State):
             self.category_id_str = str(p["Categories_ID"])
             self.supplier_id_str = str(p["Suppliers_ID"])
             self.form_message = f"Editando producto #{self.selected_id}"
+            self.load_related_products()
 
     def clear_form(self):
         """Limpia el formulario."""
@@ -102,6 +110,8 @@ class ProductsState(rx.State):
         self.category_id_str = ""
         self.supplier_id_str = ""
         self.form_message = ""
+        self.related_products = []
+        self.related_message = ""
 
     def save_product(self):
         """Crea o actualiza un producto."""
@@ -152,6 +162,37 @@ class ProductsState(rx.State):
         self.clear_form()
         self.load_products()
 
+    # ==========================================================
+    # Comprados juntos (market basket)
+    # ==========================================================
+
+    def load_related_products(self):
+        """Carga los productos comprados junto al producto seleccionado."""
+        if not self.selected_id:
+            return
+        self.related_products = db.get_related_products(self.selected_id)
+        self.related_message = (
+            "" if self.related_products else "Sin datos de compras conjuntas para este producto."
+        )
+
+    @rx.event(background=True)
+    async def recompute_pairs(self):
+        """Recalcula Product_pairs sobre todo Order_items (tarea en segundo plano)."""
+        async with self:
+            if self.computing_pairs:
+                return
+            self.computing_pairs = True
+            self.related_message = "Calculando productos relacionados..."
+
+        ok, message = await asyncio.to_thread(basket.refresh_product_pairs)
+
+        async with self:
+            self.computing_pairs = False
+            self.load_related_products()
+            self.related_message = message if not ok or not self.related_products else ""
+            if ok:
+                self.message = message
+
     def delete_product(self, product_id: int):
         ok, msg = db.delete_product(product_id)
         if not ok and msg:
@@ -298,6 +339,65 @@ def product_form() -> rx.Component:
     )
 
 
+def related_products_panel() -> rx.Component:
+    """Productos comprados frecuentemente junto al producto en edición."""
+    return rx.box(
+        rx.vstack(
+            rx.hstack(
+                rx.heading("Comprados juntos", size="4", color="orange.9"),
+                rx.spacer(),
+                rx.button(
+                    "Recalcular",
+                    size="1",
+                    variant="outline",
+                    loading=ProductsState.computing_pairs,
+                    on_click=ProductsState.recompute_pairs,
+                ),
+                align_items="center",
+                width="100%",
+            ),
+            rx.cond(
+                ProductsState.selected_id == None,
+                rx.text(
+                    "Selecciona un producto (✏️) para ver con qué se compra.",
+                    font_size="0.85rem",
+                    color="gray.9",
+                ),
+            ),
+            rx.cond(
+                ProductsState.related_message != "",
+                rx.text(
+                    ProductsState.related_message,
+                    font_size="0.85rem",
+                    color="orange.10",
+                ),
+            ),
+            rx.foreach(
+                ProductsState.related_products,
+                lambda r: rx.hstack(
+                    rx.badge(r["Rank"], color_scheme="orange"),
+                    rx.text(r["NombreProducto"], font_size="0.9rem"),
+                    rx.spacer(),
+                    rx.text(
+                        f"{r['OrdenesJuntos']} órdenes · {r['ConfianzaPct']}% · lift {r['Lift']}",
+                        font_size="0.8rem",
+                        color="gray.9",
+                    ),
+                    width="100%",
+                    align_items="center",
+                ),
+            ),
+            spacing="2",
+            width="100%",
+        ),
+        bg="white",
+        border_radius="1rem",
+        padding="1.5rem",
+        width="26rem",
+        box_shadow="0 8px 16px rgba(15,23,42,0.08)",
+    )
+
+
 def filters_bar() -> rx.Component:
     """Barra de filtros arriba de la tabla de productos."""
     return rx.hstack(
@@ -365,7 +465,13 @@ def products_page() -> rx.Component:
         products_table(),
         pagination_controls(),
         rx.divider(margin_y="1rem"),
-        product_form(),
+        rx.hstack(
+            product_form(),
+            related_products_panel(),
+            spacing="4",
+            align_items="flex-start",
+            wrap="wrap",
+        ),
         spacing="4",
         width="100%",
         on_mount=ProductsState.load_products,
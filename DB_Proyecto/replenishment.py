@@ -0,0 +1,169 @@
+"""
+Punto de reorden y stock de seguridad por (producto, bodega).
+
+- Lee inventory_movements una sola vez a columnas NumPy.
+- Stock actual = suma de IN - OUT de toda la historia (bincount por par).
+- Consumo diario = salidas (OUT) por día en los últimos HISTORY_DAYS días;
+  media y varianza por par con bincount sobre los totales diarios (los días
+  sin salidas cuentan como 0).
+- Stock de seguridad = Z · σ_diaria · √LEAD_TIME_DAYS
+  Punto de reorden   = consumo_medio · LEAD_TIME_DAYS + stock de seguridad
+- El resultado reemplaza la tabla Replenishment_params, que lee el reporte
+  de stock bajo de la página de inventario.
+
+Uso programado:  python -m DB_Proyecto.replenishment
+"""
+
+import time
+
+import numpy as np
+from mysql.connector import Error
+
+from . import db
+from .columnar import _fetch_columns
+
+HISTORY_DAYS = 90
+LEAD_TIME_DAYS = 7
+SERVICE_Z = 1.65  # nivel de servicio ~95 %
+
+INSERT_CHUNK = 5_000
+
+
+def compute_params(
+    products: np.ndarray,
+    warehouses: np.ndarray,
+    signed_quantities: np.ndarray,
+    days: np.ndarray,
+    today: np.datetime64,
+    history_days: int = HISTORY_DAYS,
+    lead_time: int = LEAD_TIME_DAYS,
+    z: float = SERVICE_Z,
+) -> dict[str, np.ndarray]:
+    """
+    Parámetros de reposición por par (producto, bodega). signed_quantities
+    es positiva para IN y negativa para OUT; days en datetime64[D].
+    """
+    pairs, pair_index = np.unique(np.stack([products, warehouses]), axis=1, return_inverse=True)
+    pair_index = pair_index.ravel()
+    n_pairs = pairs.shape[1]
+
+    stock = np.bincount(pair_index, weights=signed_quantities, minlength=n_pairs)
+
+    # Salidas diarias dentro de la ventana
+    offset = (days - (today - history_days)).astype(np.int64)
+    in_window = (signed_quantities < 0) & (offset >= 0) & (offset < history_days)
+    daily_key = pair_index[in_window] * history_days + offset[in_window]
+    keys, daily_out = np.unique(daily_key, return_inverse=True)
+    daily_totals = np.bincount(daily_out, weights=-signed_quantities[in_window])
+    key_pair = keys // history_days
+
+    total_out = np.bincount(key_pair, weights=daily_totals, minlength=n_pairs)
+    total_sq = np.bincount(key_pair, weights=daily_totals**2, minlength=n_pairs)
+    mean = total_out / history_days
+    std = np.sqrt(np.maximum(total_sq / history_days - mean**2, 0))
+
+    safety = z * std * np.sqrt(lead_time)
+    reorder = mean * lead_time + safety
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage = np.where(mean > 0, np.maximum(stock, 0) / mean, np.inf)
+
+    return {
+        "product_id": pairs[0],
+        "warehouse_id": pairs[1],
+        "stock": stock,
+        "consumo": mean,
+        "desviacion": std,
+        "seguridad": safety,
+        "reorden": reorder,
+        "cobertura": coverage,
+    }
+
+
+def _load_movements() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.datetime64]:
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        cursor.execute("SELECT CURDATE()")
+        today = np.datetime64(cursor.fetchone()[0], "D")
+        columns = _fetch_columns(
+            cursor,
+            """
+            SELECT
+              Products_ID,
+              Warehouses_ID,
+              IF(`Tipo de movimiento` = 'IN', Cantidad, -Cantidad),
+              `Fecha del movimiento`
+            FROM inventory_movements
+            """,
+            (),
+            [np.int64, np.int64, np.float64, "datetime64[s]"],
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    products, warehouses, quantities, moments = columns
+    return products, warehouses, quantities, moments.astype("datetime64[D]"), today
+
+
+def refresh_replenishment(
+    history_days: int = HISTORY_DAYS,
+    lead_time: int = LEAD_TIME_DAYS,
+) -> tuple[bool, str]:
+    """Recalcula Replenishment_params completa en una transacción."""
+    start = time.perf_counter()
+    conn = None
+    cursor = None
+    try:
+        products, warehouses, quantities, days, today = _load_movements()
+        if len(products) == 0:
+            return False, "No hay movimientos de inventario."
+        params = compute_params(products, warehouses, quantities, days, today, history_days, lead_time)
+
+        coverage = params["cobertura"]
+        rows = list(
+            zip(
+                params["product_id"].tolist(),
+                params["warehouse_id"].tolist(),
+                params["stock"].astype(np.int64).tolist(),
+                np.round(params["consumo"], 4).tolist(),
+                np.round(params["desviacion"], 4).tolist(),
+                np.ceil(params["seguridad"]).astype(np.int64).tolist(),
+                np.ceil(params["reorden"]).astype(np.int64).tolist(),
+                # Sin consumo la cobertura es "infinita": se guarda NULL
+                [None if np.isinf(c) else round(float(c), 1) for c in coverage],
+            )
+        )
+
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Replenishment_params")
+        for i in range(0, len(rows), INSERT_CHUNK):
+            cursor.executemany(
+                """
+                INSERT INTO Replenishment_params
+                  (Products_ID, Warehouses_ID, `Stock actual`, `Consumo diario`,
+                   `Desviacion diaria`, `Stock de seguridad`, `Punto de reorden`, `Dias de cobertura`)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                rows[i : i + INSERT_CHUNK],
+            )
+        conn.commit()
+    except Error as e:
+        if conn:
+            conn.rollback()
+        return False, f"Error al calcular puntos de reorden: {e}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    elapsed = time.perf_counter() - start
+    return True, f"Puntos de reorden de {len(rows)} pares producto/bodega ({elapsed:.1f} s)."
+
+
+if __name__ == "__main__":
+    ok, message = refresh_replenishment()
+    print(("✅ " if ok else "❌ ") + message)
@@ -0,0 +1,191 @@
+"""
+Segmentación RFM (recencia, frecuencia, monto) de clientes.
+
+- Una sola pasada sobre Ordenes (Customers_ID, fecha, total), leída por
+  bloques a columnas NumPy.
+- Frecuencia y monto por cliente con bincount; última compra con
+  maximum.at.
+- Cada métrica se puntúa 1..5 por quintiles (rango percentil; los empates
+  reciben el mismo puntaje) y R/F definen el segmento.
+- Cada corrida se guarda en Rfm_runs + Customer_rfm; la vista
+  vw_rfm_segmentos resume la última corrida.
+
+Uso programado:  python -m DB_Proyecto.rfm
+"""
+
+import time
+
+import numpy as np
+from mysql.connector import Error
+
+from . import db
+from .columnar import _fetch_columns
+
+# Número de grupos (quintiles) por métrica
+RFM_BINS = 5
+
+# Corridas que se conservan en Rfm_runs (las más antiguas se borran)
+RFM_KEEP_RUNS = 12
+
+INSERT_CHUNK = 5_000
+
+# (condición sobre puntajes R y F, segmento); gana la primera que se cumple
+_SEGMENT_RULES = [
+    (lambda r, f: (r >= 4) & (f >= 4), "Campeones"),
+    (lambda r, f: (r >= 3) & (f >= 3), "Leales"),
+    (lambda r, f: (r >= 4) & (f <= 2), "Nuevos"),
+    (lambda r, f: (r <= 2) & (f >= 4), "No perder"),
+    (lambda r, f: (r <= 1) & (f <= 2), "Perdidos"),
+    (lambda r, f: r <= 2, "En riesgo"),
+]
+_DEFAULT_SEGMENT = "Necesitan atención"
+
+
+def quantile_scores(values: np.ndarray, bins: int = RFM_BINS) -> np.ndarray:
+    """
+    Puntaje 1..bins según el rango percentil de cada valor (mayor valor,
+    mayor puntaje). Valores iguales comparten puntaje.
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int8)
+    below = np.searchsorted(np.sort(values), values, side="left")
+    return (1 + (below * bins) // len(values)).astype(np.int8)
+
+
+def segment_labels(r: np.ndarray, f: np.ndarray) -> np.ndarray:
+    """Segmento de cada cliente a partir de sus puntajes R y F."""
+    return np.select(
+        [rule(r, f) for rule, _ in _SEGMENT_RULES],
+        [label for _, label in _SEGMENT_RULES],
+        default=_DEFAULT_SEGMENT,
+    )
+
+
+def compute_rfm(
+    customers: np.ndarray,
+    order_dates: np.ndarray,
+    totals: np.ndarray,
+    cutoff: np.datetime64,
+) -> dict[str, np.ndarray]:
+    """
+    Métricas y puntajes RFM por cliente (solo clientes con órdenes).
+    Devuelve columnas alineadas: customer_id, recencia, frecuencia,
+    monto, r, f, m, segmento.
+    """
+    customer_ids, index = np.unique(customers, return_inverse=True)
+    frequency = np.bincount(index, minlength=len(customer_ids))
+    monetary = np.bincount(index, weights=totals, minlength=len(customer_ids))
+
+    # Fechas como días desde 1970 para poder usar maximum.at
+    days = order_dates.astype("datetime64[D]").astype(np.int64)
+    last_order = np.full(len(customer_ids), days.min(initial=0), dtype=np.int64)
+    np.maximum.at(last_order, index, days)
+    recency = cutoff.astype("datetime64[D]").astype(np.int64) - last_order
+
+    # Menos días desde la última compra = mejor puntaje
+    r = (RFM_BINS + 1 - quantile_scores(recency)).astype(np.int8)
+    f = quantile_scores(frequency)
+    m = quantile_scores(monetary)
+    return {
+        "customer_id": customer_ids,
+        "recencia": recency,
+        "frecuencia": frequency,
+        "monto": monetary,
+        "r": r,
+        "f": f,
+        "m": m,
+        "segmento": segment_labels(r, f),
+    }
+
+
+def _load_orders() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.datetime64]:
+    """Columnas de Ordenes y la fecha de corte, desde un mismo snapshot."""
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        cursor.execute("SELECT CURDATE()")
+        cutoff = np.datetime64(cursor.fetchone()[0], "D")
+        customers, order_dates, totals = _fetch_columns(
+            cursor,
+            "SELECT Customers_ID, `Fecha de la orden`, `Total` FROM Ordenes",
+            (),
+            [np.int64, "datetime64[s]", np.float64],
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return customers, order_dates, totals, cutoff
+
+
+def refresh_rfm(keep_runs: int = RFM_KEEP_RUNS) -> tuple[bool, str]:
+    """
+    Calcula una nueva corrida RFM y la guarda (Rfm_runs + Customer_rfm) en
+    una sola transacción. Conserva solo las últimas keep_runs corridas.
+    """
+    start = time.perf_counter()
+    conn = None
+    cursor = None
+    try:
+        customers, order_dates, totals, cutoff = _load_orders()
+        rfm = compute_rfm(customers, order_dates, totals, cutoff)
+        rows = list(
+            zip(
+                rfm["customer_id"].tolist(),
+                rfm["recencia"].tolist(),
+                rfm["frecuencia"].tolist(),
+                np.round(rfm["monto"], 2).tolist(),
+                rfm["r"].tolist(),
+                rfm["f"].tolist(),
+                rfm["m"].tolist(),
+                rfm["segmento"].tolist(),
+            )
+        )
+
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO Rfm_runs (`Fecha de corte`, Clientes) VALUES (%s, %s)",
+            (str(cutoff), len(rows)),
+        )
+        run_id = cursor.lastrowid
+        for i in range(0, len(rows), INSERT_CHUNK):
+            cursor.executemany(
+                """
+                INSERT INTO Customer_rfm
+                  (Rfm_runs_ID, Customers_ID, `Recencia dias`, Frecuencia, Monto, R, F, M, Segmento)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                [(run_id, *row) for row in rows[i : i + INSERT_CHUNK]],
+            )
+        # Las filas de Customer_rfm se borran en cascada
+        cursor.execute(
+            """
+            DELETE FROM Rfm_runs
+            WHERE ID <= (
+              SELECT ID FROM (
+                SELECT ID FROM Rfm_runs ORDER BY ID DESC LIMIT 1 OFFSET %s
+              ) AS viejas
+            )
+            """,
+            (keep_runs,),
+        )
+        conn.commit()
+    except Error as e:
+        if conn:
+            conn.rollback()
+        return False, f"Error al calcular la segmentación RFM: {e}"
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    elapsed = time.perf_counter() - start
+    return True, f"Corrida RFM #{run_id}: {len(rows)} clientes ({elapsed:.1f} s)."
+
+
+if __name__ == "__main__":
+    ok, message = refresh_rfm()
+    print(("✅ " if ok else "❌ ") + message)
@@ -0,0 +1,234 @@
+"""
+Exportación de snapshots de LootBox a Parquet.
+
+- Cada tabla se lee por bloques (cursor sin buffer) y se escribe a
+  Parquet comprimido (zstd) solo con las columnas útiles para analítica
+  (sin datos de contacto ni contraseñas).
+- Ordenes, Order_items, inventory_movements y Audit_log se particionan
+  por mes (carpetas mes=YYYY-MM).
+- Cada snapshot es una versión SNAPSHOT_DIR/<AAAAMMDD-HHMMSS-ffffff>/. Se
+  escribe en una carpeta temporal, se renombra y al final se cambia el
+  puntero SNAPSHOT_DIR/CURRENT (un os.replace atómico), así quien lo
+  consulta nunca ve uno a medias.
+- Las versiones anteriores no se borran al exportar: olap.py las borra
+  (prune_versions) cuando ya ninguna conexión las usa.
+
+El motor embebido que consulta estos archivos está en olap.py.
+"""
+
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from mysql.connector import FieldType
+
+from . import db
+
+SNAPSHOT_DIR = "snapshots"
+CURRENT_FILE = os.path.join(SNAPSHOT_DIR, "CURRENT")  # nombre de la versión actual
+MANIFEST_FILE = "manifest.json"
+
+_VERSION_NAME = re.compile(r"^\d{8}-\d{6}-\d{6}$")
+
+# Filas por bloque leído de MySQL (y por archivo Parquet escrito)
+CHUNK_SIZE = 100_000
+
+# tabla -> (columnas a exportar, expresión de la partición mensual o None)
+SNAPSHOT_TABLES = {
+    "Countries": (["ID", "Nombre"], None),
+    "Cities": (["ID", "Nombre", "Countries_ID"], None),
+    "Customers": (["ID", "Nombre", "Apellido", "Fecha de creación", "Cities_ID"], None),
+    "Customer_stats": (
+        ["Customers_ID", "Ultima orden", "Numero de ordenes", "Total compras"], None
+    ),
+    "Categories": (["ID", "Nombre"], None),
+    "Products": (["ID", "Nombre del producto", "Precio", "Categories_ID", "Suppliers_ID"], None),
+    "Warehouses": (["ID", "Nombre", "Cities_ID"], None),
+    "Payments": (["ID", "Fecha de pago", "Método de  pago", "Cantidad", "Customers_ID"], None),
+    "Shipments": (["ID", "Fecha de envio", "Fecha de entrega", "Status", "Warehouses_ID"], None),
+    "Shipment_sla_hist": (["Warehouses_ID", "Mes", "Dias", "Envios"], None),
+    "Devoluciones": (
+        ["ID", "Fecha de devolución", "Cantidad de reembolso", "Ordenes_ID", "Customers_ID"], None
+    ),
+    "Loyalty_movements": (["ID", "Fecha", "Puntos_cambio", "Customers_ID", "Ordenes_ID"], None),
+    "Ordenes": (
+        ["ID", "Fecha de la orden", "Status", "Total", "Payments_ID",
+         "Customers_ID", "Employees_ID", "Shipments_ID"],
+        "`Fecha de la orden`",
+    ),
+    "Order_items": (
+        ["Products_ID", "Ordenes_ID", "Cantidad", "Precio por unidad", "Devoluciones_ID"],
+        # Order_items no tiene fecha: se particiona por el mes de su orden
+        "o.`Fecha de la orden`",
+    ),
+    "inventory_movements": (
+        ["Products_ID", "Warehouses_ID", "Cantidad", "Tipo de movimiento",
+         "Fecha del movimiento", "Employees_ID"],
+        "`Fecha del movimiento`",
+    ),
+    "Audit_log": (
+        ["ID", "Fecha_evento", "Tabla_afectada", "Operación", "Registro_ID", "Users_ID"],
+        "Fecha_evento",
+    ),
+}
+
+# Joins necesarios para calcular la partición
+_PARTITION_JOINS = {
+    "Order_items": "JOIN Ordenes o ON o.ID = t.Ordenes_ID",
+}
+
+_INT_TYPES = {"TINY", "SHORT", "INT24", "LONG", "LONGLONG", "YEAR"}
+_TIME_TYPES = {"DATETIME", "TIMESTAMP", "DATE", "NEWDATE"}
+
+
+def _arrow_type(type_code: int) -> pa.DataType:
+    """Tipo Arrow fijo por columna (evita esquemas distintos entre bloques)."""
+    name = FieldType.get_info(type_code)
+    if name in _INT_TYPES:
+        return pa.int64()
+    if name in ("NEWDECIMAL", "DECIMAL"):
+        return pa.decimal128(18, 2)
+    if name in ("FLOAT", "DOUBLE"):
+        return pa.float64()
+    if name in _TIME_TYPES:
+        return pa.timestamp("s")
+    return pa.string()
+
+
+def _export_table(cursor, table: str, columns: list[str], partition: str | None, target: str) -> int:
+    """Escribe una tabla a target/<tabla>/ por bloques. Devuelve filas exportadas."""
+    select = ", ".join(f"t.`{c}`" for c in columns)
+    if partition:
+        select += f", DATE_FORMAT({partition}, '%Y-%m') AS mes"
+    join = _PARTITION_JOINS.get(table, "") if partition else ""
+    cursor.execute(f"SELECT {select} FROM `{table}` t {join}")
+
+    schema = pa.schema(
+        [(d[0], _arrow_type(d[1])) for d in cursor.description[: len(columns)]]
+        + ([("mes", pa.string())] if partition else [])
+    )
+    table_dir = os.path.join(target, table)
+    os.makedirs(table_dir, exist_ok=True)
+
+    total = 0
+    chunk_number = 0
+    while True:
+        rows = cursor.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        arrays = [
+            pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), schema)
+        ]
+        pq.write_to_dataset(
+            pa.Table.from_arrays(arrays, schema=schema),
+            table_dir,
+            partition_cols=["mes"] if partition else None,
+            compression="zstd",
+            basename_template=f"part-{chunk_number:05d}-{{i}}.parquet",
+        )
+        total += len(rows)
+        chunk_number += 1
+
+    if total == 0:
+        # Tabla vacía: un archivo con el esquema para que el motor pueda leerla
+        pq.write_table(schema.empty_table(), os.path.join(table_dir, "empty.parquet"))
+    return total
+
+
+def export_snapshot() -> dict[str, int]:
+    """
+    Exporta todas las tablas de SNAPSHOT_TABLES a una versión nueva y la
+    deja como actual. Devuelve {tabla: filas_exportadas}.
+    """
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    target = os.path.join(SNAPSHOT_DIR, f".tmp-{version}")
+    os.makedirs(target)
+
+    counts = {}
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        # Todas las tablas desde el mismo snapshot consistente
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        for table, (columns, partition) in SNAPSHOT_TABLES.items():
+            counts[table] = _export_table(cursor, table, columns, partition, target)
+        conn.commit()
+    except Exception:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    with open(os.path.join(target, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": version,
+                "creado": datetime.now().isoformat(timespec="seconds"),
+                "tablas": counts,
+                "particionadas": [t for t, (_, p) in SNAPSHOT_TABLES.items() if p],
+            },
+            f,
+            indent=2,
+        )
+
+    # La versión queda completa con su nombre final y solo entonces se
+    # cambia el puntero
+    os.replace(target, version_dir(version))
+    pointer_tmp = f"{CURRENT_FILE}.tmp-{version}"
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, CURRENT_FILE)
+    return counts
+
+
+def version_dir(version: str) -> str:
+    """Carpeta de una versión del snapshot."""
+    return os.path.join(SNAPSHOT_DIR, version)
+
+
+def current_version() -> str | None:
+    """Nombre de la versión actual, o None si todavía no hay snapshot."""
+    try:
+        with open(CURRENT_FILE, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest() -> dict | None:
+    """Manifest del snapshot actual, o None si todavía no hay snapshot."""
+    # Si el puntero cambia y la versión leída se borra entre las dos
+    # lecturas, se vuelve a leer el puntero
+    for _ in range(2):
+        version = current_version()
+        if version is None:
+            return None
+        try:
+            with open(os.path.join(version_dir(version), MANIFEST_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def prune_versions(in_use: set[str]) -> list[str]:
+    """
+    Borra las versiones anteriores a la actual que no estén en in_use.
+    Las más nuevas que la actual (una exportación a punto de cambiar el
+    puntero) no se tocan. Devuelve las versiones borradas.
+    """
+    current = current_version()
+    if current is None or not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    removed = []
+    for name in sorted(os.listdir(SNAPSHOT_DIR)):
+        if _VERSION_NAME.match(name) and name < current and name not in in_use:
+            shutil.rmtree(version_dir(name), ignore_errors=True)
+            removed.append(name)
+    return removed
@@ -0,0 +1,50 @@
+"""
+Watermark de IDs para los refrescos incrementales (columnar, heavy_hitters, hll).
+
+Un MAX(ID) leído en un snapshot consistente puede ser mayor que el ID de
+una orden cuya transacción todavía no confirma (AUTO_INCREMENT se asigna
+al insertar, no al confirmar). Si el watermark saltara a MAX(ID), esa
+orden no se leería nunca.
+
+Por eso cada refresco vuelve a leer los últimos REREAD_IDS IDs por debajo
+del watermark y descarta los que ya aplicó (`applied`). Una orden que
+confirma más de REREAD_IDS IDs después de su inserción sí se pierde; los
+refrescos que necesiten exactitud total tienen reset()/rebuild.
+"""
+
+from collections.abc import Iterable
+
+# IDs por debajo del watermark que se vuelven a leer en cada refresco
+REREAD_IDS = 1_000
+
+
+class IdWatermark:
+    """Mayor ID leído (`high`) + IDs ya aplicados dentro de la ventana de relectura."""
+
+    def __init__(self, high: int = 0, applied: Iterable[int] = ()):
+        self.high = high
+        self.applied = {int(i) for i in applied if int(i) > self.low}
+
+    @property
+    def low(self) -> int:
+        """Límite inferior (exclusivo) de la próxima lectura."""
+        return max(self.high - REREAD_IDS, 0)
+
+    def is_new(self, source_id: int) -> bool:
+        """True si source_id todavía no se aplicó."""
+        return source_id > self.high or source_id not in self.applied
+
+    def advance(self, high: int, ids: Iterable[int]):
+        """Marca ids como aplicados, sube el watermark a high y poda la ventana."""
+        self.applied.update(int(i) for i in ids)
+        self.high = max(self.high, high)
+        low = self.low
+        self.applied = {i for i in self.applied if i > low}
+
+    def to_json(self) -> dict:
+        """Estado serializable (ver from_json)."""
+        return {"high": self.high, "applied": sorted(self.applied)}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "IdWatermark":
+        return cls(data["high"], data["applied"])
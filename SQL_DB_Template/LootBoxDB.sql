@@ -340,6 +340,7 @@ CREATE TABLE IF NOT EXISTS `inventory_movements` (
   `Tipo de movimiento` ENUM('IN', 'OUT') NOT NULL,
   `Fecha del movimiento` DATETIME NOT NULL,
   `Employees_ID` INT NOT NULL,
+  `Costo unitario` DECIMAL(10,2) NULL,  -- costo de compra de los IN (valorización FIFO)
   PRIMARY KEY (`Products_ID`, `Warehouses_ID`, `Fecha del movimiento`),
   INDEX `fk_Products_has_Warehouses_Warehouses1_idx` (`Warehouses_ID` ASC),
   INDEX `fk_Products_has_Warehouses_Products1_idx` (`Products_ID` ASC),
@@ -432,6 +433,69 @@ CREATE TABLE IF NOT EXISTS `Audit_log` (
     ON UPDATE NO ACTION
 ) ENGINE = InnoDB;
 
+-- -----------------------------------------------------
+-- Table Customer_stats (agregados por cliente, mantenidos por triggers)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `Customer_stats` ;
+
+CREATE TABLE IF NOT EXISTS `Customer_stats` (
+  `Customers_ID` INT NOT NULL,
+  `Ultima orden` DATETIME NOT NULL,
+  `Numero de ordenes` INT NOT NULL,
+  `Total compras` DECIMAL(12,2) NOT NULL,
+  PRIMARY KEY (`Customers_ID`),
+  INDEX `idx_Customer_stats_ultima_orden` (`Ultima orden` ASC),
+  INDEX `idx_Customer_stats_total_compras` (`Total compras` ASC),
+  CONSTRAINT `fk_Customer_stats_Customers`
+    FOREIGN KEY (`Customers_ID`)
+    REFERENCES `Customers` (`ID`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
+
+-- -----------------------------------------------------
+-- Table Shipment_sla_hist (histograma de días de entrega por bodega y mes,
+-- mantenido por triggers; sketch exacto y combinable para percentiles)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `Shipment_sla_hist` ;
+
+CREATE TABLE IF NOT EXISTS `Shipment_sla_hist` (
+  `Warehouses_ID` INT NOT NULL,
+  `Mes` DATE NOT NULL,
+  `Dias` SMALLINT NOT NULL,
+  `Envios` INT NOT NULL,
+  PRIMARY KEY (`Warehouses_ID`, `Mes`, `Dias`),
+  CONSTRAINT `fk_Shipment_sla_hist_Warehouses`
+    FOREIGN KEY (`Warehouses_ID`)
+    REFERENCES `Warehouses` (`ID`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
+
+-- -----------------------------------------------------
+-- Table Inventory_balances (stock actual por producto y bodega, mantenido
+-- por triggers sobre inventory_movements)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `Inventory_balances` ;
+
+CREATE TABLE IF NOT EXISTS `Inventory_balances` (
+  `Products_ID` INT NOT NULL,
+  `Warehouses_ID` INT NOT NULL,
+  `Stock` INT NOT NULL,
+  PRIMARY KEY (`Products_ID`, `Warehouses_ID`),
+  INDEX `idx_Inventory_balances_bodega` (`Warehouses_ID` ASC),
+  CONSTRAINT `fk_Inventory_balances_Products`
+    FOREIGN KEY (`Products_ID`)
+    REFERENCES `Products` (`ID`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_Inventory_balances_Warehouses`
+    FOREIGN KEY (`Warehouses_ID`)
+    REFERENCES `Warehouses` (`ID`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
+
 SET SQL_MODE=@OLD_SQL_MODE;
 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
@@ -535,6 +599,201 @@ BEGIN
   VALUES (NOW(), 'Ordenes', 'DELETE', OLD.ID, NULL);
 END $$
 
+
+-- ======================
+-- AGREGADOS POR CLIENTE (Customer_stats)
+-- ======================
+-- Con @customer_stats_diferidos = 1 los triggers no tocan Customer_stats:
+-- la carga inicial (bootstrap_lootbox.py) la llena completa al final
+-- (sección 6 de LootBoxIndexViews.sql).
+
+-- Recalcula los agregados de un cliente (usa idx_Ordenes_customer_fecha)
+DROP PROCEDURE IF EXISTS sp_refrescar_customer_stats $$
+CREATE PROCEDURE sp_refrescar_customer_stats (
+  IN p_customer_id INT
+)
+BEGIN
+  DELETE FROM Customer_stats WHERE Customers_ID = p_customer_id;
+
+  INSERT INTO Customer_stats (Customers_ID, `Ultima orden`, `Numero de ordenes`, `Total compras`)
+  SELECT Customers_ID, MAX(`Fecha de la orden`), COUNT(*), SUM(`Total`)
+  FROM Ordenes
+  WHERE Customers_ID = p_customer_id
+  GROUP BY Customers_ID;
+END $$
+
+-- Insert: se suma de forma incremental, sin recalcular
+DROP TRIGGER IF EXISTS trg_ordenes_insert_stats $$
+CREATE TRIGGER trg_ordenes_insert_stats
+AFTER INSERT ON Ordenes
+FOR EACH ROW
+BEGIN
+  IF @customer_stats_diferidos IS NULL THEN
+    INSERT INTO Customer_stats (Customers_ID, `Ultima orden`, `Numero de ordenes`, `Total compras`)
+    VALUES (NEW.Customers_ID, NEW.`Fecha de la orden`, 1, NEW.`Total`) AS nuevo
+    ON DUPLICATE KEY UPDATE
+      `Ultima orden` = GREATEST(Customer_stats.`Ultima orden`, nuevo.`Ultima orden`),
+      `Numero de ordenes` = Customer_stats.`Numero de ordenes` + 1,
+      `Total compras` = Customer_stats.`Total compras` + nuevo.`Total compras`;
+  END IF;
+END $$
+
+-- Update: solo si cambió el cliente, la fecha o el total
+DROP TRIGGER IF EXISTS trg_ordenes_update_stats $$
+CREATE TRIGGER trg_ordenes_update_stats
+AFTER UPDATE ON Ordenes
+FOR EACH ROW
+BEGIN
+  IF @customer_stats_diferidos IS NULL
+     AND (OLD.Customers_ID <> NEW.Customers_ID
+          OR OLD.`Fecha de la orden` <> NEW.`Fecha de la orden`
+          OR OLD.`Total` <> NEW.`Total`) THEN
+    CALL sp_refrescar_customer_stats(OLD.Customers_ID);
+    IF OLD.Customers_ID <> NEW.Customers_ID THEN
+      CALL sp_refrescar_customer_stats(NEW.Customers_ID);
+    END IF;
+  END IF;
+END $$
+
+-- Delete: la última orden puede cambiar, se recalcula el cliente
+DROP TRIGGER IF EXISTS trg_ordenes_delete_stats $$
+CREATE TRIGGER trg_ordenes_delete_stats
+AFTER DELETE ON Ordenes
+FOR EACH ROW
+BEGIN
+  IF @customer_stats_diferidos IS NULL THEN
+    CALL sp_refrescar_customer_stats(OLD.Customers_ID);
+  END IF;
+END $$
+
+
+-- ======================
+-- HISTOGRAMA SLA DE ENVÍOS (Shipment_sla_hist)
+-- ======================
+-- Con @sla_envios_diferidos = 1 los triggers no tocan el histograma: la
+-- carga inicial lo recalcula completo al final (sección 9 de
+-- LootBoxIndexViews.sql).
+
+-- Suma (p_delta = 1) o resta (p_delta = -1) un envío entregado de su cubeta
+DROP PROCEDURE IF EXISTS sp_sla_hist_ajustar $$
+CREATE PROCEDURE sp_sla_hist_ajustar (
+  IN p_warehouse_id INT,
+  IN p_fecha_envio DATETIME,
+  IN p_fecha_entrega DATETIME,
+  IN p_delta INT
+)
+BEGIN
+  INSERT INTO Shipment_sla_hist (Warehouses_ID, Mes, Dias, Envios)
+  VALUES (
+    p_warehouse_id,
+    DATE_FORMAT(p_fecha_entrega, '%Y-%m-01'),
+    DATEDIFF(p_fecha_entrega, p_fecha_envio),
+    p_delta
+  ) AS nuevo
+  ON DUPLICATE KEY UPDATE
+    Envios = Shipment_sla_hist.Envios + nuevo.Envios;
+END $$
+
+DROP TRIGGER IF EXISTS trg_shipments_insert_sla $$
+CREATE TRIGGER trg_shipments_insert_sla
+AFTER INSERT ON Shipments
+FOR EACH ROW
+BEGIN
+  IF @sla_envios_diferidos IS NULL AND NEW.Status = 'ENTREGADO' THEN
+    CALL sp_sla_hist_ajustar(NEW.Warehouses_ID, NEW.`Fecha de envio`, NEW.`Fecha de entrega`, 1);
+  END IF;
+END $$
+
+-- Update: se saca la versión anterior y se agrega la nueva (si están entregadas)
+DROP TRIGGER IF EXISTS trg_shipments_update_sla $$
+CREATE TRIGGER trg_shipments_update_sla
+AFTER UPDATE ON Shipments
+FOR EACH ROW
+BEGIN
+  IF @sla_envios_diferidos IS NULL THEN
+    IF OLD.Status = 'ENTREGADO' THEN
+      CALL sp_sla_hist_ajustar(OLD.Warehouses_ID, OLD.`Fecha de envio`, OLD.`Fecha de entrega`, -1);
+    END IF;
+    IF NEW.Status = 'ENTREGADO' THEN
+      CALL sp_sla_hist_ajustar(NEW.Warehouses_ID, NEW.`Fecha de envio`, NEW.`Fecha de entrega`, 1);
+    END IF;
+  END IF;
+END $$
+
+DROP TRIGGER IF EXISTS trg_shipments_delete_sla $$
+CREATE TRIGGER trg_shipments_delete_sla
+AFTER DELETE ON Shipments
+FOR EACH ROW
+BEGIN
+  IF @sla_envios_diferidos IS NULL AND OLD.Status = 'ENTREGADO' THEN
+    CALL sp_sla_hist_ajustar(OLD.Warehouses_ID, OLD.`Fecha de envio`, OLD.`Fecha de entrega`, -1);
+  END IF;
+END $$
+
+
+-- ======================
+-- SALDOS DE INVENTARIO (Inventory_balances)
+-- ======================
+-- Con @inventario_saldos_diferidos = 1 los triggers no tocan los saldos:
+-- las operaciones por lote (sp_transferir_inventario, cargas masivas) los
+-- actualizan una sola vez al final.
+
+DROP PROCEDURE IF EXISTS sp_saldo_inventario_ajustar $$
+CREATE PROCEDURE sp_saldo_inventario_ajustar (
+  IN p_product_id INT,
+  IN p_warehouse_id INT,
+  IN p_delta INT
+)
+BEGIN
+  INSERT INTO Inventory_balances (Products_ID, Warehouses_ID, Stock)
+  VALUES (p_product_id, p_warehouse_id, p_delta) AS nuevo
+  ON DUPLICATE KEY UPDATE
+    Stock = Inventory_balances.Stock + nuevo.Stock;
+END $$
+
+DROP TRIGGER IF EXISTS trg_inventory_movements_insert_saldo $$
+CREATE TRIGGER trg_inventory_movements_insert_saldo
+AFTER INSERT ON inventory_movements
+FOR EACH ROW
+BEGIN
+  IF @inventario_saldos_diferidos IS NULL THEN
+    CALL sp_saldo_inventario_ajustar(
+      NEW.Products_ID, NEW.Warehouses_ID,
+      IF(NEW.`Tipo de movimiento` = 'IN', NEW.Cantidad, -NEW.Cantidad)
+    );
+  END IF;
+END $$
+
+DROP TRIGGER IF EXISTS trg_inventory_movements_update_saldo $$
+CREATE TRIGGER trg_inventory_movements_update_saldo
+AFTER UPDATE ON inventory_movements
+FOR EACH ROW
+BEGIN
+  IF @inventario_saldos_diferidos IS NULL THEN
+    CALL sp_saldo_inventario_ajustar(
+      OLD.Products_ID, OLD.Warehouses_ID,
+      IF(OLD.`Tipo de movimiento` = 'IN', -OLD.Cantidad, OLD.Cantidad)
+    );
+    CALL sp_saldo_inventario_ajustar(
+      NEW.Products_ID, NEW.Warehouses_ID,
+      IF(NEW.`Tipo de movimiento` = 'IN', NEW.Cantidad, -NEW.Cantidad)
+    );
+  END IF;
+END $$
+
+DROP TRIGGER IF EXISTS trg_inventory_movements_delete_saldo $$
+CREATE TRIGGER trg_inventory_movements_delete_saldo
+AFTER DELETE ON inventory_movements
+FOR EACH ROW
+BEGIN
+  IF @inventario_saldos_diferidos IS NULL THEN
+    CALL sp_saldo_inventario_ajustar(
+      OLD.Products_ID, OLD.Warehouses_ID,
+      IF(OLD.`Tipo de movimiento` = 'IN', -OLD.Cantidad, OLD.Cantidad)
+    );
+  END IF;
+END $$
+
 DELIMITER ;
 
 USE LootBox;
@@ -105,16 +105,16 @@ FROM (
 ) t;
 
 -- 5) Clientes con LTV alto (Lifetime Value)
+--    Lee Customer_stats (mantenida por triggers): range scan por `Total compras`
 CREATE OR REPLACE VIEW vw_clientes_ltv_alto AS
 SELECT
   c.ID AS customer_id,
   c.Nombre,
   c.Apellido,
-  SUM(o.`Total`) AS ltv
-FROM Customers c
-JOIN Ordenes o ON o.Customers_ID = c.ID
-GROUP BY c.ID, c.Nombre, c.Apellido
-HAVING ltv >= 1000;  -- umbral ajustable
+  s.`Total compras` AS ltv
+FROM Customer_stats s
+JOIN Customers c ON c.ID = s.Customers_ID
+WHERE s.`Total compras` >= 1000;  -- umbral ajustable
 
 -- 6) Inventario actual por producto y bodega
 CREATE OR REPLACE VIEW vw_inventario_producto_bodega AS
@@ -226,12 +226,16 @@ END$$
 
 
 -- 3) Registrar un movimiento de inventario
+--    p_costo_unitario: costo de compra de un IN para la valorización FIFO
+--    (NULL = se usa Products.Precio)
+DROP PROCEDURE IF EXISTS sp_registrar_movimiento_inventario $$
 CREATE PROCEDURE sp_registrar_movimiento_inventario (
   IN p_product_id INT,
   IN p_warehouse_id INT,
   IN p_empleado_id INT,
   IN p_cantidad INT,
-  IN p_tipo ENUM('IN','OUT')
+  IN p_tipo ENUM('IN','OUT'),
+  IN p_costo_unitario DECIMAL(10,2)
 )
 BEGIN
   INSERT INTO inventory_movements (
@@ -240,7 +244,8 @@ BEGIN
     `Cantidad`,
     `Tipo de movimiento`,
     `Fecha del movimiento`,
-    `Employees_ID`
+    `Employees_ID`,
+    `Costo unitario`
   )
   VALUES (
     p_product_id,
@@ -248,7 +253,8 @@ BEGIN
     p_cantidad,
     p_tipo,
     NOW(),
-    p_empleado_id
+    p_empleado_id,
+    p_costo_unitario
   );
 END$$
 
@@ -306,3 +312,915 @@ BEGIN
 END$$
 
 DELIMITER ;
+
+
+-- =========================
+-- 5) MONITOREO DE PLANES DE EJECUCIÓN
+-- =========================
+
+-- Historial de planes (EXPLAIN FORMAT=JSON) y tiempos de las consultas
+-- avanzadas y vistas analíticas, para detectar regresiones.
+CREATE TABLE IF NOT EXISTS `Plan_snapshots` (
+  `ID` INT NOT NULL AUTO_INCREMENT,
+  `Objetivo` VARCHAR(100) NOT NULL,
+  `Tipo` ENUM('query', 'view') NOT NULL,
+  `Fecha de captura` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `Plan` JSON NOT NULL,
+  `Accesos` JSON NOT NULL,
+  `Tiempo ms` DECIMAL(12,3) NOT NULL,
+  `Filas` INT NOT NULL,
+  PRIMARY KEY (`ID`),
+  INDEX `idx_Plan_snapshots_objetivo_fecha` (`Objetivo`, `Fecha de captura`)
+) ENGINE = InnoDB;
+
+
+-- =========================
+-- 6) AGREGADOS POR CLIENTE
+-- =========================
+
+-- Backfill de Customer_stats: bases creadas antes de los triggers *_stats
+-- y carga inicial, que los difiere (idempotente: se puede volver a ejecutar).
+REPLACE INTO Customer_stats (Customers_ID, `Ultima orden`, `Numero de ordenes`, `Total compras`)
+SELECT Customers_ID, MAX(`Fecha de la orden`), COUNT(*), SUM(`Total`)
+FROM Ordenes
+GROUP BY Customers_ID;
+
+
+-- =========================
+-- 7) PRODUCTOS COMPRADOS JUNTOS (market basket)
+-- =========================
+
+-- Top-K productos relacionados por producto, calculado por
+-- DB_Proyecto/basket.py (python -m DB_Proyecto.basket).
+CREATE TABLE IF NOT EXISTS `Product_pairs` (
+  `Products_ID` INT NOT NULL,
+  `Relacionado_ID` INT NOT NULL,
+  `Ordenes juntos` INT NOT NULL,
+  `Soporte` DOUBLE NOT NULL,
+  `Confianza` DOUBLE NOT NULL,
+  `Lift` DOUBLE NOT NULL,
+  `Rank` TINYINT NOT NULL,
+  `Fecha de cálculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Products_ID`, `Relacionado_ID`),
+  INDEX `idx_Product_pairs_producto_rank` (`Products_ID`, `Rank`),
+  CONSTRAINT `fk_Product_pairs_Products`
+    FOREIGN KEY (`Products_ID`)
+    REFERENCES `Products` (`ID`)
+    ON DELETE CASCADE,
+  CONSTRAINT `fk_Product_pairs_Relacionado`
+    FOREIGN KEY (`Relacionado_ID`)
+    REFERENCES `Products` (`ID`)
+    ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+
+-- =========================
+-- 8) SEGMENTACIÓN RFM
+-- =========================
+
+-- Corridas de DB_Proyecto/rfm.py (python -m DB_Proyecto.rfm); se conservan
+-- las últimas RFM_KEEP_RUNS.
+CREATE TABLE IF NOT EXISTS `Rfm_runs` (
+  `ID` INT NOT NULL AUTO_INCREMENT,
+  `Fecha de cálculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `Fecha de corte` DATE NOT NULL,
+  `Clientes` INT NOT NULL,
+  PRIMARY KEY (`ID`)
+) ENGINE = InnoDB;
+
+-- Puntajes 1..5 por quintil y segmento de cada cliente en cada corrida
+CREATE TABLE IF NOT EXISTS `Customer_rfm` (
+  `Rfm_runs_ID` INT NOT NULL,
+  `Customers_ID` INT NOT NULL,
+  `Recencia dias` INT NOT NULL,
+  `Frecuencia` INT NOT NULL,
+  `Monto` DECIMAL(14,2) NOT NULL,
+  `R` TINYINT NOT NULL,
+  `F` TINYINT NOT NULL,
+  `M` TINYINT NOT NULL,
+  `Segmento` VARCHAR(30) NOT NULL,
+  PRIMARY KEY (`Rfm_runs_ID`, `Customers_ID`),
+  INDEX `idx_Customer_rfm_run_segmento` (`Rfm_runs_ID`, `Segmento`),
+  CONSTRAINT `fk_Customer_rfm_Rfm_runs`
+    FOREIGN KEY (`Rfm_runs_ID`)
+    REFERENCES `Rfm_runs` (`ID`)
+    ON DELETE CASCADE,
+  CONSTRAINT `fk_Customer_rfm_Customers`
+    FOREIGN KEY (`Customers_ID`)
+    REFERENCES `Customers` (`ID`)
+    ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+-- Resumen por segmento de la última corrida
+CREATE OR REPLACE VIEW vw_rfm_segmentos AS
+SELECT
+  r.Segmento AS segmento,
+  COUNT(*) AS clientes,
+  ROUND(AVG(r.`Recencia dias`), 1) AS recencia_promedio,
+  ROUND(AVG(r.Frecuencia), 2) AS frecuencia_promedio,
+  ROUND(AVG(r.Monto), 2) AS monto_promedio,
+  SUM(r.Monto) AS monto_total
+FROM Customer_rfm r
+WHERE r.Rfm_runs_ID = (SELECT MAX(ID) FROM Rfm_runs)
+GROUP BY r.Segmento
+ORDER BY monto_total DESC;
+
+
+-- =========================
+-- 9) PERCENTILES DE SLA DE ENVÍOS
+-- =========================
+
+-- Backfill de Shipment_sla_hist: bases existentes y carga inicial, que
+-- difiere los triggers *_sla (idempotente: se puede volver a ejecutar)
+DELETE FROM Shipment_sla_hist;
+INSERT INTO Shipment_sla_hist (Warehouses_ID, Mes, Dias, Envios)
+SELECT
+  Warehouses_ID,
+  DATE_FORMAT(`Fecha de entrega`, '%Y-%m-01'),
+  DATEDIFF(`Fecha de entrega`, `Fecha de envio`),
+  COUNT(*)
+FROM Shipments
+WHERE Status = 'ENTREGADO'
+GROUP BY 1, 2, 3;
+
+-- p50/p95/p99 de días de entrega por bodega y mes, más una fila por bodega
+-- con todos los meses (mes NULL). Se calcula sobre el histograma, no sobre
+-- los envíos: percentil de rango más cercano (primer día cuyo acumulado
+-- alcanza el porcentaje).
+CREATE OR REPLACE VIEW vw_sla_percentiles AS
+WITH cubetas AS (
+  SELECT Warehouses_ID, Mes, Dias, Envios
+  FROM Shipment_sla_hist
+  WHERE Envios > 0
+  UNION ALL
+  SELECT Warehouses_ID, NULL, Dias, SUM(Envios)
+  FROM Shipment_sla_hist
+  WHERE Envios > 0
+  GROUP BY Warehouses_ID, Dias
+),
+acumulado AS (
+  SELECT
+    Warehouses_ID,
+    Mes,
+    Dias,
+    Envios,
+    SUM(Envios) OVER (PARTITION BY Warehouses_ID, Mes ORDER BY Dias) AS envios_acumulados,
+    SUM(Envios) OVER (PARTITION BY Warehouses_ID, Mes) AS envios_total
+  FROM cubetas
+)
+SELECT
+  w.Nombre AS bodega,
+  a.Mes AS mes,
+  MAX(a.envios_total) AS envios_entregados,
+  ROUND(SUM(a.Dias * a.Envios) / MAX(a.envios_total), 2) AS promedio_dias,
+  MIN(CASE WHEN a.envios_acumulados >= 0.50 * a.envios_total THEN a.Dias END) AS p50_dias,
+  MIN(CASE WHEN a.envios_acumulados >= 0.95 * a.envios_total THEN a.Dias END) AS p95_dias,
+  MIN(CASE WHEN a.envios_acumulados >= 0.99 * a.envios_total THEN a.Dias END) AS p99_dias,
+  MAX(a.Dias) AS max_dias
+FROM acumulado a
+JOIN Warehouses w ON w.ID = a.Warehouses_ID
+GROUP BY w.ID, w.Nombre, a.Mes
+ORDER BY w.Nombre, a.Mes IS NULL, a.Mes DESC;
+
+
+-- =========================
+-- 10) TOP DE PRODUCTOS EN STREAMING
+-- =========================
+
+-- Estado persistido de DB_Proyecto/heavy_hitters.py (count-min sketch +
+-- candidatos del top) por ventana: 'dia' o 'semana'. Aplicados = IDs de
+-- orden ya contados dentro de la ventana de relectura (watermark.py).
+CREATE TABLE IF NOT EXISTS `Top_products_sketch` (
+  `Ventana` VARCHAR(10) NOT NULL,
+  `Inicio` DATE NOT NULL,
+  `Watermark` INT NOT NULL,
+  `Aplicados` JSON NULL,
+  `Sketch` MEDIUMBLOB NOT NULL,
+  `Candidatos` JSON NOT NULL,
+  `Actualizado` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Ventana`)
+) ENGINE = InnoDB;
+
+-- Bases creadas antes de la columna Aplicados:
+--   ALTER TABLE Top_products_sketch ADD COLUMN `Aplicados` JSON NULL AFTER `Watermark`;
+
+
+-- =========================
+-- 11) CONTEOS DISTINTOS APROXIMADOS (HyperLogLog)
+-- =========================
+
+-- Sketches HLL de DB_Proyecto/hll.py por métrica, mes (de la orden) y país
+-- (del cliente). Registros = 2^HLL_PRECISION bytes.
+CREATE TABLE IF NOT EXISTS `Hll_sketches` (
+  `Metrica` ENUM('clientes', 'ordenes', 'devoluciones') NOT NULL,
+  `Mes` DATE NOT NULL,
+  `Countries_ID` INT NOT NULL,
+  `Registros` BLOB NOT NULL,
+  PRIMARY KEY (`Metrica`, `Mes`, `Countries_ID`)
+) ENGINE = InnoDB;
+
+-- Último ID procesado por tabla de origen ('ordenes', 'devoluciones')
+CREATE TABLE IF NOT EXISTS `Hll_watermarks` (
+  `Origen` VARCHAR(20) NOT NULL,
+  `Watermark` INT NOT NULL,
+  PRIMARY KEY (`Origen`)
+) ENGINE = InnoDB;
+
+-- Bases creadas sin la métrica 'clientes':
+--   ALTER TABLE Hll_sketches MODIFY `Metrica` ENUM('clientes', 'ordenes', 'devoluciones') NOT NULL;
+
+-- Compradores distintos por mes (de la orden) y país (del cliente); hll.py
+-- da la versión aproximada desde los sketches 'clientes'
+CREATE OR REPLACE VIEW vw_clientes_activos_mensual AS
+SELECT
+  YEAR(o.`Fecha de la orden`) AS anio,
+  MONTH(o.`Fecha de la orden`) AS mes,
+  ci.Countries_ID AS country_id,
+  COUNT(DISTINCT o.Customers_ID) AS clientes_distintos
+FROM Ordenes o
+JOIN Customers c ON c.ID = o.Customers_ID
+JOIN Cities ci ON ci.ID = c.Cities_ID
+GROUP BY YEAR(o.`Fecha de la orden`), MONTH(o.`Fecha de la orden`), ci.Countries_ID;
+
+
+-- =========================
+-- 12) CUBO DE VENTAS (país, ciudad, categoría, mes)
+-- =========================
+
+-- Ventas pre-agregadas en todos los niveles de drill-down:
+--   geografía: todos (país 0, ciudad 0) / país (ciudad 0) / ciudad
+--   × categoría (0 = todas) × mes (AAAAMM, 0 = todos)
+-- El 0 marca la dimensión agregada (ROLLUP).
+CREATE TABLE IF NOT EXISTS `Sales_cube` (
+  `Countries_ID` INT NOT NULL,
+  `Cities_ID` INT NOT NULL,
+  `Categories_ID` INT NOT NULL,
+  `Mes` INT NOT NULL,
+  `Ventas` DECIMAL(16,2) NOT NULL,
+  `Unidades` INT NOT NULL,
+  `Items` INT NOT NULL,
+  PRIMARY KEY (`Countries_ID`, `Cities_ID`, `Categories_ID`, `Mes`),
+  INDEX `idx_Sales_cube_categoria_mes` (`Categories_ID`, `Mes`)
+) ENGINE = InnoDB;
+
+-- Órdenes que todavía no se suman al cubo. La fila la inserta el trigger
+-- trg_ordenes_insert_cube en la misma transacción que la orden: solo se ve
+-- cuando la orden se confirmó, sin importar su ID ni su fecha.
+CREATE TABLE IF NOT EXISTS `Sales_cube_pendientes` (
+  `Ordenes_ID` INT NOT NULL,
+  PRIMARY KEY (`Ordenes_ID`)
+) ENGINE = InnoDB;
+
+-- Fila única: la bloquea cada refresco (FOR UPDATE) para que dos refrescos
+-- simultáneos no sumen dos veces la misma cola
+CREATE TABLE IF NOT EXISTS `Sales_cube_estado` (
+  `ID` TINYINT NOT NULL,
+  `Actualizado` DATETIME NULL,
+  PRIMARY KEY (`ID`)
+) ENGINE = InnoDB;
+
+INSERT IGNORE INTO Sales_cube_estado (ID, Actualizado) VALUES (1, NULL);
+
+-- Versión anterior: watermark por ID (saltaba órdenes que confirmaban tarde)
+DROP TABLE IF EXISTS Sales_cube_watermark;
+
+DELIMITER $$
+
+DROP TRIGGER IF EXISTS trg_ordenes_insert_cube $$
+CREATE TRIGGER trg_ordenes_insert_cube
+AFTER INSERT ON Ordenes
+FOR EACH ROW
+BEGIN
+  INSERT INTO Sales_cube_pendientes (Ordenes_ID) VALUES (NEW.ID);
+END $$
+
+-- Suma al cubo las órdenes de Sales_cube_pendientes y las saca de la cola.
+-- Uso interno: corre dentro de la transacción de sp_refrescar_sales_cube o
+-- sp_reconstruir_sales_cube, que ya bloquearon Sales_cube_estado.
+DROP PROCEDURE IF EXISTS sp_aplicar_sales_cube_pendientes $$
+CREATE PROCEDURE sp_aplicar_sales_cube_pendientes ()
+BEGIN
+  DROP TEMPORARY TABLE IF EXISTS tmp_sales_cube_ordenes;
+  CREATE TEMPORARY TABLE tmp_sales_cube_ordenes (
+    Ordenes_ID INT NOT NULL PRIMARY KEY
+  );
+  INSERT INTO tmp_sales_cube_ordenes (Ordenes_ID)
+  SELECT Ordenes_ID FROM Sales_cube_pendientes;
+
+  IF ROW_COUNT() > 0 THEN
+    -- Delta al nivel más fino
+    DROP TEMPORARY TABLE IF EXISTS tmp_sales_cube_delta;
+    CREATE TEMPORARY TABLE tmp_sales_cube_delta AS
+    SELECT
+      ci.Countries_ID,
+      ci.ID AS Cities_ID,
+      p.Categories_ID,
+      YEAR(o.`Fecha de la orden`) * 100 + MONTH(o.`Fecha de la orden`) AS Mes,
+      SUM(oi.`Cantidad` * oi.`Precio por unidad`) AS Ventas,
+      SUM(oi.`Cantidad`) AS Unidades,
+      COUNT(*) AS Items
+    FROM tmp_sales_cube_ordenes q
+    JOIN Ordenes o ON o.ID = q.Ordenes_ID
+    JOIN Order_items oi ON oi.Ordenes_ID = o.ID
+    JOIN Products p ON p.ID = oi.Products_ID
+    JOIN Customers c ON c.ID = o.Customers_ID
+    JOIN Cities ci ON ci.ID = c.Cities_ID
+    GROUP BY ci.Countries_ID, ci.ID, p.Categories_ID, Mes;
+
+    -- Cada fila del delta se suma a sus 12 niveles de agregación
+    INSERT INTO Sales_cube (Countries_ID, Cities_ID, Categories_ID, Mes, Ventas, Unidades, Items)
+    SELECT * FROM (
+      SELECT
+        IF(g.geo >= 1, d.Countries_ID, 0) AS Countries_ID,
+        IF(g.geo = 2, d.Cities_ID, 0) AS Cities_ID,
+        IF(g.cat = 1, d.Categories_ID, 0) AS Categories_ID,
+        IF(g.mes = 1, d.Mes, 0) AS Mes,
+        SUM(d.Ventas) AS Ventas,
+        SUM(d.Unidades) AS Unidades,
+        SUM(d.Items) AS Items
+      FROM tmp_sales_cube_delta d
+      CROSS JOIN (
+        SELECT geo, cat, mes
+        FROM (SELECT 0 AS geo UNION ALL SELECT 1 UNION ALL SELECT 2) niveles_geo
+        CROSS JOIN (SELECT 0 AS cat UNION ALL SELECT 1) niveles_cat
+        CROSS JOIN (SELECT 0 AS mes UNION ALL SELECT 1) niveles_mes
+      ) g
+      GROUP BY 1, 2, 3, 4
+    ) AS nuevo
+    ON DUPLICATE KEY UPDATE
+      Ventas = Sales_cube.Ventas + nuevo.Ventas,
+      Unidades = Sales_cube.Unidades + nuevo.Unidades,
+      Items = Sales_cube.Items + nuevo.Items;
+
+    DROP TEMPORARY TABLE tmp_sales_cube_delta;
+
+    -- Solo las filas leídas: las que llegaron durante el refresco esperan al siguiente
+    DELETE pendiente
+    FROM Sales_cube_pendientes pendiente
+    JOIN tmp_sales_cube_ordenes q ON q.Ordenes_ID = pendiente.Ordenes_ID;
+  END IF;
+
+  DROP TEMPORARY TABLE tmp_sales_cube_ordenes;
+  UPDATE Sales_cube_estado SET Actualizado = NOW() WHERE ID = 1;
+END $$
+
+-- Refresco incremental. El FOR UPDATE sobre Sales_cube_estado evita que dos
+-- refrescos simultáneos sumen dos veces la misma cola.
+DROP PROCEDURE IF EXISTS sp_refrescar_sales_cube $$
+CREATE PROCEDURE sp_refrescar_sales_cube ()
+BEGIN
+  DECLARE v_estado TINYINT;
+
+  DECLARE EXIT HANDLER FOR SQLEXCEPTION
+  BEGIN
+    ROLLBACK;
+    DROP TEMPORARY TABLE IF EXISTS tmp_sales_cube_ordenes;
+    DROP TEMPORARY TABLE IF EXISTS tmp_sales_cube_delta;
+    RESIGNAL;
+  END;
+
+  START TRANSACTION;
+  SELECT ID INTO v_estado FROM Sales_cube_estado WHERE ID = 1 FOR UPDATE;
+  CALL sp_aplicar_sales_cube_pendientes();
+  COMMIT;
+END $$
+
+-- Reconstrucción completa (tras editar o borrar órdenes ya incluidas):
+-- vacía el cubo y encola todas las órdenes
+DROP PROCEDURE IF EXISTS sp_reconstruir_sales_cube $$
+CREATE PROCEDURE sp_reconstruir_sales_cube ()
+BEGIN
+  DECLARE v_estado TINYINT;
+
+  DECLARE EXIT HANDLER FOR SQLEXCEPTION
+  BEGIN
+    ROLLBACK;
+    DROP TEMPORARY TABLE IF EXISTS tmp_sales_cube_ordenes;
+    DROP TEMPORARY TABLE IF EXISTS tmp_sales_cube_delta;
+    RESIGNAL;
+  END;
+
+  START TRANSACTION;
+  SELECT ID INTO v_estado FROM Sales_cube_estado WHERE ID = 1 FOR UPDATE;
+  DELETE FROM Sales_cube;
+  INSERT IGNORE INTO Sales_cube_pendientes (Ordenes_ID)
+  SELECT ID FROM Ordenes;
+  CALL sp_aplicar_sales_cube_pendientes();
+  COMMIT;
+END $$
+
+DELIMITER ;
+
+-- Refresco periódico (requiere event_scheduler=ON); las lecturas del cubo no
+-- lo refrescan, también se puede llamar con db.refresh_sales_cube()
+CREATE EVENT IF NOT EXISTS ev_refrescar_sales_cube
+ON SCHEDULE EVERY 5 MINUTE
+DO CALL sp_refrescar_sales_cube();
+
+-- Llena el cubo (bases nuevas) o lo pasa a la cola de pendientes (bases
+-- con la versión por watermark)
+CALL sp_reconstruir_sales_cube();
+END $$
+
+DELIMITER ;
+
+CALL sp_refrescar_sales_cube();
+
+
+-- =========================
+-- 13) PRONÓSTICO DE DEMANDA
+-- =========================
+
+-- Unidades pronosticadas por producto y día (DB_Proyecto/forecast.py,
+-- python -m DB_Proyecto.forecast); se reemplaza completo en cada corrida.
+CREATE TABLE IF NOT EXISTS `Product_forecasts` (
+  `Products_ID` INT NOT NULL,
+  `Fecha` DATE NOT NULL,
+  `Unidades` DECIMAL(12,3) NOT NULL,
+  PRIMARY KEY (`Products_ID`, `Fecha`),
+  CONSTRAINT `fk_Product_forecasts_Products`
+    FOREIGN KEY (`Products_ID`)
+    REFERENCES `Products` (`ID`)
+    ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+-- Modelo elegido por producto: parámetros, error diario de un paso (RMSE)
+-- y demanda total del horizonte
+CREATE TABLE IF NOT EXISTS `Product_forecast_models` (
+  `Products_ID` INT NOT NULL,
+  `Alpha` DECIMAL(4,3) NOT NULL,
+  `Gamma` DECIMAL(4,3) NOT NULL,
+  `Error diario` DECIMAL(12,4) NOT NULL,
+  `Demanda horizonte` DECIMAL(14,3) NOT NULL,
+  `Fecha de cálculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Products_ID`),
+  CONSTRAINT `fk_Product_forecast_models_Products`
+    FOREIGN KEY (`Products_ID`)
+    REFERENCES `Products` (`ID`)
+    ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+-- Demanda pronosticada por categoría (suma de sus productos)
+CREATE OR REPLACE VIEW vw_pronostico_categoria AS
+SELECT
+  c.ID AS categoria_id,
+  c.Nombre AS categoria_nombre,
+  COUNT(*) AS productos,
+  SUM(m.`Demanda horizonte`) AS unidades_pronosticadas,
+  ROUND(SQRT(SUM(m.`Error diario` * m.`Error diario`)), 3) AS error_diario
+FROM Product_forecast_models m
+JOIN Products p ON p.ID = m.Products_ID
+JOIN Categories c ON c.ID = p.Categories_ID
+GROUP BY c.ID, c.Nombre
+ORDER BY unidades_pronosticadas DESC;
+
+
+-- =========================
+-- 14) PUNTO DE REORDEN Y STOCK DE SEGURIDAD
+-- =========================
+
+-- Calculado por DB_Proyecto/replenishment.py (python -m DB_Proyecto.replenishment)
+-- desde la historia de inventory_movements; se reemplaza en cada corrida.
+CREATE TABLE IF NOT EXISTS `Replenishment_params` (
+  `Products_ID` INT NOT NULL,
+  `Warehouses_ID` INT NOT NULL,
+  `Stock actual` INT NOT NULL,
+  `Consumo diario` DECIMAL(12,4) NOT NULL,
+  `Desviacion diaria` DECIMAL(12,4) NOT NULL,
+  `Stock de seguridad` INT NOT NULL,
+  `Punto de reorden` INT NOT NULL,
+  `Dias de cobertura` DECIMAL(10,1) NULL,
+  `Fecha de cálculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Products_ID`, `Warehouses_ID`),
+  INDEX `idx_Replenishment_params_bodega_cobertura` (`Warehouses_ID`, `Dias de cobertura`),
+  CONSTRAINT `fk_Replenishment_params_Products`
+    FOREIGN KEY (`Products_ID`)
+    REFERENCES `Products` (`ID`)
+    ON DELETE CASCADE,
+  CONSTRAINT `fk_Replenishment_params_Warehouses`
+    FOREIGN KEY (`Warehouses_ID`)
+    REFERENCES `Warehouses` (`ID`)
+    ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+
+-- =========================
+-- 15) VALORIZACIÓN FIFO DE INVENTARIO
+-- =========================
+
+-- Bases creadas antes de la columna de costo:
+--   ALTER TABLE inventory_movements ADD COLUMN `Costo unitario` DECIMAL(10,2) NULL;
+
+-- Capas FIFO abiertas por (producto, bodega), mantenidas por
+-- DB_Proyecto/fifo.py. Secuencia 0 con cantidad negativa = déficit.
+CREATE TABLE IF NOT EXISTS `Fifo_layers` (
+  `Products_ID` INT NOT NULL,
+  `Warehouses_ID` INT NOT NULL,
+  `Secuencia` INT NOT NULL,
+  `Cantidad` INT NOT NULL,
+  `Costo unitario` DECIMAL(10,2) NOT NULL,
+  `Fecha de entrada` DATETIME NOT NULL,
+  PRIMARY KEY (`Products_ID`, `Warehouses_ID`, `Secuencia`),
+  INDEX `idx_Fifo_layers_bodega` (`Warehouses_ID`)
+) ENGINE = InnoDB;
+
+-- Fecha del último movimiento aplicado a Fifo_layers
+CREATE TABLE IF NOT EXISTS `Fifo_checkpoint` (
+  `ID` TINYINT NOT NULL,
+  `Fecha del movimiento` DATETIME NOT NULL,
+  PRIMARY KEY (`ID`)
+) ENGINE = InnoDB;
+
+-- Snapshots de valorización por bodega y categoría (uno por corrida)
+CREATE TABLE IF NOT EXISTS `Inventory_valuation` (
+  `Fecha de corte` DATETIME NOT NULL,
+  `Warehouses_ID` INT NOT NULL,
+  `Categories_ID` INT NOT NULL,
+  `Unidades` INT NOT NULL,
+  `Valor` DECIMAL(16,2) NOT NULL,
+  PRIMARY KEY (`Fecha de corte`, `Warehouses_ID`, `Categories_ID`)
+) ENGINE = InnoDB;
+
+
+-- =========================
+-- 16) SNAPSHOTS DE STOCK (CONSULTAS "A UNA FECHA")
+-- =========================
+
+-- Stock por (producto, bodega) al inicio de cada día: incluye los
+-- movimientos con fecha < Fecha. Solo se guardan pares con stock <> 0.
+-- El stock a una fecha X = snapshot más cercano <= X + movimientos desde
+-- ese día hasta X (db.get_stock_as_of).
+CREATE TABLE IF NOT EXISTS `Stock_snapshots` (
+  `Fecha` DATE NOT NULL,
+  `Products_ID` INT NOT NULL,
+  `Warehouses_ID` INT NOT NULL,
+  `Stock` INT NOT NULL,
+  PRIMARY KEY (`Fecha`, `Products_ID`, `Warehouses_ID`),
+  INDEX `idx_Stock_snapshots_fecha_bodega` (`Fecha`, `Warehouses_ID`),
+  CONSTRAINT `fk_Stock_snapshots_Products`
+    FOREIGN KEY (`Products_ID`)
+    REFERENCES `Products` (`ID`)
+    ON DELETE CASCADE,
+  CONSTRAINT `fk_Stock_snapshots_Warehouses`
+    FOREIGN KEY (`Warehouses_ID`)
+    REFERENCES `Warehouses` (`ID`)
+    ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+-- Snapshots completos: un par ausente de un snapshot listado aquí tiene stock 0
+CREATE TABLE IF NOT EXISTS `Stock_snapshot_dates` (
+  `Fecha` DATE NOT NULL,
+  `Pares` INT NOT NULL,
+  `Fecha de cálculo` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`Fecha`)
+) ENGINE = InnoDB;
+
+DELIMITER $$
+
+-- Snapshot al inicio de p_fecha, a partir del snapshot anterior más los
+-- movimientos entre ambos (sin volver a sumar toda la historia)
+DROP PROCEDURE IF EXISTS sp_tomar_snapshot_stock $$
+CREATE PROCEDURE sp_tomar_snapshot_stock (IN p_fecha DATE)
+BEGIN
+  DECLARE v_base DATE;
+
+  IF NOT EXISTS (SELECT 1 FROM Stock_snapshot_dates WHERE Fecha = p_fecha) THEN
+    SELECT MAX(Fecha) INTO v_base
+    FROM Stock_snapshot_dates
+    WHERE Fecha < p_fecha;
+
+    START TRANSACTION;
+
+    INSERT INTO Stock_snapshots (Fecha, Products_ID, Warehouses_ID, Stock)
+    SELECT p_fecha, t.Products_ID, t.Warehouses_ID, SUM(t.Stock)
+    FROM (
+      SELECT Products_ID, Warehouses_ID, Stock
+      FROM Stock_snapshots
+      WHERE Fecha = v_base
+      UNION ALL
+      SELECT
+        Products_ID,
+        Warehouses_ID,
+        SUM(IF(`Tipo de movimiento` = 'IN', Cantidad, -Cantidad))
+      FROM inventory_movements
+      WHERE `Fecha del movimiento` >= COALESCE(v_base, '1000-01-01')
+        AND `Fecha del movimiento` < p_fecha
+      GROUP BY Products_ID, Warehouses_ID
+    ) t
+    GROUP BY t.Products_ID, t.Warehouses_ID
+    HAVING SUM(t.Stock) <> 0;
+
+    INSERT INTO Stock_snapshot_dates (Fecha, Pares)
+    VALUES (p_fecha, ROW_COUNT());
+
+    COMMIT;
+  END IF;
+END $$
+
+-- Toma los snapshots diarios que falten desde el último hasta hoy
+DROP PROCEDURE IF EXISTS sp_tomar_snapshots_stock_pendientes $$
+CREATE PROCEDURE sp_tomar_snapshots_stock_pendientes ()
+BEGIN
+  DECLARE v_fecha DATE;
+
+  SELECT COALESCE(MAX(Fecha) + INTERVAL 1 DAY, CURDATE()) INTO v_fecha
+  FROM Stock_snapshot_dates;
+
+  WHILE v_fecha <= CURDATE() DO
+    CALL sp_tomar_snapshot_stock(v_fecha);
+    SET v_fecha = v_fecha + INTERVAL 1 DAY;
+  END WHILE;
+END $$
+
+-- Tras cargar movimientos con fechas pasadas (p. ej. el generador de datos):
+-- descarta los snapshots posteriores a p_desde; se vuelven a tomar con
+-- sp_tomar_snapshots_stock_pendientes (o sp_tomar_snapshot_stock por día)
+DROP PROCEDURE IF EXISTS sp_invalidar_snapshots_stock $$
+CREATE PROCEDURE sp_invalidar_snapshots_stock (IN p_desde DATETIME)
+BEGIN
+  START TRANSACTION;
+  DELETE FROM Stock_snapshot_dates WHERE Fecha > p_desde;
+  DELETE FROM Stock_snapshots WHERE Fecha > p_desde;
+  COMMIT;
+END $$
+
+DELIMITER ;
+
+-- Snapshot diario automático (requiere event_scheduler=ON, el valor por
+-- defecto en MySQL 8); también se puede llamar con db.take_stock_snapshots()
+CREATE EVENT IF NOT EXISTS ev_snapshot_stock_diario
+ON SCHEDULE EVERY 1 DAY
+STARTS CURRENT_DATE + INTERVAL 1 DAY + INTERVAL 5 MINUTE
+DO CALL sp_tomar_snapshots_stock_pendientes();
+
+CALL sp_tomar_snapshots_stock_pendientes();
+
+
+-- =========================
+-- 17) SALDOS DE INVENTARIO Y TRANSFERENCIAS ENTRE BODEGAS
+-- =========================
+
+-- Backfill de Inventory_balances (idempotente: se puede volver a ejecutar)
+DELETE FROM Inventory_balances;
+INSERT INTO Inventory_balances (Products_ID, Warehouses_ID, Stock)
+SELECT
+  Products_ID,
+  Warehouses_ID,
+  SUM(IF(`Tipo de movimiento` = 'IN', Cantidad, -Cantidad))
+FROM inventory_movements
+GROUP BY Products_ID, Warehouses_ID;
+
+-- Encabezado de cada transferencia; sus movimientos OUT (origen) e IN
+-- (destino) llevan la misma `Fecha del movimiento`
+CREATE TABLE IF NOT EXISTS `Inventory_transfers` (
+  `ID` INT NOT NULL AUTO_INCREMENT,
+  `Origen_Warehouses_ID` INT NOT NULL,
+  `Destino_Warehouses_ID` INT NOT NULL,
+  `Employees_ID` INT NOT NULL,
+  `Fecha` DATETIME NOT NULL,
+  `Productos` INT NOT NULL,
+  `Unidades` INT NOT NULL,
+  PRIMARY KEY (`ID`),
+  INDEX `idx_Inventory_transfers_origen_fecha` (`Origen_Warehouses_ID`, `Fecha`),
+  INDEX `idx_Inventory_transfers_destino_fecha` (`Destino_Warehouses_ID`, `Fecha`),
+  CONSTRAINT `fk_Inventory_transfers_Origen`
+    FOREIGN KEY (`Origen_Warehouses_ID`)
+    REFERENCES `Warehouses` (`ID`),
+  CONSTRAINT `fk_Inventory_transfers_Destino`
+    FOREIGN KEY (`Destino_Warehouses_ID`)
+    REFERENCES `Warehouses` (`ID`),
+  CONSTRAINT `fk_Inventory_transfers_Employees`
+    FOREIGN KEY (`Employees_ID`)
+    REFERENCES `Employees` (`ID`)
+) ENGINE = InnoDB;
+
+DELIMITER $$
+
+-- Transfiere un lote de productos de una bodega a otra en una transacción.
+-- p_items: JSON [{"producto": 1, "cantidad": 5}, ...]
+-- Bloquea los saldos de origen, valida el stock, registra los pares OUT/IN
+-- y actualiza Inventory_balances una sola vez para todo el lote.
+-- El IN de destino lleva como `Costo unitario` el costo promedio de las capas
+-- FIFO de origen que consumiría la salida (las más antiguas primero, según
+-- la última valorización); sin capas queda NULL y FIFO usa Products.Precio.
+DROP PROCEDURE IF EXISTS sp_transferir_inventario $$
+CREATE PROCEDURE sp_transferir_inventario (
+  IN p_origen_id INT,
+  IN p_destino_id INT,
+  IN p_empleado_id INT,
+  IN p_items JSON
+)
+BEGIN
+  DECLARE v_fecha DATETIME DEFAULT NOW();
+  DECLARE v_bloqueados INT;
+  DECLARE v_faltante INT;
+  DECLARE v_mensaje VARCHAR(255);
+  DECLARE v_transfer_id INT;
+
+  DECLARE EXIT HANDLER FOR SQLEXCEPTION
+  BEGIN
+    ROLLBACK;
+    SET @inventario_saldos_diferidos = NULL;
+    DROP TEMPORARY TABLE IF EXISTS tmp_transferencia;
+    RESIGNAL;
+  END;
+
+  IF p_origen_id = p_destino_id THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'La bodega de origen y destino deben ser distintas.';
+  END IF;
+
+  DROP TEMPORARY TABLE IF EXISTS tmp_transferencia;
+  CREATE TEMPORARY TABLE tmp_transferencia (
+    Products_ID INT NOT NULL PRIMARY KEY,
+    Cantidad INT NOT NULL,
+    Costo DECIMAL(10,2) NULL
+  ) ENGINE = MEMORY;
+
+  -- Un mismo producto repetido en el lote se suma en una sola línea; el
+  -- costo sale de las capas de origen que cubren la cantidad transferida
+  INSERT INTO tmp_transferencia (Products_ID, Cantidad, Costo)
+  WITH items AS (
+    SELECT j.producto, SUM(j.cantidad) AS cantidad
+    FROM JSON_TABLE(
+      p_items, '$[*]' COLUMNS (
+        producto INT PATH '$.producto' ERROR ON EMPTY,
+        cantidad INT PATH '$.cantidad' ERROR ON EMPTY
+      )
+    ) AS j
+    GROUP BY j.producto
+  ),
+  capas AS (
+    SELECT
+      l.Products_ID,
+      l.`Costo unitario` AS costo,
+      LEAST(
+        l.Cantidad,
+        i.cantidad - (SUM(l.Cantidad) OVER (PARTITION BY l.Products_ID ORDER BY l.Secuencia) - l.Cantidad)
+      ) AS tomado
+    FROM Fifo_layers l
+    JOIN items i ON i.producto = l.Products_ID
+    WHERE l.Warehouses_ID = p_origen_id
+      AND l.Cantidad > 0
+  )
+  SELECT i.producto, i.cantidad, SUM(c.tomado * c.costo) / SUM(c.tomado)
+  FROM items i
+  LEFT JOIN capas c ON c.Products_ID = i.producto AND c.tomado > 0
+  GROUP BY i.producto, i.cantidad;
+
+  IF ROW_COUNT() = 0 THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'La transferencia no tiene productos.';
+  END IF;
+  IF EXISTS (SELECT 1 FROM tmp_transferencia WHERE Cantidad <= 0) THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Las cantidades a transferir deben ser positivas.';
+  END IF;
+
+  START TRANSACTION;
+
+  -- Bloqueo de los saldos de origen: dos transferencias concurrentes desde
+  -- la misma bodega no pueden gastar el mismo stock
+  SELECT COUNT(*) INTO v_bloqueados
+  FROM Inventory_balances b
+  JOIN tmp_transferencia t ON t.Products_ID = b.Products_ID
+  WHERE b.Warehouses_ID = p_origen_id
+  FOR UPDATE OF b;
+
+  SELECT MIN(t.Products_ID) INTO v_faltante
+  FROM tmp_transferencia t
+  LEFT JOIN Inventory_balances b
+    ON b.Products_ID = t.Products_ID
+   AND b.Warehouses_ID = p_origen_id
+  WHERE COALESCE(b.Stock, 0) < t.Cantidad;
+
+  IF v_faltante IS NOT NULL THEN
+    SET v_mensaje = CONCAT('Stock insuficiente en la bodega de origen para el producto ', v_faltante, '.');
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = v_mensaje;
+  END IF;
+
+  SET @inventario_saldos_diferidos = 1;
+
+  INSERT INTO inventory_movements (
+    `Products_ID`,
+    `Warehouses_ID`,
+    `Cantidad`,
+    `Tipo de movimiento`,
+    `Fecha del movimiento`,
+    `Employees_ID`,
+    `Costo unitario`
+  )
+  SELECT
+    t.Products_ID, lado.Warehouses_ID, t.Cantidad, lado.Tipo, v_fecha, p_empleado_id,
+    IF(lado.Tipo = 'IN', t.Costo, NULL)
+  FROM tmp_transferencia t
+  CROSS JOIN (
+    SELECT p_origen_id AS Warehouses_ID, 'OUT' AS Tipo
+    UNION ALL
+    SELECT p_destino_id, 'IN'
+  ) AS lado;
+
+  INSERT INTO Inventory_balances (Products_ID, Warehouses_ID, Stock)
+  SELECT * FROM (
+    SELECT t.Products_ID, lado.Warehouses_ID, t.Cantidad * lado.Signo AS Stock
+    FROM tmp_transferencia t
+    CROSS JOIN (
+      SELECT p_origen_id AS Warehouses_ID, -1 AS Signo
+      UNION ALL
+      SELECT p_destino_id, 1
+    ) AS lado
+  ) AS nuevo
+  ON DUPLICATE KEY UPDATE
+    Stock = Inventory_balances.Stock + nuevo.Stock;
+
+  SET @inventario_saldos_diferidos = NULL;
+
+  INSERT INTO Inventory_transfers
+    (Origen_Warehouses_ID, Destino_Warehouses_ID, Employees_ID, Fecha, Productos, Unidades)
+  SELECT p_origen_id, p_destino_id, p_empleado_id, v_fecha, COUNT(*), SUM(Cantidad)
+  FROM tmp_transferencia;
+  SET v_transfer_id = LAST_INSERT_ID();
+
+  COMMIT;
+  DROP TEMPORARY TABLE tmp_transferencia;
+
+  SELECT ID AS transfer_id, Fecha AS fecha, Productos AS productos, Unidades AS unidades
+  FROM Inventory_transfers
+  WHERE ID = v_transfer_id;
+END $$
+
+DELIMITER ;
+
+
+-- =========================
+-- 18) PRIORIDAD DE BODEGAS POR CIUDAD (ASIGNACIÓN DE PEDIDOS)
+-- =========================
+
+-- Orden de preferencia de las bodegas para despachar a cada ciudad
+-- (1 = la más cercana). Lo usa DB_Proyecto/allocation.py junto con
+-- Inventory_balances para elegir desde dónde surtir cada línea.
+CREATE TABLE IF NOT EXISTS `City_warehouse_priority` (
+  `Cities_ID` INT NOT NULL,
+  `Prioridad` SMALLINT NOT NULL,
+  `Warehouses_ID` INT NOT NULL,
+  `Dias estimados` DECIMAL(6,2) NULL,
+  PRIMARY KEY (`Cities_ID`, `Prioridad`),
+  UNIQUE INDEX `uq_City_warehouse_priority_bodega` (`Cities_ID`, `Warehouses_ID`),
+  CONSTRAINT `fk_City_warehouse_priority_Cities`
+    FOREIGN KEY (`Cities_ID`)
+    REFERENCES `Cities` (`ID`)
+    ON DELETE CASCADE,
+  CONSTRAINT `fk_City_warehouse_priority_Warehouses`
+    FOREIGN KEY (`Warehouses_ID`)
+    REFERENCES `Warehouses` (`ID`)
+    ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+DELIMITER $$
+
+-- No hay coordenadas: la cercanía se aproxima con misma ciudad, luego
+-- mismo país y luego los días de entrega históricos de la bodega hacia
+-- clientes de ese país (envíos ENTREGADO). Recalcular al agregar bodegas
+-- o ciudades.
+DROP PROCEDURE IF EXISTS sp_recalcular_prioridad_bodegas $$
+CREATE PROCEDURE sp_recalcular_prioridad_bodegas ()
+BEGIN
+  START TRANSACTION;
+  DELETE FROM City_warehouse_priority;
+
+  INSERT INTO City_warehouse_priority (Cities_ID, Prioridad, Warehouses_ID, `Dias estimados`)
+  WITH entregas AS (
+    SELECT
+      s.Warehouses_ID,
+      ci.Countries_ID,
+      AVG(DATEDIFF(s.`Fecha de entrega`, s.`Fecha de envio`)) AS dias
+    FROM Shipments s
+    JOIN Ordenes o ON o.Shipments_ID = s.ID
+    JOIN Customers cu ON cu.ID = o.Customers_ID
+    JOIN Cities ci ON ci.ID = cu.Cities_ID
+    WHERE s.Status = 'ENTREGADO'
+    GROUP BY s.Warehouses_ID, ci.Countries_ID
+  )
+  SELECT
+    c.ID,
+    ROW_NUMBER() OVER (
+      PARTITION BY c.ID
+      ORDER BY
+        w.Cities_ID = c.ID DESC,
+        wc.Countries_ID = c.Countries_ID DESC,
+        e.dias IS NULL,
+        e.dias,
+        w.ID
+    ),
+    w.ID,
+    e.dias
+  FROM Cities c
+  CROSS JOIN Warehouses w
+  JOIN Cities wc ON wc.ID = w.Cities_ID
+  LEFT JOIN entregas e
+    ON e.Warehouses_ID = w.ID
+   AND e.Countries_ID = c.Countries_ID;
+
+  COMMIT;
+END $$
+
+DELIMITER ;
+
+CALL sp_recalcular_prioridad_bodegas();
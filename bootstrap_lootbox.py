@@ -0,0 +1,255 @@
+# =========================================================
+# BOOTSTRAP DE LA BASE LOOTBOX (índices diferidos)
+# =========================================================
+# Crea un ambiente nuevo en 4 fases, midiendo el tiempo de cada una:
+#   1. Esquema: tablas de LootBoxDB.sql solo con su PRIMARY KEY
+#      (+ triggers y promociones base del mismo script).
+#   2. Carga: seed_countries_cities.sql + seed_lootbox_data.sql.
+#   3. Índices: los INDEX secundarios de cada tabla y los índices
+#      compuestos/funcionales de LootBoxIndexViews.sql, en un solo
+#      ALTER TABLE por tabla; luego las llaves foráneas.
+#   4. Vistas y procedimientos de LootBoxIndexViews.sql.
+#
+# Así la carga llena tablas sin índices secundarios y cada índice se
+# construye una sola vez, ordenado, en lugar de fila por fila.
+# =========================================================
+
+import argparse
+import os
+import re
+import time
+
+import mysql.connector
+
+from DB_Proyecto import db
+
+SCHEMA_FILE = "SQL_DB_Template/LootBoxDB.sql"
+INDEX_VIEWS_FILE = "SQL_DB_Template/LootBoxIndexViews.sql"
+COUNTRIES_SEED_FILE = "SQL_DB_Template/seed_countries_cities.sql"
+SEED_FILE = "SQL_DB_Template/seed_lootbox_data.sql"
+
+# Variables de sesión que apagan los triggers de tablas derivadas durante la
+# carga; LootBoxIndexViews.sql las recalcula completas después
+DEFERRED_TRIGGER_FLAGS = (
+    "@inventario_saldos_diferidos",
+    "@customer_stats_diferidos",
+    "@sla_envios_diferidos",
+)
+
+_CREATE_TABLE = re.compile(r"CREATE TABLE IF NOT EXISTS `(\w+)`", re.IGNORECASE)
+_CREATE_INDEX = re.compile(
+    r"^CREATE INDEX (\w+)\s+ON\s+`(\w+)`\s*(\(.*\))$", re.IGNORECASE | re.DOTALL
+)
+
+# =========================================================
+# FUNCIONES AUXILIARES
+# =========================================================
+def strip_line_comment(line):
+    """Quita el comentario "-- ..." al final de una línea (fuera de comillas)."""
+    quote = None
+    for i, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif line.startswith("--", i) and (i + 2 == len(line) or line[i + 2].isspace()):
+            return line[:i].rstrip()
+    return line
+
+
+def split_sql(text):
+    """
+    Divide un script SQL en sentencias, respetando los bloques DELIMITER
+    (triggers y procedimientos) y omitiendo líneas de comentario sueltas.
+    Un comentario al final de la línea no oculta el delimitador.
+    """
+    statements = []
+    buffer = []
+    delimiter = ";"
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split()[1]
+            continue
+        line = strip_line_comment(line)
+        stripped = line.strip()
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).strip()
+            statements.append(statement[: -len(delimiter)].strip())
+            buffer = []
+    return statements
+
+
+def split_create_table(statement):
+    """
+    Separa un CREATE TABLE en:
+      - el CREATE TABLE con columnas y PRIMARY KEY solamente,
+      - la lista de cláusulas INDEX diferidas,
+      - la lista de cláusulas CONSTRAINT ... FOREIGN KEY diferidas.
+    """
+    kept, indexes, constraints = [], [], []
+    current = None
+    for line in statement.splitlines():
+        stripped = line.strip()
+        if stripped.startswith(("INDEX ", "UNIQUE INDEX ")):
+            indexes.append(stripped.rstrip(","))
+            current = None
+        elif stripped.startswith("CONSTRAINT "):
+            current = [stripped]
+            constraints.append(current)
+        elif current is not None and not stripped.startswith(")"):
+            current.append(stripped)
+        else:
+            current = None
+            kept.append(line)
+
+    # La última definición que quedó antes del ")" no debe terminar en coma
+    closing = max(i for i, line in enumerate(kept) if line.strip().startswith(")"))
+    kept[closing - 1] = kept[closing - 1].rstrip().rstrip(",")
+
+    return (
+        "\n".join(kept),
+        indexes,
+        [" ".join(parts).rstrip(",") for parts in constraints],
+    )
+
+
+def read_sql(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def seed_statements(path):
+    """Sentencias del seed; si el archivo no existe se genera en memoria."""
+    if os.path.exists(path):
+        return split_sql(read_sql(path))
+
+    print(f"⚠️  {path} no existe: generando el snapshot en memoria...")
+    import generate_lootbox_seed
+
+    return split_sql("\n".join(generate_lootbox_seed.generate_snapshot()))
+
+
+def execute_all(cursor, statements):
+    for statement in statements:
+        cursor.execute(statement)
+
+
+# =========================================================
+# BOOTSTRAP
+# =========================================================
+def bootstrap(seed_path=SEED_FILE):
+    timings = []
+
+    def phase(name, fn):
+        print(f"⏳ {name}...")
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append((name, elapsed))
+        print(f"✅ {name}: {elapsed:.2f} s")
+
+    # Conexión sin "database": el schema se crea en la fase 1
+    config = {k: v for k, v in db.DB_CONFIG.items() if k != "database"}
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+
+    # ---------------------------------------------------------
+    # Preparar sentencias
+    # ---------------------------------------------------------
+    schema_statements = []
+    deferred_indexes = {}      # tabla -> ["INDEX ...", ...]
+    deferred_constraints = {}  # tabla -> ["CONSTRAINT ... FOREIGN KEY ...", ...]
+    for statement in split_sql(read_sql(SCHEMA_FILE)):
+        match = _CREATE_TABLE.search(statement)
+        if match:
+            statement, indexes, constraints = split_create_table(statement)
+            deferred_indexes.setdefault(match.group(1), []).extend(indexes)
+            deferred_constraints.setdefault(match.group(1), []).extend(constraints)
+        schema_statements.append(statement)
+
+    # Los CREATE INDEX de LootBoxIndexViews.sql se agregan al mismo ALTER de su tabla
+    object_statements = []
+    for statement in split_sql(read_sql(INDEX_VIEWS_FILE)):
+        match = _CREATE_INDEX.match(statement)
+        if match:
+            name, table, columns = match.groups()
+            deferred_indexes.setdefault(table, []).append(f"INDEX `{name}` {columns}")
+        else:
+            object_statements.append(statement)
+
+    # ---------------------------------------------------------
+    # Fases
+    # ---------------------------------------------------------
+    def create_schema():
+        execute_all(cursor, schema_statements)
+        conn.commit()
+
+    def load_data():
+        cursor.execute("SET unique_checks = 0")
+        cursor.execute("SET foreign_key_checks = 0")
+        # Los triggers de saldos, Customer_stats y SLA no trabajan por fila
+        for flag in DEFERRED_TRIGGER_FLAGS:
+            cursor.execute(f"SET {flag} = 1")
+        for statements in (split_sql(read_sql(COUNTRIES_SEED_FILE)), seed_statements(seed_path)):
+            execute_all(cursor, statements)
+            conn.commit()
+        cursor.execute("SET unique_checks = 1")
+        for flag in DEFERRED_TRIGGER_FLAGS:
+            cursor.execute(f"SET {flag} = NULL")
+
+    def build_indexes():
+        for table, indexes in deferred_indexes.items():
+            if indexes:
+                clauses = ",\n  ".join(f"ADD {index}" for index in indexes)
+                cursor.execute(f"ALTER TABLE `{table}`\n  {clauses}")
+
+    def add_foreign_keys():
+        # Con foreign_key_checks = 0 las FKs se agregan sin revalidar cada fila
+        # (el seed termina con SET FOREIGN_KEY_CHECKS = 1, se vuelve a apagar)
+        cursor.execute("SET foreign_key_checks = 0")
+        for table, constraints in deferred_constraints.items():
+            if constraints:
+                clauses = ",\n  ".join(f"ADD {constraint}" for constraint in constraints)
+                cursor.execute(f"ALTER TABLE `{table}`\n  {clauses}")
+        cursor.execute("SET foreign_key_checks = 1")
+
+    def create_objects():
+        execute_all(cursor, object_statements)
+        conn.commit()
+
+    try:
+        phase("Esquema (solo PRIMARY KEY)", create_schema)
+        phase("Carga de datos", load_data)
+        phase("Índices secundarios y compuestos", build_indexes)
+        phase("Llaves foráneas", add_foreign_keys)
+        phase("Vistas y procedimientos", create_objects)
+    finally:
+        cursor.close()
+        conn.close()
+
+    print("\n⏱️  Resumen:")
+    for name, elapsed in timings:
+        print(f"   {name:<35} {elapsed:8.2f} s")
+    print(f"   {'Total':<35} {sum(t for _, t in timings):8.2f} s")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crea la base LootBox con índices diferidos y mide cada fase."
+    )
+    parser.add_argument(
+        "--seed", default=SEED_FILE,
+        help="Archivo de datos a cargar (si no existe se genera con generate_lootbox_seed.py).",
+    )
+    args = parser.parse_args()
+    bootstrap(args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# =========================================================
+# CAPTURA PROGRAMADA DE PLANES DE EJECUCIÓN
+# =========================================================
+# Guarda EXPLAIN FORMAT=JSON + tiempo de cada consulta avanzada y vista
+# analítica en Plan_snapshots y reporta regresiones contra la captura
+# anterior. Pensado para ejecutarse con el Programador de tareas / cron.
+# Termina con código 1 si detecta alguna regresión.
+# =========================================================
+
+import argparse
+import sys
+
+from DB_Proyecto import db
+from DB_Proyecto.pages.analytics_page import ADVANCED_QUERIES
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Captura planes de ejecución y detecta regresiones."
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=db.PLAN_REGRESSION_THRESHOLD,
+        help="Aumento relativo de tiempo considerado regresión (0.5 = +50%%).",
+    )
+    args = parser.parse_args()
+
+    queries = {key: info["sql"] for key, info in ADVANCED_QUERIES.items()}
+    errors = db.capture_plan_snapshots(queries)
+    for error in errors:
+        print(f"❌ {error}")
+
+    regressions = 0
+    for row in db.get_plan_regressions(threshold=args.threshold):
+        icon = "⚠️ " if row["regresion"] else "✅"
+        print(f"{icon} {row['objetivo']:<32} {row['tiempo_actual_ms']:>10} ms  {row['estado']}")
+        regressions += row["regresion"]
+
+    print(f"\n{regressions} regresión(es) detectada(s).")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# =========================================================
+# EXPORTAR SNAPSHOT PARQUET DE LOOTBOX
+# =========================================================
+# Escribe las tablas de LootBox a snapshots/<versión>/ en Parquet
+# (zstd, columnas podadas, Ordenes/Order_items/inventory_movements/
+# Audit_log particionadas por mes). El panel de consultas avanzadas
+# puede correr sobre este snapshot con el motor "duckdb".
+# =========================================================
+
+import time
+
+from DB_Proyecto import snapshot
+
+
+def main():
+    start = time.perf_counter()
+    counts = snapshot.export_snapshot()
+    for table, rows in counts.items():
+        print(f"✅ {table:<22} {rows:>10,} filas")
+    version_dir = snapshot.version_dir(snapshot.current_version())
+    print(f"\n📦 Snapshot en {version_dir} ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,23 @@
 # Autor: Kevin & Marisa
 # Salida: SQL_DB_Template/seed_lootbox_data.sql
 # =========================================================
+# Generación vectorizada:
+# - Los valores de Faker (nombres, direcciones, frases...) se construyen
+#   una sola vez en "pools" y luego se muestrean con NumPy.
+# - Cada tabla se genera como arreglos (una columna = un arreglo) y se
+#   formatea en bloque como INSERTs multi-fila.
+# =========================================================
 
-import random
+import argparse
 from datetime import datetime, timedelta
+
+import numpy as np
 from faker import Faker
 
 # Inicializar Faker y semillas de aleatoriedad
 fake = Faker('es_ES')
 Faker.seed(42)
-random.seed(42)
+rng = np.random.default_rng(42)
 
 # =========================================================
 # CONFIGURACIÓN GLOBAL
@@ -36,440 +44,838 @@ NUM_PROMOTIONS = 10
 NUM_LOYALTY_MOVES = 200
 NUM_INVENTORY_MOVES = 2000
 
+# Modo incremental (--append-days): volumen por cada día agregado
+APPEND_ORDERS_PER_DAY = NUM_ORDERS // 365
+APPEND_RESTOCKS_PER_DAY = NUM_INVENTORY_MOVES // 365
+APPEND_LOYALTY_RATE = 0.3  # fracción de órdenes que generan puntos
+
+# Tamaño de los pools de Faker y filas por INSERT multi-fila
+POOL_SIZE = 1000
+BATCH_SIZE = 1000
+
 # Fechas aleatorias entre el último año
-END_DATE = datetime.now()
+END_DATE = datetime.now().replace(microsecond=0)
 START_DATE = END_DATE - timedelta(days=365)
 
+# ---------------------------------------------------------
+# Distribuciones de los datos (para benchmarks realistas)
+# ---------------------------------------------------------
+# - product_popularity: "uniform" | "zipf"   → qué productos se venden/mueven
+# - customer_activity:  "uniform" | "pareto" → qué clientes compran (cola pesada)
+# - order_dates:        "uniform" | "seasonal" → curva mensual y semanal
+# - totals_from_items:  Total de la orden = SUM(Cantidad * Precio por unidad)
+DISTRIBUTIONS = {
+    "product_popularity": "zipf",
+    "product_zipf_s": 1.1,
+    "customer_activity": "pareto",
+    "customer_pareto_alpha": 1.16,  # ~80/20
+    "order_dates": "seasonal",
+    "totals_from_items": True,
+}
+
+# Peso relativo por mes (enero..diciembre): picos en Black Friday y Navidad
+MONTH_WEIGHTS = np.array([0.8, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0, 0.95, 0.9, 1.0, 1.5, 1.9])
+# Peso relativo por día de la semana (lunes..domingo)
+WEEKDAY_WEIGHTS = np.array([0.9, 0.9, 0.95, 1.0, 1.15, 1.3, 1.1])
+# Semilla fija para los pesos: los mismos productos/clientes son "populares"
+# tanto en el snapshot como en cada corrida de --append-days
+WEIGHTS_SEED = 7
+
 # =========================================================
 # FUNCIONES AUXILIARES
 # =========================================================
-def random_date(start=START_DATE, end=END_DATE):
-    """Devuelve una fecha aleatoria entre start y end."""
+def random_dates(n, start=START_DATE, end=END_DATE):
+    """Devuelve n fechas aleatorias (datetime64[s]) entre start y end."""
     delta = end - start
-    random_days = random.randrange(delta.days)
-    random_seconds = random.randrange(86400)
-    return start + timedelta(days=random_days, seconds=random_seconds)
+    days = rng.integers(0, delta.days, n)
+    seconds = rng.integers(0, 86400, n)
+    base = np.datetime64(start, "s")
+    return base + days.astype("timedelta64[D]") + seconds.astype("timedelta64[s]")
 
 def sql_escape(s: str) -> str:
     """Escapa comillas simples para SQL."""
     return s.replace("'", "''")
 
-def random_phone():
-    """Genera un número de teléfono internacional ficticio."""
-    return f"+{random.randint(1,99)}-{random.randint(10000000,999999999)}"
+def random_phones(n):
+    """Genera n números de teléfono internacionales ficticios."""
+    prefix = rng.integers(1, 100, n).astype(str)
+    number = rng.integers(10000000, 1000000000, n).astype(str)
+    return np.char.add(np.char.add("+", prefix), np.char.add("-", number))
+
+def build_pool(factory, size=POOL_SIZE):
+    """Llama a una función de Faker `size` veces y devuelve los valores escapados."""
+    return np.array([sql_escape(factory()) for _ in range(size)])
+
+def draw(pool, n):
+    """Muestrea n valores (con reemplazo) de un pool o lista."""
+    pool = np.asarray(pool)
+    return pool[rng.integers(0, len(pool), n)]
+
+def random_ids(n, max_id):
+    """n llaves foráneas uniformes entre 1 y max_id."""
+    return rng.integers(1, max_id + 1, n)
+
+def weighted_ids(n, weights):
+    """n llaves foráneas entre 1 y len(weights) con probabilidad ∝ weights."""
+    return rng.choice(len(weights), size=n, p=weights) + 1
+
+def zipf_weights(n, s):
+    """Pesos Zipf (1 / rango^s) asignados a los IDs en orden aleatorio."""
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    np.random.default_rng(WEIGHTS_SEED).shuffle(weights)
+    return weights / weights.sum()
+
+def pareto_weights(n, alpha):
+    """Pesos de cola pesada (Pareto): pocos IDs concentran la mayoría de la actividad."""
+    weights = np.random.default_rng(WEIGHTS_SEED).pareto(alpha, n) + 1.0
+    return weights / weights.sum()
+
+def popularity_weights(num_products):
+    """Pesos de popularidad por producto según DISTRIBUTIONS["product_popularity"]."""
+    if DISTRIBUTIONS["product_popularity"] == "zipf":
+        return zipf_weights(num_products, DISTRIBUTIONS["product_zipf_s"])
+    return np.full(num_products, 1.0 / num_products)
+
+def activity_weights(num_customers):
+    """Pesos de actividad por cliente según DISTRIBUTIONS["customer_activity"]."""
+    if DISTRIBUTIONS["customer_activity"] == "pareto":
+        return pareto_weights(num_customers, DISTRIBUTIONS["customer_pareto_alpha"])
+    return np.full(num_customers, 1.0 / num_customers)
+
+def draw_order_items(num_orders, product_weights):
+    """
+    Sortea las líneas de num_orders órdenes.
+    Devuelve (posición de la orden 1..num_orders, posición del producto 1..N)
+    por línea, sin productos repetidos dentro de una misma orden.
+    """
+    items_per_order = rng.integers(1, NUM_ORDER_ITEMS_MAX + 1, num_orders)
+    item_orders = np.repeat(np.arange(1, num_orders + 1), items_per_order)
+    item_products = weighted_ids(len(item_orders), product_weights)
+
+    # Evitar productos duplicados por orden (PK Products_ID + Ordenes_ID):
+    # se vuelven a sortear solo las posiciones repetidas hasta que no quede ninguna.
+    while True:
+        keys = item_orders * (len(product_weights) + 1) + item_products
+        _, first_pos = np.unique(keys, return_index=True)
+        duplicated = np.ones(len(item_orders), dtype=bool)
+        duplicated[first_pos] = False
+        if not duplicated.any():
+            return item_orders, item_products
+        item_products[duplicated] = weighted_ids(int(duplicated.sum()), product_weights)
+
+def seasonal_dates(n, start=START_DATE, end=END_DATE):
+    """
+    Como random_dates, pero el día se elige con probabilidad
+    MONTH_WEIGHTS[mes] * WEEKDAY_WEIGHTS[día de la semana].
+    """
+    days = np.arange(np.datetime64(start.date()), np.datetime64(end.date()))
+    month = days.astype("datetime64[M]").astype(int) % 12
+    weekday = (days.astype(int) + 3) % 7  # 1970-01-01 fue jueves → lunes = 0
+    weights = MONTH_WEIGHTS[month] * WEEKDAY_WEIGHTS[weekday]
+    chosen = rng.choice(days, size=n, p=weights / weights.sum())
+    return chosen.astype("datetime64[s]") + rng.integers(0, 86400, n).astype("timedelta64[s]")
+
+def order_dates(n, start=START_DATE, end=END_DATE):
+    """Fechas de órdenes/pagos según DISTRIBUTIONS["order_dates"]."""
+    if DISTRIBUTIONS["order_dates"] == "seasonal":
+        return seasonal_dates(n, start, end)
+    return random_dates(n, start, end)
 
 def print_progress(section):
     print(f"✅ Generando {section}...")
 
-# =========================================================
-# ARCHIVO DE SALIDA
-# =========================================================
-sql_lines = []
-sql_lines.append("USE LootBox;\n")
-sql_lines.append("SET FOREIGN_KEY_CHECKS = 0;\n")
-
-print("🧩 Iniciando generación de datos para LootBox...\n")
-
-# =========================================================
-# 🧱 BLOQUE 2 — CATEGORÍAS, PROVEEDORES Y PRODUCTOS
-# =========================================================
-
-print_progress("Categorías, Proveedores y Productos")
-
 # ---------------------------------------------------------
-# 1️⃣ CATEGORÍAS
+# Formato de columnas como literales SQL
 # ---------------------------------------------------------
-category_names = [
-    "Figuras Funko Pop", "Cartas Coleccionables", "Cómics y Mangas", "Ropa Geek",
-    "Videojuegos", "Accesorios de Anime", "Coleccionables de Cine", "Decoración Gamer",
-    "Consolas Retro", "Posters y Arte"
-]
+def sql_str(arr):
+    """Arreglo de textos → literales SQL entre comillas."""
+    return np.char.add(np.char.add("'", np.asarray(arr).astype(str)), "'")
 
-sql_lines.append("-- CATEGORÍAS\n")
+def sql_int(arr):
+    return np.asarray(arr).astype(np.int64).astype(str)
 
-for name in category_names:
-    descripcion = sql_escape(fake.sentence(nb_words=8))
-    sql_lines.append(
-        f"INSERT INTO Categories (Nombre, Descripción) VALUES ('{name}', '{descripcion}');"
-    )
+def sql_nullable_int(arr):
+    """Como sql_int, pero los valores 0 se escriben como NULL."""
+    arr = np.asarray(arr)
+    return np.where(arr == 0, "NULL", arr.astype(np.int64).astype(str))
 
-# ---------------------------------------------------------
-# 2️⃣ PROVEEDORES
-# ---------------------------------------------------------
-sql_lines.append("\n-- PROVEEDORES\n")
-
-# Proveedores adaptados a marcas geek populares
-geek_suppliers = [
-    "Funko Inc.", "Bandai Spirits", "Nintendo Merch", "Hasbro Collectibles", "Crunchyroll Store",
-    "Marvel Licensing", "DC Universe Goods", "Square Enix Shop", "GameStop Partners", "Hot Topic Co.",
-    "Loungefly", "Good Smile Company", "Kotobukiya", "The Pokémon Company", "LEGO Collectors",
-    "Capcom Gear", "Namco Toys", "Wizards of the Coast", "Ubisoft Merch", "Blizzard Gear Store"
-]
-
-for i in range(NUM_SUPPLIERS):
-    nombre_prov = sql_escape(random.choice(geek_suppliers) + f" #{i+1}")
-    contacto = sql_escape(fake.name())
-    email = sql_escape(fake.company_email())
-    telefono = random_phone()
-    country_id = random.randint(1, NUM_PAISES)
-    sql_lines.append(
-        f"INSERT INTO Suppliers (`Nombre de proveedor`, `Nombre de contacto`, Email, `Teléfono`, Countries_ID) "
-        f"VALUES ('{nombre_prov}', '{contacto}', '{email}', '{telefono}', {country_id});"
-    )
+def sql_money(arr):
+    return np.char.mod("%.2f", np.asarray(arr, dtype=float))
 
-# ---------------------------------------------------------
-# 3️⃣ PRODUCTOS
-# ---------------------------------------------------------
-sql_lines.append("\n-- PRODUCTOS\n")
-
-# Temas geek para productos
-geek_brands = [
-    "Marvel", "DC", "Star Wars", "Harry Potter", "Pokémon", "Dragon Ball", "Naruto",
-    "One Piece", "Zelda", "Halo", "Spider-Man", "Batman", "Stranger Things", "Attack on Titan",
-    "Demon Slayer", "League of Legends", "Minecraft", "Elden Ring", "Final Fantasy", "Genshin Impact"
-]
-
-geek_items = [
-    "Funko Pop", "Figura de acción", "Camiseta", "Taza temática", "Sudadera", "Poster",
-    "Cartas coleccionables", "Set de pines", "Consola retro", "Mousepad RGB",
-    "Control Edición Limitada", "Llavero metálico", "Lámpara LED", "Caja misteriosa", "Réplica coleccionable"
-]
-
-# Relación aproximada entre tipo de ítem y categoría
-category_map = {
-    "Funko Pop": 1,  # Figuras Funko Pop
-    "Figura de acción": 1,
-    "Cartas coleccionables": 2,
-    "Cómic": 3,
-    "Manga": 3,
-    "Camiseta": 4,
-    "Sudadera": 4,
-    "Videojuego": 5,
-    "Accesorio": 6,
-    "Poster": 10,
-    "Set de pines": 6,
-    "Lámpara": 8,
-    "Consola retro": 9,
-    "Control Edición Limitada": 9,
-    "Caja misteriosa": 7,
-    "Réplica coleccionable": 7
-}
+def sql_datetime(arr):
+    """Arreglo datetime64 → literales 'YYYY-MM-DD HH:MM:SS'."""
+    text = np.char.replace(np.datetime_as_string(np.asarray(arr, dtype="datetime64[s]"), unit="s"), "T", " ")
+    return sql_str(text)
 
-for i in range(NUM_PRODUCTS):
-    brand = random.choice(geek_brands)
-    item = random.choice(geek_items)
-    personaje = fake.first_name()
-    nombre = sql_escape(f"{item} de {brand}: {personaje}")
-    precio = round(random.uniform(10, 800), 2)
-    categoria_id = category_map.get(item, random.randint(1, NUM_CATEGORIES))
-    supplier_id = random.randint(1, NUM_SUPPLIERS)
-    sql_lines.append(
-        f"INSERT INTO Products (`Nombre del producto`, Precio, `Categories_ID`, `Suppliers_ID`) "
-        f"VALUES ('{nombre}', {precio}, {categoria_id}, {supplier_id});"
-    )
+def insert_rows(table, columns):
+    """
+    Formatea un dict {columna_sql: arreglo_de_literales} como INSERTs
+    multi-fila de BATCH_SIZE filas cada uno.
+    """
+    names = list(columns.keys())
+    values = list(columns.values())
+    rows = values[0]
+    for col in values[1:]:
+        rows = np.char.add(np.char.add(rows, ", "), col)
+    rows = np.char.add(np.char.add("(", rows), ")")
+
+    header = f"INSERT INTO {table} ({', '.join(names)}) VALUES\n"
+    return [
+        header + ",\n".join(rows[i:i + BATCH_SIZE].tolist()) + ";"
+        for i in range(0, len(rows), BATCH_SIZE)
+    ]
 
 # =========================================================
-# 🧍 BLOQUE 3 — CLIENTES, USUARIOS Y EMPLEADOS
+# POOLS DE VALORES (se construyen una sola vez)
 # =========================================================
+FIRST_NAMES = build_pool(fake.first_name)
+LAST_NAMES = build_pool(fake.last_name)
+FULL_NAMES = build_pool(fake.name)
+EMAILS = build_pool(fake.email)
+COMPANY_EMAILS = build_pool(fake.company_email)
+ADDRESSES = build_pool(lambda: fake.address().replace("\n", ", "))
+STREET_ADDRESSES = build_pool(fake.street_address)
+SENTENCES_8 = build_pool(lambda: fake.sentence(nb_words=8))
+SENTENCES_10 = build_pool(lambda: fake.sentence(nb_words=10))
 
-print_progress("Clientes, Usuarios y Empleados")
-
-# ---------------------------------------------------------
-# CLIENTES
-# ---------------------------------------------------------
-sql_lines.append("\n-- CLIENTES\n")
-
-for i in range(NUM_CUSTOMERS):
-    nombre = sql_escape(fake.first_name())
-    apellido = sql_escape(fake.last_name())
-    email = sql_escape(fake.email())
-    telefono = random_phone()
-    direccion = sql_escape(fake.address().replace("\n", ", "))
-    city_id = random.randint(1, NUM_CIUDADES)
-    sql_lines.append(
-        f"INSERT INTO Customers (Nombre, Apellido, Email, `Teléfono`, `Dirección`, Cities_ID) "
-        f"VALUES ('{nombre}', '{apellido}', '{email}', '{telefono}', '{direccion}', {city_id});"
+# =========================================================
+# SNAPSHOT COMPLETO
+# =========================================================
+def generate_snapshot():
+    """Genera el snapshot completo (todas las tablas) como lista de sentencias SQL."""
+    sql_lines = []
+    sql_lines.append("USE LootBox;\n")
+    sql_lines.append("SET FOREIGN_KEY_CHECKS = 0;\n")
+
+    product_weights = popularity_weights(NUM_PRODUCTS)
+    customer_weights = activity_weights(NUM_CUSTOMERS)
+
+    # =========================================================
+    # 🧱 BLOQUE 2 — CATEGORÍAS, PROVEEDORES Y PRODUCTOS
+    # =========================================================
+
+    print_progress("Categorías, Proveedores y Productos")
+
+    # ---------------------------------------------------------
+    # 1️⃣ CATEGORÍAS
+    # ---------------------------------------------------------
+    category_names = [
+        "Figuras Funko Pop", "Cartas Coleccionables", "Cómics y Mangas", "Ropa Geek",
+        "Videojuegos", "Accesorios de Anime", "Coleccionables de Cine", "Decoración Gamer",
+        "Consolas Retro", "Posters y Arte"
+    ]
+
+    sql_lines.append("-- CATEGORÍAS\n")
+
+    sql_lines.extend(insert_rows("Categories", {
+        "Nombre": sql_str(category_names),
+        "Descripción": sql_str(draw(SENTENCES_8, len(category_names))),
+    }))
+
+    # ---------------------------------------------------------
+    # 2️⃣ PROVEEDORES
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- PROVEEDORES\n")
+
+    # Proveedores adaptados a marcas geek populares
+    geek_suppliers = [
+        "Funko Inc.", "Bandai Spirits", "Nintendo Merch", "Hasbro Collectibles", "Crunchyroll Store",
+        "Marvel Licensing", "DC Universe Goods", "Square Enix Shop", "GameStop Partners", "Hot Topic Co.",
+        "Loungefly", "Good Smile Company", "Kotobukiya", "The Pokémon Company", "LEGO Collectors",
+        "Capcom Gear", "Namco Toys", "Wizards of the Coast", "Ubisoft Merch", "Blizzard Gear Store"
+    ]
+
+    supplier_names = np.char.add(
+        draw([sql_escape(s) for s in geek_suppliers], NUM_SUPPLIERS),
+        np.char.add(" #", np.arange(1, NUM_SUPPLIERS + 1).astype(str)),
     )
-
-# ---------------------------------------------------------
-# USUARIOS (Clientes + Admin + Empleados)
-# ---------------------------------------------------------
-sql_lines.append("\n-- USUARIOS\n")
-
-# Usuarios de clientes (1 por cliente)
-for i in range(1, NUM_CUSTOMERS + 1):
-    username = f"user{i}"
-    email = f"user{i}@lootbox.com"
-    password = "user123"
-    sql_lines.append(
-        f"INSERT INTO Users (`Nombre de usuario`, Email, Contraseña, Rol, Estado, Customers_ID) "
-        f"VALUES ('{username}', '{email}', '{password}', 'cliente', 'activo', {i});"
+    sql_lines.extend(insert_rows("Suppliers", {
+        "`Nombre de proveedor`": sql_str(supplier_names),
+        "`Nombre de contacto`": sql_str(draw(FULL_NAMES, NUM_SUPPLIERS)),
+        "Email": sql_str(draw(COMPANY_EMAILS, NUM_SUPPLIERS)),
+        "`Teléfono`": sql_str(random_phones(NUM_SUPPLIERS)),
+        "Countries_ID": sql_int(random_ids(NUM_SUPPLIERS, NUM_PAISES)),
+    }))
+
+    # ---------------------------------------------------------
+    # 3️⃣ PRODUCTOS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- PRODUCTOS\n")
+
+    # Temas geek para productos
+    geek_brands = [
+        "Marvel", "DC", "Star Wars", "Harry Potter", "Pokémon", "Dragon Ball", "Naruto",
+        "One Piece", "Zelda", "Halo", "Spider-Man", "Batman", "Stranger Things", "Attack on Titan",
+        "Demon Slayer", "League of Legends", "Minecraft", "Elden Ring", "Final Fantasy", "Genshin Impact"
+    ]
+
+    geek_items = [
+        "Funko Pop", "Figura de acción", "Camiseta", "Taza temática", "Sudadera", "Poster",
+        "Cartas coleccionables", "Set de pines", "Consola retro", "Mousepad RGB",
+        "Control Edición Limitada", "Llavero metálico", "Lámpara LED", "Caja misteriosa", "Réplica coleccionable"
+    ]
+
+    # Relación aproximada entre tipo de ítem y categoría
+    category_map = {
+        "Funko Pop": 1,  # Figuras Funko Pop
+        "Figura de acción": 1,
+        "Cartas coleccionables": 2,
+        "Cómic": 3,
+        "Manga": 3,
+        "Camiseta": 4,
+        "Sudadera": 4,
+        "Videojuego": 5,
+        "Accesorio": 6,
+        "Poster": 10,
+        "Set de pines": 6,
+        "Lámpara": 8,
+        "Consola retro": 9,
+        "Control Edición Limitada": 9,
+        "Caja misteriosa": 7,
+        "Réplica coleccionable": 7
+    }
+
+    item_idx = rng.integers(0, len(geek_items), NUM_PRODUCTS)
+    product_names = np.char.add(
+        np.char.add(np.array(geek_items)[item_idx], " de "),
+        np.char.add(np.char.add(draw(geek_brands, NUM_PRODUCTS), ": "), draw(FIRST_NAMES, NUM_PRODUCTS)),
+    )
+    # Ítems sin categoría en category_map (0) reciben una categoría aleatoria
+    item_category = np.array([category_map.get(item, 0) for item in geek_items])[item_idx]
+    product_category = np.where(item_category == 0, random_ids(NUM_PRODUCTS, NUM_CATEGORIES), item_category)
+    product_prices = np.round(rng.uniform(10, 800, NUM_PRODUCTS), 2)
+
+    sql_lines.extend(insert_rows("Products", {
+        "`Nombre del producto`": sql_str(product_names),
+        "Precio": sql_money(product_prices),
+        "`Categories_ID`": sql_int(product_category),
+        "`Suppliers_ID`": sql_int(random_ids(NUM_PRODUCTS, NUM_SUPPLIERS)),
+    }))
+
+    # =========================================================
+    # 🧍 BLOQUE 3 — CLIENTES, USUARIOS Y EMPLEADOS
+    # =========================================================
+
+    print_progress("Clientes, Usuarios y Empleados")
+
+    # ---------------------------------------------------------
+    # CLIENTES
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- CLIENTES\n")
+
+    # El pool tiene menos emails que clientes: el número de cliente en la
+    # parte local los hace únicos (nombre.apellido42@dominio)
+    email_parts = np.char.partition(draw(EMAILS, NUM_CUSTOMERS), "@")
+    customer_emails = np.char.add(
+        np.char.add(email_parts[:, 0], np.arange(1, NUM_CUSTOMERS + 1).astype(str)),
+        np.char.add("@", email_parts[:, 2]),
     )
 
-# Usuario administrador general
-sql_lines.append(
-    "INSERT INTO Users (`Nombre de usuario`, Email, Contraseña, Rol, Estado) "
-    "VALUES ('admin', 'admin@lootbox.com', 'admin123', 'admin', 'activo');"
-)
-
-# Usuarios de empleados (después del admin)
-for i in range(NUM_EMPLOYEES):
-    username = f"empleado{i+1}"
-    email = f"empleado{i+1}@lootbox.com"
-    password = "emp123"
+    sql_lines.extend(insert_rows("Customers", {
+        "Nombre": sql_str(draw(FIRST_NAMES, NUM_CUSTOMERS)),
+        "Apellido": sql_str(draw(LAST_NAMES, NUM_CUSTOMERS)),
+        "Email": sql_str(customer_emails),
+        "`Teléfono`": sql_str(random_phones(NUM_CUSTOMERS)),
+        "`Dirección`": sql_str(draw(ADDRESSES, NUM_CUSTOMERS)),
+        "Cities_ID": sql_int(random_ids(NUM_CUSTOMERS, NUM_CIUDADES)),
+    }))
+
+    # ---------------------------------------------------------
+    # USUARIOS (Clientes + Admin + Empleados)
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- USUARIOS\n")
+
+    # Usuarios de clientes (1 por cliente)
+    customer_ids = np.arange(1, NUM_CUSTOMERS + 1).astype(str)
+    sql_lines.extend(insert_rows("Users", {
+        "`Nombre de usuario`": sql_str(np.char.add("user", customer_ids)),
+        "Email": sql_str(np.char.add(np.char.add("user", customer_ids), "@lootbox.com")),
+        "Contraseña": np.full(NUM_CUSTOMERS, "'user123'"),
+        "Rol": np.full(NUM_CUSTOMERS, "'cliente'"),
+        "Estado": np.full(NUM_CUSTOMERS, "'activo'"),
+        "Customers_ID": customer_ids,
+    }))
+
+    # Usuario administrador general
     sql_lines.append(
-        f"INSERT INTO Users (`Nombre de usuario`, Email, Contraseña, Rol, Estado) "
-        f"VALUES ('{username}', '{email}', '{password}', 'empleado', 'activo');"
+        "INSERT INTO Users (`Nombre de usuario`, Email, Contraseña, Rol, Estado) "
+        "VALUES ('admin', 'admin@lootbox.com', 'admin123', 'admin', 'activo');"
     )
 
-# ---------------------------------------------------------
-# EMPLEADOS
-# ---------------------------------------------------------
-sql_lines.append("\n-- EMPLEADOS\n")
-
-roles = ["Vendedor", "Atención al cliente", "Repartidor", "Gerente", "Supervisor"]
-for i in range(NUM_EMPLOYEES):
-    nombre = sql_escape(fake.first_name())
-    apellido = sql_escape(fake.last_name())
-    email = f"empleado{i+1}@lootbox.com"
-    telefono = random_phone()
-    rol = random.choice(roles)
+    # Usuarios de empleados (después del admin)
+    employee_usernames = np.char.add("empleado", np.arange(1, NUM_EMPLOYEES + 1).astype(str))
+    employee_emails = np.char.add(employee_usernames, "@lootbox.com")
+    sql_lines.extend(insert_rows("Users", {
+        "`Nombre de usuario`": sql_str(employee_usernames),
+        "Email": sql_str(employee_emails),
+        "Contraseña": np.full(NUM_EMPLOYEES, "'emp123'"),
+        "Rol": np.full(NUM_EMPLOYEES, "'empleado'"),
+        "Estado": np.full(NUM_EMPLOYEES, "'activo'"),
+    }))
+
+    # ---------------------------------------------------------
+    # EMPLEADOS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- EMPLEADOS\n")
+
+    roles = ["Vendedor", "Atención al cliente", "Repartidor", "Gerente", "Supervisor"]
     # ID de usuario correspondiente (clientes + 1 admin + offset empleados)
-    user_id = NUM_CUSTOMERS + 1 + (i + 1)
-    sql_lines.append(
-        f"INSERT INTO Employees (Nombre, Apellido, Email, `Teléfono`, Rol, Users_ID) "
-        f"VALUES ('{nombre}', '{apellido}', '{email}', '{telefono}', '{rol}', {user_id});"
+    employee_user_ids = NUM_CUSTOMERS + 1 + np.arange(1, NUM_EMPLOYEES + 1)
+    sql_lines.extend(insert_rows("Employees", {
+        "Nombre": sql_str(draw(FIRST_NAMES, NUM_EMPLOYEES)),
+        "Apellido": sql_str(draw(LAST_NAMES, NUM_EMPLOYEES)),
+        "Email": sql_str(employee_emails),
+        "`Teléfono`": sql_str(random_phones(NUM_EMPLOYEES)),
+        "Rol": sql_str(draw(roles, NUM_EMPLOYEES)),
+        "Users_ID": sql_int(employee_user_ids),
+    }))
+
+    # =========================================================
+    # 🚚 BLOQUE 4 — WAREHOUSES, INVENTORY MOVEMENTS Y SHIPMENTS
+    # =========================================================
+
+    print_progress("Warehouses, Movimientos de Inventario y Envíos")
+
+    # ---------------------------------------------------------
+    # WAREHOUSES
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- WAREHOUSES\n")
+
+    sql_lines.extend(insert_rows("Warehouses", {
+        "Nombre": sql_str(np.char.add("Bodega ", np.arange(1, NUM_WAREHOUSES + 1).astype(str))),
+        "`Dirección`": sql_str(draw(STREET_ADDRESSES, NUM_WAREHOUSES)),
+        "Cities_ID": sql_int(random_ids(NUM_WAREHOUSES, NUM_CIUDADES)),
+    }))
+
+    # ---------------------------------------------------------
+    # INVENTORY MOVEMENTS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- INVENTORY MOVEMENTS\n")
+
+    tipos_mov = ["IN", "OUT"]
+    sql_lines.extend(insert_rows("inventory_movements", {
+        "Products_ID": sql_int(weighted_ids(NUM_INVENTORY_MOVES, product_weights)),
+        "Warehouses_ID": sql_int(random_ids(NUM_INVENTORY_MOVES, NUM_WAREHOUSES)),
+        "Cantidad": sql_int(rng.integers(1, 51, NUM_INVENTORY_MOVES)),
+        "`Tipo de movimiento`": sql_str(draw(tipos_mov, NUM_INVENTORY_MOVES)),
+        "`Fecha del movimiento`": sql_datetime(random_dates(NUM_INVENTORY_MOVES)),
+        "Employees_ID": sql_int(random_ids(NUM_INVENTORY_MOVES, NUM_EMPLOYEES)),
+    }))
+
+    # ---------------------------------------------------------
+    # SHIPMENTS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- SHIPMENTS\n")
+
+    status_opts = ["EN TRANSITO", "ENTREGADO", "RETRASADO"]
+    f_envio = random_dates(NUM_SHIPMENTS)
+    f_entrega = f_envio + rng.integers(1, 8, NUM_SHIPMENTS).astype("timedelta64[D]")
+    sql_lines.extend(insert_rows("Shipments", {
+        "`Fecha de envio`": sql_datetime(f_envio),
+        "`Fecha de entrega`": sql_datetime(f_entrega),
+        "Status": sql_str(draw(status_opts, NUM_SHIPMENTS)),
+        "Warehouses_ID": sql_int(random_ids(NUM_SHIPMENTS, NUM_WAREHOUSES)),
+    }))
+
+    # =========================================================
+    # 💳 BLOQUE 5 — PAYMENTS, ORDERS, ORDER_ITEMS Y DEVOLUCIONES
+    # =========================================================
+
+    print_progress("Pagos, Órdenes, Detalles y Devoluciones")
+
+    # ---------------------------------------------------------
+    # PAYMENTS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- PAYMENTS\n")
+
+    metodos_pago = ["EFECTIVO", "TARJETA", "TRANSFERENCIA"]
+    sql_lines.extend(insert_rows("Payments", {
+        "`Fecha de pago`": sql_datetime(order_dates(NUM_PAYMENTS)),
+        "`Método de  pago`": sql_str(draw(metodos_pago, NUM_PAYMENTS)),
+        "`Cantidad`": sql_money(rng.uniform(50, 8000, NUM_PAYMENTS)),
+        "Customers_ID": sql_int(weighted_ids(NUM_PAYMENTS, customer_weights)),
+    }))
+
+    # ---------------------------------------------------------
+    # ORDER ITEMS (se generan antes que ORDERS para derivar el Total)
+    # ---------------------------------------------------------
+    item_order_ids, item_product_ids = draw_order_items(NUM_ORDERS, product_weights)
+    num_items = len(item_order_ids)
+
+    item_cantidades = rng.integers(1, 6, num_items)
+    if DISTRIBUTIONS["totals_from_items"]:
+        # Precio por unidad = precio de catálogo del producto
+        item_precios = product_prices[item_product_ids - 1]
+        order_totals = np.bincount(
+            item_order_ids - 1, weights=item_cantidades * item_precios, minlength=NUM_ORDERS
+        )
+    else:
+        item_precios = np.round(rng.uniform(20, 5000, num_items), 2)
+        order_totals = rng.uniform(100, 15000, NUM_ORDERS)
+
+    # ---------------------------------------------------------
+    # ORDERS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- ORDERS\n")
+
+    status_orden = ["PENDIENTE", "ENVIADO", "ENTREGADO", "REGRESADO"]
+    # Fechas ordenadas: el ID de la orden crece con el tiempo, como en producción
+    fechas_orden = np.sort(order_dates(NUM_ORDERS))
+    order_customer_ids = weighted_ids(NUM_ORDERS, customer_weights)
+    sql_lines.extend(insert_rows("Ordenes", {
+        "`Fecha de la orden`": sql_datetime(fechas_orden),
+        "Status": sql_str(draw(status_orden, NUM_ORDERS)),
+        "Total": sql_money(order_totals),
+        "Payments_ID": sql_int(random_ids(NUM_ORDERS, NUM_PAYMENTS)),
+        "Customers_ID": sql_int(order_customer_ids),
+        "Employees_ID": sql_int(random_ids(NUM_ORDERS, NUM_EMPLOYEES)),
+        "Shipments_ID": sql_int(random_ids(NUM_ORDERS, NUM_SHIPMENTS)),
+    }))
+
+    # ---------------------------------------------------------
+    # DEVOLUCIONES (vinculadas en memoria a una línea de orden)
+    # ---------------------------------------------------------
+    # Cada devolución corresponde a una línea de Order_items distinta, así
+    # Devoluciones.Ordenes_ID, el cliente y el reembolso son coherentes con la
+    # orden y no hace falta un UPDATE posterior sobre Order_items.
+    razones = [
+        "Producto defectuoso", "Error en el tamaño", "Color incorrecto",
+        "Retraso en la entrega", "No era lo esperado", "Pedido incompleto"
+    ]
+    num_devoluciones = min(NUM_DEVOLUCIONES, num_items)
+    dev_item_pos = rng.choice(num_items, size=num_devoluciones, replace=False)
+    dev_order_idx = item_order_ids[dev_item_pos] - 1
+    fechas_devolucion = np.minimum(
+        fechas_orden[dev_order_idx]
+        + rng.integers(1, 31, num_devoluciones).astype("timedelta64[D]"),
+        np.datetime64(END_DATE, "s"),
     )
+    # IDs de devolución en orden cronológico
+    dev_sort = np.argsort(fechas_devolucion, kind="stable")
+    dev_item_pos = dev_item_pos[dev_sort]
+    dev_order_idx = dev_order_idx[dev_sort]
+    fechas_devolucion = fechas_devolucion[dev_sort]
+
+    item_devolucion_ids = np.zeros(num_items, dtype=np.int64)  # 0 = NULL
+    item_devolucion_ids[dev_item_pos] = np.arange(1, num_devoluciones + 1)
+
+    # ---------------------------------------------------------
+    # ORDER ITEMS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- ORDER ITEMS\n")
+
+    sql_lines.extend(insert_rows("Order_items", {
+        "Products_ID": sql_int(item_product_ids),
+        "Ordenes_ID": sql_int(item_order_ids),
+        "Cantidad": sql_int(item_cantidades),
+        "`Precio por unidad`": sql_money(item_precios),
+        "Devoluciones_ID": sql_nullable_int(item_devolucion_ids),
+    }))
+
+    sql_lines.append("\n-- DEVOLUCIONES\n")
+
+    sql_lines.extend(insert_rows("Devoluciones", {
+        "Razón": sql_str(draw(razones, num_devoluciones)),
+        "`Fecha de devolución`": sql_datetime(fechas_devolucion),
+        "`Cantidad de reembolso`": sql_money(
+            item_cantidades[dev_item_pos] * item_precios[dev_item_pos]
+        ),
+        "Ordenes_ID": sql_int(dev_order_idx + 1),
+        "Customers_ID": sql_int(order_customer_ids[dev_order_idx]),
+    }))
+
+    # =========================================================
+    # 🎁 BLOQUE 6 — PROMOTIONS Y LOYALTY MOVEMENTS
+    # =========================================================
+
+    print_progress("Promociones y Movimientos de Lealtad")
+
+    # ---------------------------------------------------------
+    # PROMOTIONS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- PROMOTIONS\n")
+
+    geek_promos = [
+        "Semana del Anime",
+        "2x1 en Funkos Marvel",
+        "Descuento Gamer Weekend",
+        "Mes de los Superhéroes",
+        "Evento Retro Consolas",
+        "Black Friday Geek",
+        "Colecciona y Gana",
+        "Semana del Cómic",
+        "Festival Otaku",
+        "Cyber LootBox Days"
+    ]
+
+    fecha_inicio = random_dates(NUM_PROMOTIONS, START_DATE, END_DATE - timedelta(days=30))
+    fecha_fin = fecha_inicio + rng.integers(10, 61, NUM_PROMOTIONS).astype("timedelta64[D]")
+    sql_lines.extend(insert_rows("Promotions", {
+        "Nombre": sql_str(np.array(geek_promos)[np.arange(NUM_PROMOTIONS) % len(geek_promos)]),
+        "Descripción": sql_str(draw(SENTENCES_10, NUM_PROMOTIONS)),
+        "Descuento_porcentaje": sql_money(rng.uniform(5, 40, NUM_PROMOTIONS)),
+        "Fecha_inicio": sql_datetime(fecha_inicio),
+        "Fecha_fin": sql_datetime(fecha_fin),
+        "Activa": sql_int(rng.integers(0, 2, NUM_PROMOTIONS)),
+        "Categories_ID": sql_int(random_ids(NUM_PROMOTIONS, NUM_CATEGORIES)),
+    }))
+
+    # ---------------------------------------------------------
+    # LOYALTY MOVEMENTS
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- LOYALTY MOVEMENTS\n")
+
+    geek_loyalty_descriptions = [
+        "Compra de figura Funko",
+        "Canje de puntos por carta rara",
+        "Bonificación por evento de anime",
+        "Devolución de producto coleccionable",
+        "Compra durante promoción gamer",
+        "Participación en torneo de TCG",
+        "Compra anticipada de edición limitada"
+    ]
+
+    sql_lines.extend(insert_rows("Loyalty_movements", {
+        "Fecha": sql_datetime(random_dates(NUM_LOYALTY_MOVES)),
+        "Puntos_cambio": sql_int(rng.integers(-50, 151, NUM_LOYALTY_MOVES)),  # algunos suman, otros restan
+        "Descripción": sql_str(draw(geek_loyalty_descriptions, NUM_LOYALTY_MOVES)),
+        "Customers_ID": sql_int(weighted_ids(NUM_LOYALTY_MOVES, customer_weights)),
+        "Ordenes_ID": sql_int(random_ids(NUM_LOYALTY_MOVES, NUM_ORDERS)),
+    }))
+
+    # ---------------------------------------------------------
+    # FINALIZAR ARCHIVO
+    # ---------------------------------------------------------
+    sql_lines.append("\n-- REACTIVAR CLAVES FORÁNEAS\n")
+    sql_lines.append("SET FOREIGN_KEY_CHECKS = 1;\n")
+
+    return sql_lines
 
 # =========================================================
-# 🚚 BLOQUE 4 — WAREHOUSES, INVENTORY MOVEMENTS Y SHIPMENTS
+# MODO INCREMENTAL (--append-days)
 # =========================================================
+def read_db_state():
+    """
+    Lee de la base los IDs máximos y los catálogos (productos, clientes,
+    empleados, bodegas) necesarios para continuar los datos existentes.
+    """
+    from DB_Proyecto import db
+
+    def ids(table):
+        rows = db.run_select(f"SELECT ID FROM {table} ORDER BY ID")
+        return np.array([r["ID"] for r in rows], dtype=np.int64)
+
+    def max_id(table):
+        rows = db.run_select(f"SELECT COALESCE(MAX(ID), 0) AS max_id FROM {table}")
+        return int(rows[0]["max_id"]) if rows else 0
+
+    products = db.run_select("SELECT ID, Precio FROM Products ORDER BY ID")
+    last_order = db.run_select("SELECT MAX(`Fecha de la orden`) AS fecha FROM Ordenes")
+    return {
+        "product_ids": np.array([p["ID"] for p in products], dtype=np.int64),
+        "product_prices": np.array([float(p["Precio"]) for p in products]),
+        "customer_ids": ids("Customers"),
+        "employee_ids": ids("Employees"),
+        "warehouse_ids": ids("Warehouses"),
+        "max_ids": {
+            table: max_id(table)
+            for table in ("Payments", "Shipments", "Ordenes", "Loyalty_movements")
+        },
+        "last_order_date": last_order[0]["fecha"] if last_order else None,
+    }
+
+
+def generate_append(days, orders_per_day=APPEND_ORDERS_PER_DAY):
+    """
+    Genera `days` días adicionales a partir del día siguiente a la última orden:
+    órdenes (con items, un pago y un envío cada una), movimientos de inventario
+    (OUT por línea vendida + reabastecimientos IN) y movimientos de lealtad.
+    Los IDs se escriben explícitos continuando los máximos actuales.
+    Nunca genera fechas futuras: solo agrega días completos anteriores a hoy
+    y devuelve [] si la última orden ya es de ayer o de hoy.
+    """
+    global rng
+
+    state = read_db_state()
+    catalogs = ("product_ids", "customer_ids", "employee_ids", "warehouse_ids")
+    if any(len(state[name]) == 0 for name in catalogs):
+        raise RuntimeError(
+            "La base no tiene productos, clientes, empleados o bodegas: carga primero el snapshot."
+        )
 
-print_progress("Warehouses, Movimientos de Inventario y Envíos")
-
-# ---------------------------------------------------------
-# WAREHOUSES
-# ---------------------------------------------------------
-sql_lines.append("\n-- WAREHOUSES\n")
-
-for i in range(NUM_WAREHOUSES):
-    nombre = f"Bodega {i+1}"
-    direccion = sql_escape(fake.street_address())
-    city_id = random.randint(1, NUM_CIUDADES)
-    sql_lines.append(
-        f"INSERT INTO Warehouses (Nombre, `Dirección`, Cities_ID) "
-        f"VALUES ('{nombre}', '{direccion}', {city_id});"
-    )
-
-# ---------------------------------------------------------
-# INVENTORY MOVEMENTS
-# ---------------------------------------------------------
-sql_lines.append("\n-- INVENTORY MOVEMENTS\n")
-
-tipos_mov = ["IN", "OUT"]
-for i in range(NUM_INVENTORY_MOVES):
-    producto_id = random.randint(1, NUM_PRODUCTS)
-    warehouse_id = random.randint(1, NUM_WAREHOUSES)
-    cantidad = random.randint(1, 50)
-    tipo = random.choice(tipos_mov)
-    fecha = random_date()
-    empleado_id = random.randint(1, NUM_EMPLOYEES)
-    sql_lines.append(
-        f"INSERT INTO inventory_movements (Products_ID, Warehouses_ID, Cantidad, `Tipo de movimiento`, `Fecha del movimiento`, Employees_ID) "
-        f"VALUES ({producto_id}, {warehouse_id}, {cantidad}, '{tipo}', '{fecha:%Y-%m-%d %H:%M:%S}', {empleado_id});"
+    last = state["last_order_date"] or START_DATE
+    start = datetime.combine(last.date() + timedelta(days=1), datetime.min.time())
+    now = datetime.now().replace(microsecond=0)
+    today = datetime.combine(now.date(), datetime.min.time())
+    end = min(start + timedelta(days=days), today)
+    if end <= start:
+        print(f"⏭️ La última orden es del {last:%Y-%m-%d}: no hay días completos que agregar.")
+        return []
+    days = (end - start).days
+    max_ids = state["max_ids"]
+
+    # Semilla derivada del estado: cada corrida continúa con datos distintos
+    rng = np.random.default_rng([max_ids["Ordenes"], start.toordinal()])
+
+    product_weights = popularity_weights(len(state["product_ids"]))
+    customer_weights = activity_weights(len(state["customer_ids"]))
+
+    # ---------------------------------------------------------
+    # ÓRDENES + ITEMS
+    # ---------------------------------------------------------
+    n = orders_per_day * days
+    order_ids = max_ids["Ordenes"] + np.arange(1, n + 1)
+    payment_ids = max_ids["Payments"] + np.arange(1, n + 1)
+    shipment_ids = max_ids["Shipments"] + np.arange(1, n + 1)
+    fechas_orden = np.sort(order_dates(n, start, end))
+    customers = state["customer_ids"][weighted_ids(n, customer_weights) - 1]
+    employees = draw(state["employee_ids"], n)
+    warehouses = draw(state["warehouse_ids"], n)
+
+    item_orders, item_products = draw_order_items(n, product_weights)
+    item_idx = item_orders - 1
+    item_product_ids = state["product_ids"][item_products - 1]
+    item_precios = state["product_prices"][item_products - 1]
+    item_cantidades = rng.integers(1, 6, len(item_idx))
+    order_totals = np.bincount(item_idx, weights=item_cantidades * item_precios, minlength=n)
+
+    # Envíos: salen 0-2 días después de la orden (a más tardar ahora) y
+    # tardan 1-7 días; solo están ENTREGADO si la entrega ya ocurrió
+    now_s = np.datetime64(now, "s")
+    f_envio = np.minimum(fechas_orden + rng.integers(0, 2 * 86400, n).astype("timedelta64[s]"), now_s)
+    f_entrega = f_envio + rng.integers(1, 8, n).astype("timedelta64[D]")
+    ship_status = np.where(f_entrega <= now_s, "ENTREGADO", "EN TRANSITO")
+    ship_status[rng.random(n) < 0.05] = "RETRASADO"
+    order_status = np.where(ship_status == "ENTREGADO", "ENTREGADO", "ENVIADO")
+
+    # ---------------------------------------------------------
+    # MOVIMIENTOS DE INVENTARIO
+    # ---------------------------------------------------------
+    n_in = APPEND_RESTOCKS_PER_DAY * days
+    mov_products = np.concatenate([
+        item_product_ids, state["product_ids"][weighted_ids(n_in, product_weights) - 1],
+    ])
+    mov_warehouses = np.concatenate([warehouses[item_idx], draw(state["warehouse_ids"], n_in)])
+    mov_cantidades = np.concatenate([item_cantidades, rng.integers(10, 101, n_in)])
+    mov_tipos = np.concatenate([np.full(len(item_idx), "OUT"), np.full(n_in, "IN")])
+    mov_fechas = np.concatenate([f_envio[item_idx], random_dates(n_in, start, end)])
+    mov_employees = np.concatenate([employees[item_idx], draw(state["employee_ids"], n_in)])
+    # PK (Products_ID, Warehouses_ID, Fecha del movimiento): descartar choques
+    keys = np.stack([mov_products, mov_warehouses, mov_fechas.astype(np.int64)], axis=1)
+    _, keep = np.unique(keys, axis=0, return_index=True)
+    keep = np.sort(keep)
+
+    # ---------------------------------------------------------
+    # MOVIMIENTOS DE LEALTAD (puntos por compra)
+    # ---------------------------------------------------------
+    loyalty_idx = np.flatnonzero(rng.random(n) < APPEND_LOYALTY_RATE)
+    num_loyalty = len(loyalty_idx)
+
+    sql_lines = []
+    sql_lines.extend(insert_rows("Payments", {
+        "ID": sql_int(payment_ids),
+        "`Fecha de pago`": sql_datetime(fechas_orden),
+        "`Método de  pago`": sql_str(draw(["EFECTIVO", "TARJETA", "TRANSFERENCIA"], n)),
+        "`Cantidad`": sql_money(order_totals),
+        "Customers_ID": sql_int(customers),
+    }))
+    sql_lines.extend(insert_rows("Shipments", {
+        "ID": sql_int(shipment_ids),
+        "`Fecha de envio`": sql_datetime(f_envio),
+        "`Fecha de entrega`": sql_datetime(f_entrega),
+        "Status": sql_str(ship_status),
+        "Warehouses_ID": sql_int(warehouses),
+    }))
+    sql_lines.extend(insert_rows("Ordenes", {
+        "ID": sql_int(order_ids),
+        "`Fecha de la orden`": sql_datetime(fechas_orden),
+        "Status": sql_str(order_status),
+        "Total": sql_money(order_totals),
+        "Payments_ID": sql_int(payment_ids),
+        "Customers_ID": sql_int(customers),
+        "Employees_ID": sql_int(employees),
+        "Shipments_ID": sql_int(shipment_ids),
+    }))
+    sql_lines.extend(insert_rows("Order_items", {
+        "Products_ID": sql_int(item_product_ids),
+        "Ordenes_ID": sql_int(order_ids[item_idx]),
+        "Cantidad": sql_int(item_cantidades),
+        "`Precio por unidad`": sql_money(item_precios),
+    }))
+    sql_lines.extend(insert_rows("inventory_movements", {
+        "Products_ID": sql_int(mov_products[keep]),
+        "Warehouses_ID": sql_int(mov_warehouses[keep]),
+        "Cantidad": sql_int(mov_cantidades[keep]),
+        "`Tipo de movimiento`": sql_str(mov_tipos[keep]),
+        "`Fecha del movimiento`": sql_datetime(mov_fechas[keep]),
+        "Employees_ID": sql_int(mov_employees[keep]),
+    }))
+    if num_loyalty:
+        sql_lines.extend(insert_rows("Loyalty_movements", {
+            "ID": sql_int(max_ids["Loyalty_movements"] + np.arange(1, num_loyalty + 1)),
+            "Fecha": sql_datetime(fechas_orden[loyalty_idx]),
+            "Puntos_cambio": sql_int(order_totals[loyalty_idx] // 100),
+            "Descripción": np.full(num_loyalty, "'Puntos por compra'"),
+            "Customers_ID": sql_int(customers[loyalty_idx]),
+            "Ordenes_ID": sql_int(order_ids[loyalty_idx]),
+        }))
+
+    print(
+        f"📦 {days} día(s) desde {start:%Y-%m-%d}: {n} órdenes, {len(item_idx)} items, "
+        f"{len(keep)} movimientos de inventario, {num_loyalty} movimientos de lealtad."
     )
+    return sql_lines
 
-# ---------------------------------------------------------
-# SHIPMENTS
-# ---------------------------------------------------------
-sql_lines.append("\n-- SHIPMENTS\n")
-
-status_opts = ["EN TRANSITO", "ENTREGADO", "RETRASADO"]
-for i in range(NUM_SHIPMENTS):
-    f_envio = random_date()
-    f_entrega = f_envio + timedelta(days=random.randint(1, 7))
-    status = random.choice(status_opts)
-    warehouse_id = random.randint(1, NUM_WAREHOUSES)
-    sql_lines.append(
-        f"INSERT INTO Shipments (`Fecha de envio`, `Fecha de entrega`, Status, Warehouses_ID) "
-        f"VALUES ('{f_envio:%Y-%m-%d %H:%M:%S}', '{f_entrega:%Y-%m-%d %H:%M:%S}', '{status}', {warehouse_id});"
-    )
 
 # =========================================================
-# 💳 BLOQUE 5 — PAYMENTS, ORDERS, ORDER_ITEMS Y DEVOLUCIONES
+# MAIN
 # =========================================================
-
-print_progress("Pagos, Órdenes, Detalles y Devoluciones")
-
-# ---------------------------------------------------------
-# PAYMENTS
-# ---------------------------------------------------------
-sql_lines.append("\n-- PAYMENTS\n")
-
-metodos_pago = ["EFECTIVO", "TARJETA", "TRANSFERENCIA"]
-for i in range(NUM_PAYMENTS):
-    fecha_pago = random_date()
-    metodo = random.choice(metodos_pago)
-    cantidad = round(random.uniform(50, 8000), 2)
-    cliente_id = random.randint(1, NUM_CUSTOMERS)
-    sql_lines.append(
-        f"INSERT INTO Payments (`Fecha de pago`, `Método de  pago`, `Cantidad`, Customers_ID) "
-        f"VALUES ('{fecha_pago:%Y-%m-%d %H:%M:%S}', '{metodo}', {cantidad}, {cliente_id});"
+def main():
+    parser = argparse.ArgumentParser(description="Generador de datos para LootBox.")
+    parser.add_argument(
+        "--append-days", type=int, default=0,
+        help="Agrega N días de datos continuando los IDs de la base (en lugar del snapshot completo).",
     )
-
-# ---------------------------------------------------------
-# ORDERS
-# ---------------------------------------------------------
-sql_lines.append("\n-- ORDERS\n")
-
-status_orden = ["PENDIENTE", "ENVIADO", "ENTREGADO", "REGRESADO"]
-for i in range(NUM_ORDERS):
-    fecha_orden = random_date()
-    status = random.choice(status_orden)
-    total = round(random.uniform(100, 15000), 2)
-    payment_id = random.randint(1, NUM_PAYMENTS)
-    customer_id = random.randint(1, NUM_CUSTOMERS)
-    employee_id = random.randint(1, NUM_EMPLOYEES)
-    shipment_id = random.randint(1, NUM_SHIPMENTS)
-    sql_lines.append(
-        f"INSERT INTO Ordenes (`Fecha de la orden`, Status, Total, Payments_ID, Customers_ID, Employees_ID, Shipments_ID) "
-        f"VALUES ('{fecha_orden:%Y-%m-%d %H:%M:%S}', '{status}', {total}, {payment_id}, {customer_id}, {employee_id}, {shipment_id});"
+    parser.add_argument(
+        "--orders-per-day", type=int, default=APPEND_ORDERS_PER_DAY,
+        help="Órdenes por día en modo --append-days.",
     )
-
-# ---------------------------------------------------------
-# ORDER ITEMS
-# ---------------------------------------------------------
-sql_lines.append("\n-- ORDER ITEMS\n")
-
-for order_id in range(1, NUM_ORDERS + 1):
-    num_items = random.randint(1, NUM_ORDER_ITEMS_MAX)
-    productos_asignados = set()  # evitar productos duplicados por orden
-    for _ in range(num_items):
-        prod_id = random.randint(1, NUM_PRODUCTS)
-        while prod_id in productos_asignados:
-            prod_id = random.randint(1, NUM_PRODUCTS)
-        productos_asignados.add(prod_id)
-        cantidad = random.randint(1, 5)
-        precio_u = round(random.uniform(20, 5000), 2)
-        sql_lines.append(
-            f"INSERT INTO Order_items (Products_ID, Ordenes_ID, Cantidad, `Precio por unidad`) "
-            f"VALUES ({prod_id}, {order_id}, {cantidad}, {precio_u});"
-        )
-
-# ---------------------------------------------------------
-# DEVOLUCIONES
-# ---------------------------------------------------------
-sql_lines.append("\n-- DEVOLUCIONES\n")
-
-razones = [
-    "Producto defectuoso", "Error en el tamaño", "Color incorrecto",
-    "Retraso en la entrega", "No era lo esperado", "Pedido incompleto"
-]
-for i in range(NUM_DEVOLUCIONES):
-    fecha_dev = random_date()
-    monto = round(random.uniform(50, 2000), 2)
-    orden_id = random.randint(1, NUM_ORDERS)
-    cliente_id = random.randint(1, NUM_CUSTOMERS)
-    razon = sql_escape(random.choice(razones))
-    sql_lines.append(
-        f"INSERT INTO Devoluciones (Razón, `Fecha de devolución`, `Cantidad de reembolso`, Ordenes_ID, Customers_ID) "
-        f"VALUES ('{razon}', '{fecha_dev:%Y-%m-%d %H:%M:%S}', {monto}, {orden_id}, {cliente_id});"
+    parser.add_argument(
+        "--output",
+        help="En modo --append-days, escribe el SQL en este archivo en lugar de ejecutarlo.",
     )
+    args = parser.parse_args()
 
-# ---------------------------------------------------------
-# RELACIONAR DEVOLUCIONES CON ORDER_ITEMS
-# ---------------------------------------------------------
-sql_lines.append("\n-- RELACIONAR DEVOLUCIONES CON ORDER_ITEMS\n")
+    if args.append_days > 0:
+        print("🧩 Agregando datos incrementales a LootBox...\n")
+        statements = generate_append(args.append_days, args.orders_per_day)
+        if not statements:
+            return
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write("USE LootBox;\n\n" + "\n".join(statements))
+            print(f"📄 {args.output}")
+            return
 
-# Elegimos algunas devoluciones para vincular con un item específico
-num_relaciones = min(NUM_DEVOLUCIONES, NUM_ORDERS // 2)  # máximo la mitad de las órdenes
-for i in range(1, num_relaciones + 1):
-    devolucion_id = i
-    orden_id = random.randint(1, NUM_ORDERS)
-    sql_lines.append(
-        f"UPDATE Order_items "
-        f"SET Devoluciones_ID = {devolucion_id} "
-        f"WHERE Ordenes_ID = {orden_id} "
-        f"AND Devoluciones_ID IS NULL "
-        f"LIMIT 1;"
-    )
+        from DB_Proyecto import db
 
-# =========================================================
-# 🎁 BLOQUE 6 — PROMOTIONS Y LOYALTY MOVEMENTS
-# =========================================================
+        ok, error = db.run_statements(statements)
+        print("✅ Datos agregados correctamente." if ok else f"❌ {error}")
+        return
 
-print_progress("Promociones y Movimientos de Lealtad")
+    print("🧩 Iniciando generación de datos para LootBox...\n")
+    sql_lines = generate_snapshot()
 
-# ---------------------------------------------------------
-# PROMOTIONS
-# ---------------------------------------------------------
-sql_lines.append("\n-- PROMOTIONS\n")
-
-geek_promos = [
-    "Semana del Anime",
-    "2x1 en Funkos Marvel",
-    "Descuento Gamer Weekend",
-    "Mes de los Superhéroes",
-    "Evento Retro Consolas",
-    "Black Friday Geek",
-    "Colecciona y Gana",
-    "Semana del Cómic",
-    "Festival Otaku",
-    "Cyber LootBox Days"
-]
-
-for i in range(NUM_PROMOTIONS):
-    nombre = f"{geek_promos[i % len(geek_promos)]}"
-    descripcion = sql_escape(fake.sentence(nb_words=10))
-    descuento = round(random.uniform(5, 40), 2)
-    fecha_inicio = random_date(START_DATE, END_DATE - timedelta(days=30))
-    fecha_fin = fecha_inicio + timedelta(days=random.randint(10, 60))
-    activa = random.choice([0, 1])
-    categoria_id = random.randint(1, NUM_CATEGORIES)
-    sql_lines.append(
-        f"INSERT INTO Promotions (Nombre, Descripción, Descuento_porcentaje, Fecha_inicio, Fecha_fin, Activa, Categories_ID) "
-        f"VALUES ('{nombre}', '{descripcion}', {descuento}, '{fecha_inicio:%Y-%m-%d %H:%M:%S}', '{fecha_fin:%Y-%m-%d %H:%M:%S}', {activa}, {categoria_id});"
-    )
-
-# ---------------------------------------------------------
-# LOYALTY MOVEMENTS
-# ---------------------------------------------------------
-sql_lines.append("\n-- LOYALTY MOVEMENTS\n")
-
-geek_loyalty_descriptions = [
-    "Compra de figura Funko",
-    "Canje de puntos por carta rara",
-    "Bonificación por evento de anime",
-    "Devolución de producto coleccionable",
-    "Compra durante promoción gamer",
-    "Participación en torneo de TCG",
-    "Compra anticipada de edición limitada"
-]
-
-for i in range(NUM_LOYALTY_MOVES):
-    fecha = random_date()
-    puntos = random.randint(-50, 150)  # algunos suman, otros restan
-    descripcion = sql_escape(random.choice(geek_loyalty_descriptions))
-    cliente_id = random.randint(1, NUM_CUSTOMERS)
-    orden_id = random.randint(1, NUM_ORDERS)
-    sql_lines.append(
-        f"INSERT INTO Loyalty_movements (Fecha, Puntos_cambio, Descripción, Customers_ID, Ordenes_ID) "
-        f"VALUES ('{fecha:%Y-%m-%d %H:%M:%S}', {puntos}, '{descripcion}', {cliente_id}, {orden_id});"
-    )
-
-# ---------------------------------------------------------
-# FINALIZAR ARCHIVO
-# ---------------------------------------------------------
-sql_lines.append("\n-- REACTIVAR CLAVES FORÁNEAS\n")
-sql_lines.append("SET FOREIGN_KEY_CHECKS = 1;\n")
+    # Guardar archivo SQL
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(sql_lines))
 
-# Guardar archivo SQL
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    f.write("\n".join(sql_lines))
+    print("\n✅ Archivo generado con éxito:")
+    print(f"📄 {OUTPUT_FILE}")
 
-print("\n✅ Archivo generado con éxito:")
-print(f"📄 {OUTPUT_FILE}")
+    print("\n🎉 Generación completa de datos para LootBox finalizada con éxito.")
+    print(f"📦 Datos generados para {NUM_CUSTOMERS} clientes, {NUM_PRODUCTS} productos, {NUM_ORDERS} órdenes, etc.")
 
-print("\n🎉 Generación completa de datos para LootBox finalizada con éxito.")
-print(f"📦 Datos generados para {NUM_CUSTOMERS} clientes, {NUM_PRODUCTS} productos, {NUM_ORDERS} órdenes, etc.")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Pruebas de split_sql sobre los scripts SQL del repositorio."""
+
+import re
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+from bootstrap_lootbox import split_sql, strip_line_comment  # noqa: E402
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "SQL_DB_Template"
+SQL_FILES = ["LootBoxDB.sql", "LootBoxIndexViews.sql", "seed_countries_cities.sql"]
+
+# Procedimientos, triggers y eventos llevan ";" dentro de su cuerpo
+_COMPOUND = re.compile(r"^CREATE\s+(PROCEDURE|TRIGGER|FUNCTION|EVENT)\b", re.IGNORECASE)
+
+
+def test_strip_line_comment():
+    assert strip_line_comment("WHERE x >= 1000;  -- umbral") == "WHERE x >= 1000;"
+    assert strip_line_comment("SELECT '-- no es comentario';") == "SELECT '-- no es comentario';"
+    assert strip_line_comment("SELECT 1;") == "SELECT 1;"
+
+
+def test_trailing_comment_ends_statement():
+    statements = split_sql("SELECT 1;  -- uno\nSELECT 2;\n")
+    assert statements == ["SELECT 1", "SELECT 2"]
+
+
+@pytest.mark.parametrize("name", SQL_FILES)
+def test_shipped_files_one_statement_each(name):
+    path = SQL_DIR / name
+    if not path.exists():
+        pytest.skip(f"{name} no existe")
+    for statement in split_sql(path.read_text(encoding="utf-8")):
+        if _COMPOUND.match(statement):
+            continue
+        code = "\n".join(strip_line_comment(line) for line in statement.splitlines())
+        code = re.sub(r"'(?:[^']|'')*'", "''", code)
+        assert ";" not in code, f"{name}: sentencias unidas:\n{statement[:300]}"
+
+
+def test_index_views_ltv_view_is_separate():
+    statements = split_sql((SQL_DIR / "LootBoxIndexViews.sql").read_text(encoding="utf-8"))
+    ltv = [s for s in statements if "vw_clientes_ltv_alto AS" in s]
+    assert len(ltv) == 1
+    assert "vw_inventario_producto_bodega" not in ltv[0]
@@ -0,0 +1,84 @@
+"""Prueba de integración de sp_refrescar_sales_cube contra la base LootBox."""
+
+import pytest
+
+mysql_connector = pytest.importorskip("mysql.connector")
+
+from DB_Proyecto import db  # noqa: E402
+
+
+@pytest.fixture
+def conn():
+    try:
+        conn = db.get_connection()
+    except mysql_connector.Error as e:
+        pytest.skip(f"sin conexión a MySQL: {e}")
+    yield conn
+    conn.close()
+
+
+def _ventas_mes(cursor, mes: int) -> float:
+    cursor.execute(
+        "SELECT Ventas FROM Sales_cube "
+        "WHERE Countries_ID = 0 AND Cities_ID = 0 AND Categories_ID = 0 AND Mes = %s",
+        (mes,),
+    )
+    row = cursor.fetchone()
+    return float(row[0]) if row else 0.0
+
+
+def test_future_dated_order_does_not_block_later_orders(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT Payments_ID, Customers_ID, Employees_ID, Shipments_ID FROM Ordenes LIMIT 1"
+    )
+    plantilla = cursor.fetchone()
+    cursor.execute("SELECT ID FROM Products LIMIT 1")
+    producto = cursor.fetchone()
+    if plantilla is None or producto is None:
+        pytest.skip("base sin órdenes ni productos")
+
+    cursor.execute("CALL sp_refrescar_sales_cube()")
+    cursor.execute(
+        "SELECT YEAR(NOW() + INTERVAL 40 DAY) * 100 + MONTH(NOW() + INTERVAL 40 DAY), "
+        "YEAR(NOW()) * 100 + MONTH(NOW())"
+    )
+    mes_futuro, mes_actual = cursor.fetchone()
+    antes_futuro = _ventas_mes(cursor, mes_futuro)
+    antes_actual = _ventas_mes(cursor, mes_actual)
+
+    # La orden fechada a futuro se inserta primero (ID menor)
+    nuevas = []
+    try:
+        for fecha in ("NOW() + INTERVAL 40 DAY", "NOW()"):
+            cursor.execute(
+                "INSERT INTO Ordenes (`Fecha de la orden`, Status, Total, Payments_ID, "
+                f"Customers_ID, Employees_ID, Shipments_ID) VALUES ({fecha}, 'PENDIENTE', 10, "
+                "%s, %s, %s, %s)",
+                plantilla,
+            )
+            nuevas.append(cursor.lastrowid)
+            cursor.execute(
+                "INSERT INTO Order_items (Products_ID, Ordenes_ID, Cantidad, `Precio por unidad`) "
+                "VALUES (%s, %s, 1, 10)",
+                (producto[0], cursor.lastrowid),
+            )
+        conn.commit()
+
+        cursor.execute("CALL sp_refrescar_sales_cube()")
+        assert _ventas_mes(cursor, mes_futuro) == pytest.approx(antes_futuro + 10)
+        assert _ventas_mes(cursor, mes_actual) == pytest.approx(antes_actual + 10)
+
+        cursor.execute(
+            "SELECT COUNT(*) FROM Sales_cube_pendientes WHERE Ordenes_ID IN (%s, %s)",
+            tuple(nuevas),
+        )
+        assert cursor.fetchone()[0] == 0
+    finally:
+        for orden_id in nuevas:
+            cursor.execute("DELETE FROM Order_items WHERE Ordenes_ID = %s", (orden_id,))
+            cursor.execute("DELETE FROM Ordenes WHERE ID = %s", (orden_id,))
+        conn.commit()
+        if nuevas:
+            cursor.execute("CALL sp_reconstruir_sales_cube()")
+        cursor.close()